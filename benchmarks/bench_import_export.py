@@ -0,0 +1,126 @@
+"""
+导入导出基准：生成 N 行话术，测量本地导出（CSV/JSON/XLSX）与分批导入的耗时，
+并与逐条 add_script（每条保存一次并重建索引）对比。
+
+    python -m benchmarks.bench_import_export --rows 100000
+
+所有数据写在临时目录中，不影响 data/ 下的真实数据。
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import utils.constants as constants
+
+
+def use_data_dir(root: str):
+    """把 DataAdapter 等模块使用的数据文件重定向到 root 下（须在创建 DataAdapter 之前调用）"""
+    for name in dir(constants):
+        if name.endswith('_abs_path') and name != 'file_abs_path':
+            value = getattr(constants, name)
+            setattr(constants, name, os.path.join(root, value.replace('\\', '/').rsplit('/', 1)[-1]))
+    constants.file_abs_path = root
+    # 预先写入空话术与默认配置，避免读取打包资源
+    with open(constants.real_scripts_abs_path, 'w', encoding='utf-8') as f:
+        json.dump([], f)
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    shutil.copyfile(os.path.join(data_dir, 'default_config.json'), constants.real_config_abs_path)
+    shutil.copyfile(os.path.join(data_dir, 'default_config.json'), constants.default_config_abs_path)
+    shutil.copyfile(os.path.join(data_dir, 'default_scripts.json'), constants.default_scripts_abs_path)
+
+
+def synthetic_tree(rows: int, types: int = 4, level_ones: int = 10, level_twos: int = 25):
+    """生成约 rows 条话术的树，均匀分布在各分类下"""
+    per_leaf = max(1, rows // (types * level_ones * level_twos))
+    next_id = iter(range(1, 10 ** 9))
+    tree, count = [], 0
+    for t in range(types):
+        type_node = {'id': next(next_id), 'name': f"类型{t}", 'data': []}
+        tree.append(type_node)
+        for a in range(level_ones):
+            level_one = {'id': next(next_id), 'name': f"一级{a}", 'data': []}
+            type_node['data'].append(level_one)
+            for b in range(level_twos):
+                level_two = {'id': next(next_id), 'name': f"二级{b}", 'data': []}
+                level_one['data'].append(level_two)
+                for _ in range(per_leaf):
+                    if count >= rows:
+                        break
+                    level_two['data'].append({
+                        'id': next(next_id),
+                        'title': f"标题{count}",
+                        'content': f"您好，这是第{count}条话术，很高兴为您服务！",
+                        'bgColor': '#764ba2' if count % 3 else ''
+                    })
+                    count += 1
+    return tree
+
+
+def timed(label: str, fn, results: list):
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    results.append((label, elapsed, value))
+    print(f"{label:<36}{elapsed:>9.2f}s  {value}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地导入导出基准")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--per-row-sample', type=int, default=5,
+                        help="逐条 add_script 的采样条数（按此估算逐条导入全部行的耗时）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_import_')
+    try:
+        use_data_dir(root)
+        from utils.data_adapter import DataAdapter
+        import utils.import_export as import_export
+
+        batch_size = args.batch_size or import_export.DEFAULT_BATCH_SIZE
+        tree = synthetic_tree(args.rows)
+        results = []
+        print(f"行数: {args.rows}  批大小: {batch_size}  临时目录: {root}\n")
+
+        sources = {}
+        for ext in ('csv', 'json', 'xlsx'):
+            if ext == 'xlsx' and import_export.openpyxl is None:
+                print("未安装 openpyxl，跳过 xlsx")
+                continue
+            path = os.path.join(root, f"source.{ext}")
+            timed(f"导出 {ext}", lambda: import_export.export_file(tree, path), results)
+            sources[ext] = path
+
+        for ext, path in sources.items():
+            # 每种格式导入到空库
+            with open(constants.real_scripts_abs_path, 'w', encoding='utf-8') as f:
+                json.dump([], f)
+            if os.path.exists(constants.change_log_abs_path):
+                os.remove(constants.change_log_abs_path)
+            adapter = DataAdapter()
+            importer = import_export.ScriptImporter(adapter, batch_size)
+            stats = timed(f"导入 {ext}（分批）", lambda: importer.import_file(path), results)
+            assert len(adapter.script_data_ById) == args.rows, (len(adapter.script_data_ById), stats)
+
+        # 逐条 add_script：每条一次保存 + 全量重建索引
+        level_two_id = adapter.all_level_two_data_list[0]['id']
+        sample = args.per_row_sample
+
+        def per_row():
+            for n in range(sample):
+                adapter.add_script(level_two_id, f"逐条{n}", "逐条导入")
+            return f"{sample} 条"
+        timed("逐条 add_script（采样）", per_row, results)
+        per_item = results[-1][1] / sample
+        print(f"\n逐条导入 {args.rows} 行估算: {per_item * args.rows:.0f}s（每条 {per_item * 1000:.1f}ms）")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+内存基准：加载 N 条话术的库，测量 DataAdapter（树 + 四表 + 索引）占用的内存，
+以及为每个一级分类构建一次界面视图（get_tree_scripts_data）新增的内存。
+
+    python -m benchmarks.bench_records --rows 100000
+
+RSS 优先用 psutil 读取，未安装时在 Linux 上读取 /proc/self/statm；tracemalloc 给出 Python 对象的精确占用。
+所有数据写在临时目录中，不影响 data/ 下的真实数据。
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Optional
+
+import utils.constants as constants
+from benchmarks.bench_import_export import synthetic_tree, use_data_dir
+
+try:
+    import psutil  # 可选：读取进程 RSS
+except ImportError:
+    psutil = None
+
+
+def rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存（字节）；无法读取时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def mb(value: Optional[int]) -> str:
+    return '未知' if value is None else f"{value / 2 ** 20:.1f}MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="话术库内存基准")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--no-trace', action='store_true', help="不启用 tracemalloc（加载更快，只报告 RSS）")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_records_')
+    try:
+        use_data_dir(root)
+        with open(constants.real_scripts_abs_path, 'w', encoding='utf-8') as f:
+            json.dump(synthetic_tree(args.rows), f, ensure_ascii=False)
+        from utils.data_adapter import DataAdapter
+
+        gc.collect()
+        rss_before = rss_bytes()
+        if not args.no_trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        adapter = DataAdapter()
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] if not args.no_trace else None
+        rss_after = rss_bytes()
+
+        views = [adapter.get_tree_scripts_data(type_rec['id'], level_one['id'])
+                 for type_rec in adapter.all_type_data_list
+                 for level_one in adapter.get_level_one_list(type_rec['id'])]
+        gc.collect()
+        traced_views = tracemalloc.get_traced_memory()[0] - traced if not args.no_trace else None
+
+        print(f"话术数: {len(adapter.script_data_ById)}  加载耗时: {elapsed:.2f}s")
+        print(f"RSS 增加: {mb(None if rss_before is None or rss_after is None else rss_after - rss_before)}")
+        if not args.no_trace:
+            print(f"Python 对象: {mb(traced)}")
+            print(f"全部一级分类视图({len(views)} 个): {mb(traced_views)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
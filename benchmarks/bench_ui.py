@@ -0,0 +1,126 @@
+"""
+界面基准：用 benchmarks/ui_harness.py 在离屏 Qt 中启动主窗口（Linux 上同样可运行），测量界面操作从触发到
+布局、重绘完成的耗时。结果格式与 benchmarks/suite.py 相同，可用 `python -m benchmarks.suite --compare` 比较。
+
+    python -m benchmarks.bench_ui                          # 默认 1k,10k，写入 benchmarks/results/ui-<提交>.json
+    python -m benchmarks.bench_ui --sizes 10k,100k --repeat 5
+
+测量项:
+    ui.first_paint         创建主窗口（读取话术库、建索引、建界面）到首次绘制完成
+    ui.switch_level_one    点击一级分类按钮（渲染该分类的话术树）
+    ui.switch_type         切换话术类型 Tab（重建一级分类按钮并渲染话术树）
+    ui.level_one_tabs      update_level_one_tabs() 重建一级分类按钮
+    ui.search_keystroke    在搜索框逐字输入，每输入一个字过滤全库并渲染结果
+    ui.font_size           apply_ui_font_size() 改字号并重新渲染
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from benchmarks.suite import RESULTS_DIR, Recorder, default_repeat, environment
+from benchmarks.synthetic import generate, parse_size
+from benchmarks.ui_harness import UiHarness
+
+# 搜索首字几乎匹配全库，100k 时每次按键要渲染数万行，需显式指定 --sizes 100k
+DEFAULT_SIZES = '1k,10k'
+# 逐字输入的搜索词（前缀依次为 "亲"、"亲亲"、…，匹配数逐步减少）
+SEARCH_QUERY = '亲亲麻烦您'
+# 每轮最多切换的一级分类数
+MAX_LEVEL_ONES = 8
+
+
+def first_paint_repeat(scripts: int) -> int:
+    return 5 if scripts <= 100000 else 2
+
+
+def bench_first_paint(rec: Recorder, harness: UiHarness, repeat: int):
+    for n in range(repeat + 1):
+        start = time.perf_counter()
+        window = harness.boot()
+        elapsed = (time.perf_counter() - start) * 1000
+        harness.close(window)
+        if n:  # 第一次预热（字体、样式表缓存），不计入
+            rec.add('ui.first_paint', elapsed)
+    rec.report('ui.first_paint')
+
+
+def bench_window(rec: Recorder, harness: UiHarness):
+    window = harness.boot()
+    # 启动后 100ms 才按实际宽度重排一级分类按钮
+    harness.pump(300)
+    adapter = window.data_adapter
+
+    def timed_paint(name: str, fn):
+        start = time.perf_counter()
+        fn()
+        harness.paint()
+        rec.add(name, (time.perf_counter() - start) * 1000)
+
+    type_id = window.current_type_id
+    level_ones = list(adapter.get_level_one_list(type_id))[:MAX_LEVEL_ONES]
+    for _ in range(rec.repeat):
+        for level_one in level_ones:
+            if level_one['id'] == window.current_level_one_id:
+                continue
+            timed_paint('ui.switch_level_one', lambda: window.on_secondary_button_clicked(
+                type_id, level_one['id'], level_one['name']))
+    rec.report('ui.switch_level_one')
+
+    type_count = window.type_tab_widget.count()
+    if type_count > 1:
+        for n in range(rec.repeat):
+            timed_paint('ui.switch_type', lambda: window.type_tab_widget.setCurrentIndex((n + 1) % type_count))
+        rec.report('ui.switch_type')
+
+    rec.measure('ui.level_one_tabs', lambda: (window.update_level_one_tabs(), harness.paint()))
+
+    for _ in range(rec.repeat):
+        for end in range(1, len(SEARCH_QUERY) + 1):
+            timed_paint('ui.search_keystroke', lambda: window.search_edit.setText(SEARCH_QUERY[:end]))
+        window.clear_search()
+        harness.paint()
+    rec.report('ui.search_keystroke')
+
+    sizes = iter([13, 12] * (rec.repeat + 1))
+    rec.measure('ui.font_size', lambda: (window.apply_ui_font_size(next(sizes)), harness.paint()))
+    harness.close(window)
+
+
+def run_size(label: str, scripts: int, seed: int, repeat: int, paint_repeat: int):
+    tree = generate(scripts, seed)
+    rec = Recorder(label, repeat)
+    with UiHarness(tree) as harness:
+        bench_first_paint(rec, harness, paint_repeat)
+        bench_window(rec, harness)
+    return {'scripts': scripts, 'repeat': repeat, 'results': rec.results()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离屏界面基准")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="逗号分隔：1k/10k/100k/1m 或整数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=None, help="每项重复次数（默认按规模）")
+    parser.add_argument('--out', default=None, help="结果文件（默认 benchmarks/results/ui-<提交>.json）")
+    args = parser.parse_args()
+
+    # 基准中的卡顿是预期的，不输出卡顿监测等模块的警告
+    logging.disable(logging.WARNING)
+    meta = environment(args.seed)
+    output = {'meta': meta, 'sizes': {}}
+    for label in (s.strip() for s in args.sizes.split(',') if s.strip()):
+        scripts = parse_size(label)
+        repeat = args.repeat or min(default_repeat(scripts), 10)
+        paint_repeat = args.repeat or first_paint_repeat(scripts)
+        output['sizes'][label] = run_size(label, scripts, args.seed, repeat, paint_repeat)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"ui-{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+内存浸泡测试：在离屏主窗口中反复切换分类 Tab 并搜索（默认 10000 次），检查内存是否有界。
+
+每次迭代点击下一个一级分类（每轮一级分类切完后切换一次话术类型），再在搜索框输入一条话术的标题并清空。
+预热后回到第一个页面记下基线，之后每 --sample-every 次回到同一页面采样（utils/memory_tracker.py）:
+- 同一页面话术树下的某类控件比基线多 --max-widget-growth 个以上（控件泄漏）
+- 进程 RSS（扣除 tracemalloc 自身的占用）比基线增长超过 --max-rss-growth-mb
+- Python 分配（tracemalloc）比基线增长超过 --max-py-growth-mb
+任一项超出时打印原因并以退出码 1 结束，可直接用于 CI。
+
+每次迭代重建三次话术树（每行约 10ms），开启 tracemalloc 时再慢约一倍：默认 200 条话术、10000 次约需数小时，
+快速检查可用 --iterations 500。
+
+    python -m benchmarks.soak_memory                                   # 200 条话术，10000 次
+    python -m benchmarks.soak_memory --scripts 1k --iterations 500 --out /tmp/soak.json
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from benchmarks.synthetic import generate, parse_size
+from benchmarks.ui_harness import UiHarness
+from utils.memory_tracker import MemoryTracker, mb
+
+# 回到该页面采样（与基线比较）
+BASELINE_KEY = '基线页'
+# 搜索词取自话术标题（每个只匹配少量话术），从中轮换
+SEARCH_TERMS = 50
+
+
+def search_terms(window, count: int, seed: int):
+    titles = [script.get('title') for script in window.data_adapter.all_script_data_list if script.get('title')]
+    random.Random(seed).shuffle(titles)
+    return titles[:count] or ['亲']
+
+
+class Soak:
+    def __init__(self, harness: UiHarness, window, seed: int):
+        self.harness = harness
+        self.window = window
+        self.terms = search_terms(window, SEARCH_TERMS, seed)
+        self.type_count = window.type_tab_widget.count()
+        self.type_index = window.type_tab_widget.currentIndex()
+        self.level_ones = self._level_ones()
+        self.position = 0
+
+    def _level_ones(self):
+        return list(self.window.data_adapter.get_level_one_list(self.window.current_type_id))
+
+    def settle(self):
+        """处理事件并让 deleteLater 的控件真正销毁"""
+        self.harness.pump(0)
+
+    def step(self, n: int):
+        window = self.window
+        if self.level_ones:
+            level_one = self.level_ones[self.position % len(self.level_ones)]
+            window.on_secondary_button_clicked(window.current_type_id, level_one['id'], level_one['name'])
+            self.position += 1
+        if self.type_count > 1 and (not self.level_ones or self.position % len(self.level_ones) == 0):
+            self.type_index = (self.type_index + 1) % self.type_count
+            window.type_tab_widget.setCurrentIndex(self.type_index)
+            self.level_ones = self._level_ones()
+            self.position = 0
+        self.settle()
+        window.search_edit.setText(self.terms[n % len(self.terms)])
+        self.settle()
+        window.clear_search()
+        self.settle()
+
+    def go_home(self):
+        """回到第一个话术类型的第一个一级分类（采样页）"""
+        window = self.window
+        if self.type_count:
+            self.type_index = 0
+            window.type_tab_widget.setCurrentIndex(0)
+        self.level_ones = self._level_ones()
+        self.position = 0
+        if self.level_ones:
+            level_one = self.level_ones[0]
+            window.on_secondary_button_clicked(window.current_type_id, level_one['id'], level_one['name'])
+            self.position = 1
+        self.settle()
+        self.settle()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切换分类与搜索的内存浸泡测试")
+    parser.add_argument('--scripts', default='200', help="话术条数：1k/10k/100k 或整数（泄漏与库大小无关，默认用小库）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--warmup', type=int, default=100, help="预热次数（字体、样式与缓存）")
+    parser.add_argument('--sample-every', type=int, default=500)
+    parser.add_argument('--max-widget-growth', type=int, default=0, help="同一页面每类控件允许增加的个数")
+    parser.add_argument('--max-rss-growth-mb', type=float, default=50.0)
+    parser.add_argument('--max-py-growth-mb', type=float, default=20.0)
+    parser.add_argument('--no-trace', action='store_true', help="不启用 tracemalloc（更快，不检查 Python 分配）")
+    parser.add_argument('--out', default=None, help="把采样记录写入该 JSON 文件")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    tree = generate(parse_size(args.scripts), args.seed)
+    failures = []
+    with UiHarness(tree) as harness:
+        window = harness.boot()
+        harness.pump(300)
+        tracker = MemoryTracker(root=window.script_tree, min_growth=args.max_widget_growth + 1)
+        soak = Soak(harness, window, args.seed)
+        print(f"{len(window.data_adapter.all_script_data_list)} 条话术，{soak.type_count} 个类型，"
+              f"迭代 {args.iterations} 次（预热 {args.warmup} 次）")
+
+        for n in range(args.warmup):
+            soak.step(n)
+        if args.no_trace:
+            tracker.sample('开始')
+        else:
+            tracker.set_enabled(True)
+        soak.go_home()
+        baseline = tracker.sample('基线')
+        tracker.checkpoint_now(BASELINE_KEY, window.data_adapter.views_generation)
+
+        start = time.perf_counter()
+        done = 0
+        for n in range(args.iterations):
+            soak.step(n)
+            done = n + 1
+            if done % args.sample_every == 0 or done == args.iterations:
+                soak.go_home()
+                growth = tracker.checkpoint_now(BASELINE_KEY, window.data_adapter.views_generation)
+                record = tracker.history[-1]
+                print(f"{done:>7}  RSS {mb(record['rss']):>9}  Python {mb(record['py_current']):>9}  "
+                      f"控件 {record['widgets']:>6}  {time.perf_counter() - start:>7.1f}s")
+                if growth:
+                    failures.append("同一页面控件增加: " + '，'.join(f"{name} +{count}"
+                                                            for name, count in sorted(growth.items())))
+                    break
+        final = tracker.history[-1]
+        harness.close(window)
+
+    if baseline['rss'] is not None and final['rss'] is not None:
+        rss_growth = ((final['rss'] - final['trace_overhead'])
+                      - (baseline['rss'] - baseline['trace_overhead'])) / 2 ** 20
+        if rss_growth > args.max_rss_growth_mb:
+            failures.append(f"RSS 增长 {rss_growth:.1f}MB，超过 {args.max_rss_growth_mb}MB")
+    if not args.no_trace:
+        py_growth = (final['py_current'] - baseline['py_current']) / 2 ** 20
+        if py_growth > args.max_py_growth_mb:
+            failures.append(f"Python 分配增长 {py_growth:.1f}MB，超过 {args.max_py_growth_mb}MB")
+            failures.extend(f"  {line}" for line in tracker.top_lines)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'iterations': done, 'failures': failures,
+                       'history': [dict(record, widget_counts=dict(record['widget_counts']))
+                                   for record in tracker.history]},
+                      f, ensure_ascii=False, indent=2)
+    tracker.set_enabled(False)
+
+    if failures:
+        print("\n内存未收敛:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\n通过：{done} 次后 RSS {mb(final['rss'])}（基线 {mb(baseline['rss'])}），"
+          f"控件 {final['widgets']}（基线 {baseline['widgets']}）")
+
+
+if __name__ == '__main__':
+    main()
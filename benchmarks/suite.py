@@ -0,0 +1,362 @@
+"""
+基准套件：用 benchmarks/synthetic.py 生成 1k/10k/100k（可选 1m）条话术的库，测量热点路径的耗时，
+结果写成 JSON，便于在不同提交之间比较。
+
+    python -m benchmarks.suite                              # 默认 1k,10k,100k，写入 benchmarks/results/<提交>.json
+    python -m benchmarks.suite --sizes 1k,1m --skip api
+    python -m benchmarks.suite --compare old.json new.json  # 中位数变慢超过 20% 的项标记为回退，退出码 1
+
+测量项（每项重复多次，记录中位数/最小/最大毫秒）:
+    load         DataAdapter() 读取 scripts.json 并建索引
+    index        rebuild_indexes()
+    crud         四级节点各自的新增/编辑/删除，移动话术与二级分类（每次操作都会保存整个库）
+    view         get_tree_scripts_data 冷启动（清空视图缓存）与命中缓存
+    search       与主界面 on_search_changed 相同的全库逐条匹配（常见词 / 不存在的词）
+    config       ConfigStore 修改一项并同步写入
+    api          APIManager 对本地 tools/reference_server.py 的往返（登录、整库上传/下载、增量拉取/推送）
+
+所有数据写在临时目录中，不影响 data/ 下的真实数据；同一 --seed 生成的库完全相同。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import utils.constants as constants
+from benchmarks.bench_import_export import use_data_dir
+from benchmarks.synthetic import count_scripts, generate, parse_size
+
+GROUPS = ('load', 'index', 'crud', 'view', 'search', 'config', 'api')
+DEFAULT_SIZES = '1k,10k,100k'
+# 中位数之比超过该值视为回退
+REGRESSION_RATIO = 1.2
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def default_repeat(scripts: int) -> int:
+    if scripts <= 10000:
+        return 20
+    if scripts <= 100000:
+        return 5
+    return 3
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        'median_ms': round(statistics.median(samples), 4),
+        'min_ms': round(min(samples), 4),
+        'max_ms': round(max(samples), 4),
+        'runs': len(samples),
+    }
+
+
+class Recorder:
+    """收集一个规模下各项的耗时样本并打印进度"""
+
+    def __init__(self, label: str, repeat: int):
+        self.label = label
+        self.repeat = repeat
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, name: str, elapsed_ms: float):
+        self.samples.setdefault(name, []).append(elapsed_ms)
+
+    def measure(self, name: str, fn: Callable[[], Any], warmup: int = 1, repeat: Optional[int] = None):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            fn()
+            self.add(name, (time.perf_counter() - start) * 1000)
+        self.report(name)
+
+    def timed(self, name: str, fn: Callable[[], Any]) -> Any:
+        """计时一次调用并返回其结果（成对的操作，如新增后再删除）"""
+        start = time.perf_counter()
+        value = fn()
+        self.add(name, (time.perf_counter() - start) * 1000)
+        return value
+
+    def report(self, name: str):
+        stats = summarize(self.samples[name])
+        print(f"{self.label:>6}  {name:<28}{stats['median_ms']:>12.3f}ms  "
+              f"(min {stats['min_ms']:.3f}  max {stats['max_ms']:.3f}  n={stats['runs']})", flush=True)
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+
+# ==================== 测量项 ====================
+
+def bench_load(rec: Recorder, adapter_cls):
+    rec.measure('load', adapter_cls, warmup=0)
+
+
+def bench_index(rec: Recorder, adapter):
+    rec.measure('index.rebuild', adapter.rebuild_indexes)
+
+
+def _last_child_id(rec_map: Dict[int, Any], parent_id: int) -> int:
+    return rec_map[parent_id].node['data'][-1]['id']
+
+
+def bench_crud(rec: Recorder, adapter):
+    type_id = adapter.all_type_id_list[0]
+    level_one_id = adapter.all_level_one_data_list[0]['id']
+    level_two_id = adapter.all_level_two_data_list[0]['id']
+    other_level_two_id = adapter.all_level_two_data_list[-1]['id']
+    other_level_one_id = adapter.all_level_one_data_list[-1]['id']
+
+    for n in range(rec.repeat + 1):
+        keep = n > 0  # 第一轮预热，不计入
+        steps = [
+            ('type', lambda: adapter.add_type(f"基准类型{n}"), lambda: None,
+             adapter.edit_type_name, adapter.delete_type),
+            ('level_one', lambda: adapter.add_level_one(type_id, f"基准一级{n}"),
+             lambda: _last_child_id(adapter.type_data_ById, type_id),
+             adapter.edit_level_one_name, adapter.delete_level_one),
+            ('level_two', lambda: adapter.add_level_two(level_one_id, f"基准二级{n}"),
+             lambda: _last_child_id(adapter.level_one_data_ById, level_one_id),
+             adapter.edit_level_two_name, adapter.delete_level_two),
+            ('script', lambda: adapter.add_script(level_two_id, '', f"基准话术{n}，很高兴为您服务"),
+             lambda: _last_child_id(adapter.level_two_data_ById, level_two_id),
+             lambda node_id, name: adapter.edit_script(node_id, content=name), adapter.delete_script),
+        ]
+        for kind, add, locate, edit, delete in steps:
+            start = time.perf_counter()
+            result = add()
+            elapsed = (time.perf_counter() - start) * 1000
+            node_id = result if kind == 'type' else locate()
+            if not result or node_id is None:
+                raise RuntimeError(f"新增{kind}失败")
+            if keep:
+                rec.add(f"crud.add_{kind}", elapsed)
+            for name, fn in ((f"crud.edit_{kind}", lambda: edit(node_id, f"修改后{n}")),
+                             (f"crud.delete_{kind}", lambda: delete(node_id))):
+                start = time.perf_counter()
+                if not fn():
+                    raise RuntimeError(f"{name} 失败")
+                if keep:
+                    rec.add(name, (time.perf_counter() - start) * 1000)
+
+        # 移动后移回原处，库保持不变
+        script_id = adapter.level_two_data_ById[level_two_id].node['data'][0]['id']
+        level_two_to_move = adapter.level_one_data_ById[level_one_id].node['data'][0]['id']
+        for name, fn in (('crud.move_script', lambda: adapter.move_script(script_id, other_level_two_id)),
+                         ('crud.move_script', lambda: adapter.move_script(script_id, level_two_id, 0)),
+                         ('crud.move_level_two', lambda: adapter.move_level_two(level_two_to_move, other_level_one_id)),
+                         ('crud.move_level_two', lambda: adapter.move_level_two(level_two_to_move, level_one_id, 0))):
+            start = time.perf_counter()
+            if not fn():
+                raise RuntimeError(f"{name} 失败")
+            if keep:
+                rec.add(name, (time.perf_counter() - start) * 1000)
+
+    for name in sorted(rec.samples):
+        if name.startswith('crud.'):
+            rec.report(name)
+
+
+def bench_view(rec: Recorder, adapter):
+    # 取话术最多的一级分类：切换到该分类是最慢的情况
+    largest = max(adapter.all_level_one_data_list,
+                  key=lambda r: sum(len(l2.get('data', ())) for l2 in r.node.get('data', ())))
+    type_id, level_one_id = largest['typeId'], largest['id']
+
+    def cold():
+        with adapter._views_lock:
+            adapter._views.clear()
+        adapter.get_tree_scripts_data(type_id, level_one_id)
+
+    rec.measure('view.cold', cold)
+    rec.measure('view.warm', lambda: adapter.get_tree_scripts_data(type_id, level_one_id))
+
+
+def search(adapter, text: str) -> list:
+    """与 chatAssistant.on_search_changed 的匹配循环一致"""
+    text = text.strip().lower()
+    matched_scripts = []
+    for script_data in adapter.all_script_data_list:
+        if text in (script_data.get('content').lower()) or text in (script_data.get('title', '').lower()):
+            matched_scripts.append(script_data)
+    return matched_scripts
+
+
+def bench_search(rec: Recorder, adapter):
+    rec.measure('search.common', lambda: search(adapter, '亲亲'))
+    rec.measure('search.miss', lambda: search(adapter, '不存在的词语'))
+
+
+def bench_config(rec: Recorder):
+    from PySide6.QtCore import QCoreApplication
+    from utils.config_store import ConfigStore
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    store = ConfigStore(app)
+    state = {'value': store.get('always_on_top')}
+
+    def set_and_flush():
+        state['value'] = not state['value']
+        store.set('always_on_top', state['value'])
+        store.flush()
+
+    rec.measure('config.set_flush', set_and_flush)
+
+
+def bench_api(rec: Recorder, tree: List[Dict[str, Any]]):
+    from tools.reference_server import ReferenceServer
+    from utils import sync_protocol
+    from utils.api_manager import APIManager
+
+    server = ReferenceServer().start()
+    try:
+        api = APIManager(base_url=server.url)
+        rec.measure('api.login', lambda: api.login('bench', 'bench'))
+        rec.measure('api.save_user_data', lambda: api.save_user_data({'scripts_data': tree}))
+        rec.measure('api.get_user_data', api.get_user_data)
+        rec.measure('api.get_user_changes.full', lambda: api.get_user_changes(0))
+
+        entity = next(e for e in sync_protocol.flatten_tree(tree[:1]).values() if e['kind'] == 'script')
+        state = {'rev': api.get_user_changes(0)['rev'], 'n': 0}
+
+        def push():
+            state['n'] += 1
+            changed = dict(entity, fields=dict(entity['fields'], content=f"基准修改{state['n']}"))
+            state['rev'] = api.push_user_changes(state['rev'], [changed], [])['rev']
+
+        rec.measure('api.push_user_changes', push)
+        rec.measure('api.get_user_changes.delta', lambda: api.get_user_changes(state['rev'] - 1))
+        etag = api.get_user_changes(state['rev'] - 1)['etag']
+        rec.measure('api.get_user_changes.304', lambda: api.get_user_changes(state['rev'], etag))
+    finally:
+        server.stop()
+
+
+# ==================== 运行 ====================
+
+def run_size(label: str, scripts: int, seed: int, repeat: int, skip: List[str]) -> Dict[str, Any]:
+    tree = generate(scripts, seed)
+    rec = Recorder(label, repeat)
+    root = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        use_data_dir(root)
+        with open(constants.real_scripts_abs_path, 'w', encoding='utf-8') as f:
+            json.dump(tree, f, ensure_ascii=False)
+        from utils.data_adapter import DataAdapter
+
+        if 'load' not in skip:
+            bench_load(rec, DataAdapter)
+        adapter = DataAdapter()
+        gc.collect()
+        if 'index' not in skip:
+            bench_index(rec, adapter)
+        if 'view' not in skip:
+            bench_view(rec, adapter)
+        if 'search' not in skip:
+            bench_search(rec, adapter)
+        if 'crud' not in skip:
+            bench_crud(rec, adapter)
+        if 'config' not in skip:
+            bench_config(rec)
+        if 'api' not in skip:
+            bench_api(rec, tree)
+        return {'scripts': count_scripts(tree), 'repeat': repeat, 'results': rec.results()}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(('git',) + args, cwd=REPO_ROOT, capture_output=True, text=True,
+                              timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def environment(seed: int) -> Dict[str, Any]:
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD') or 'unknown',
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'seed': seed,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float = REGRESSION_RATIO) -> int:
+    """逐项比较两份结果的中位数，返回回退项数"""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"旧: {old['meta']['commit']}{'(有改动)' if old['meta']['dirty'] else ''}  "
+          f"新: {new['meta']['commit']}{'(有改动)' if new['meta']['dirty'] else ''}")
+    print(f"{'规模':>6}  {'测量项':<28}{'旧ms':>12}{'新ms':>12}{'比值':>8}")
+    regressions = 0
+    for label, size in new['sizes'].items():
+        old_results = old['sizes'].get(label, {}).get('results', {})
+        for name, stats in size['results'].items():
+            before = old_results.get(name)
+            if before is None:
+                print(f"{label:>6}  {name:<28}{'-':>12}{stats['median_ms']:>12.3f}")
+                continue
+            ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+            mark = ''
+            if ratio > threshold:
+                mark = '  变慢'
+                regressions += 1
+            elif ratio < 1 / threshold:
+                mark = '  变快'
+            print(f"{label:>6}  {name:<28}{before['median_ms']:>12.3f}{stats['median_ms']:>12.3f}"
+                  f"{ratio:>8.2f}{mark}")
+    print(f"\n{regressions} 项变慢超过 {threshold:.0%}" if regressions else "\n没有变慢的测量项")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="话术库基准套件")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="逗号分隔：1k/10k/100k/1m 或整数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=None, help="每项重复次数（默认按规模：20/20/5/3）")
+    parser.add_argument('--skip', default='', help=f"跳过的测量组，逗号分隔：{','.join(GROUPS)}")
+    parser.add_argument('--out', default=None, help="结果文件（默认 benchmarks/results/<提交>.json）")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="比较两份结果，不运行基准")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_RATIO, help="判定变慢的中位数比值")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    skip = [name.strip() for name in args.skip.split(',') if name.strip()]
+    unknown = set(skip) - set(GROUPS)
+    if unknown:
+        parser.error(f"未知的测量组: {','.join(sorted(unknown))}")
+
+    meta = environment(args.seed)
+    output = {'meta': meta, 'sizes': {}}
+    for label in (s.strip() for s in args.sizes.split(',') if s.strip()):
+        scripts = parse_size(label)
+        repeat = args.repeat or default_repeat(scripts)
+        output['sizes'][label] = run_size(label, scripts, args.seed, repeat, skip)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+基准数据生成 - 按 data/default_scripts.json 的结构生成可复现的四级话术库（类型 → 一级 → 二级 → 话术）
+
+形状参照默认话术：每个一级分类约 30 个二级分类，话术内容平均约 50 字（少数带换行的长套餐说明），
+标题大多为空、背景色大多为空；库越大，每个二级分类下的话术越多。同一 (scripts, seed) 生成的树完全相同。
+
+    python -m benchmarks.synthetic --scripts 100k --out /tmp/scripts.json
+"""
+import argparse
+import json
+import math
+import random
+from typing import Any, Dict, List
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+TYPE_NAMES = ('拼多多售前', '拼多多售后', '淘宝售前', '淘宝售后', '京东客服', '抖音小店', '快手小店', '微信私域')
+LEVEL_ONE_NAMES = ('欢迎语', '产品咨询', '催付', '物流查询', '退换货', '优惠活动', '售后安抚', '好评邀请',
+                   '发货通知', '套餐介绍', '尺码推荐', '活动规则')
+LEVEL_TWO_NAMES = ('了解客户需求', '套餐', '网速', '随用随充', '下单邀请', '发货', '电池', '运费险', '质保',
+                   '怎么激活使用', '连接距离', '连接人数', '退充值费用', '双网通', '注销实名', '重量', '芯片',
+                   '版本区别', '实名年龄', '催付', '尺码', '颜色', '材质', '赠品', '价格保护', '开发票', '安装')
+PHRASES = ('亲亲', '很高兴为您服务', '有什么可以帮到您的吗', '您可以说下您的需求', '这边给您推荐下呢',
+           '我们套餐是0月租', '不自动扣费', '您想用多少流量就充多少', '没有二次隐形和其他消费的',
+           '套餐长期有效的', '不涨价', '每个月都可以充值', '用哪个套餐就充对应的金额', '不用闲置也不会自动续费扣费',
+           '全国高速流量', '信号网速杠杠的', '您无需担心限速网速慢等问题', '今天下单今天发货',
+           '快递一般三到五天送达', '支持七天无理由退换', '运费险已经帮您勾选上了', '收到货有任何问题随时联系我们',
+           '麻烦您提供一下订单号', '这边马上为您查询', '请您耐心等待一下', '感谢您的理解与支持',
+           '现在下单还有赠品', '活动截止到今晚十二点', '给您申请了专属优惠', '质量问题我们包退包换')
+EMOJI = ('[玫瑰]', '[微笑]', '[爱心]', '[握手]', '[OK]')
+PUNCT = ('，', '，', ' ', '！', '~')
+COLORS = ('#764ba2', '#f56c6c', '#67c23a', '#409eff', '#e6a23c')
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    return SIZES[value] if value in SIZES else int(value)
+
+
+def _text(rng: random.Random, length: int) -> str:
+    parts, size = [], 0
+    while size < length:
+        phrase = rng.choice(PHRASES)
+        parts.append(phrase)
+        parts.append(rng.choice(PUNCT))
+        size += len(phrase) + 1
+    text = ''.join(parts)[:length].rstrip('，~ ') + rng.choice(('。', '呢', '哦~', '！'))
+    return text + rng.choice(EMOJI) if rng.random() < 0.15 else text
+
+
+def _content(rng: random.Random) -> str:
+    # 约 5% 是带换行的长说明（套餐/活动列表），其余为一两句话
+    if rng.random() < 0.05:
+        lines = [_text(rng, rng.randint(15, 30))]
+        lines += [f"【{rng.choice(LEVEL_TWO_NAMES)}】{_text(rng, rng.randint(12, 28))}" for _ in range(rng.randint(3, 6))]
+        return '\n'.join(lines)
+    return _text(rng, max(6, int(rng.lognormvariate(math.log(38), 0.5))))
+
+
+def _split(rng: random.Random, total: int, parts: int) -> List[int]:
+    """把 total 随机分成 parts 份（每份至少 1，偏斜分布：少数分类很大）"""
+    weights = [rng.paretovariate(2.0) for _ in range(parts)]
+    scale = (total - parts) / sum(weights)
+    counts = [1 + int(w * scale) for w in weights]
+    for i in range(total - sum(counts)):
+        counts[i % parts] += 1
+    return counts
+
+
+def generate(scripts: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成含 scripts 条话术的树"""
+    rng = random.Random(seed)
+    per_level_two = min(40, max(3, scripts // 2500))
+    level_twos = max(1, math.ceil(scripts / per_level_two))
+    level_ones = max(1, math.ceil(level_twos / 30))
+    types = min(len(TYPE_NAMES), max(2, int(math.log10(max(scripts, 10)))))
+    types = min(types, level_ones)
+
+    next_id = iter(range(10 ** 15, 10 ** 16))
+    level_ones_per_type = _split(rng, level_ones, types)
+    level_twos_per_level_one = _split(rng, level_twos, level_ones)
+    scripts_per_level_two = _split(rng, scripts, level_twos)
+
+    tree: List[Dict[str, Any]] = []
+    l1_index = l2_index = 0
+    for t, level_one_count in enumerate(level_ones_per_type):
+        type_node = {'name': TYPE_NAMES[t], 'id': next(next_id), 'data': []}
+        tree.append(type_node)
+        for a in range(level_one_count):
+            name = LEVEL_ONE_NAMES[a % len(LEVEL_ONE_NAMES)]
+            level_one = {'name': name if a < len(LEVEL_ONE_NAMES) else f"{name}{a // len(LEVEL_ONE_NAMES) + 1}",
+                         'id': next(next_id), 'data': []}
+            type_node['data'].append(level_one)
+            for b in range(level_twos_per_level_one[l1_index]):
+                name = LEVEL_TWO_NAMES[b % len(LEVEL_TWO_NAMES)]
+                level_two = {'name': name if b < len(LEVEL_TWO_NAMES) else f"{name}{b // len(LEVEL_TWO_NAMES) + 1}",
+                             'id': next(next_id), 'data': []}
+                level_one['data'].append(level_two)
+                for _ in range(scripts_per_level_two[l2_index]):
+                    level_two['data'].append({
+                        'id': next(next_id),
+                        'title': _text(rng, rng.randint(4, 10)) if rng.random() < 0.2 else '',
+                        'bgColor': rng.choice(COLORS) if rng.random() < 0.05 else '',
+                        'content': _content(rng),
+                    })
+                l2_index += 1
+            l1_index += 1
+    return tree
+
+
+def count_scripts(tree: List[Dict[str, Any]]) -> int:
+    return sum(len(l2['data']) for t in tree for l1 in t['data'] for l2 in l1['data'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准话术库")
+    parser.add_argument('--scripts', default='10k', help="话术条数：1k/10k/100k/1m 或整数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    tree = generate(parse_size(args.scripts), args.seed)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(tree, f, ensure_ascii=False)
+    print(f"已生成 {count_scripts(tree)} 条话术: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
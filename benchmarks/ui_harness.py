@@ -0,0 +1,142 @@
+"""
+离屏界面启动器：在没有显示器的机器（含 Linux）上以 QT_QPA_PLATFORM=offscreen 启动 AssistantMainWindow，
+窗口与按键换成 utils/platform_shim.py 的假实现，数据写在临时目录中。供界面基准与调试脚本使用:
+
+    from benchmarks.ui_harness import UiHarness
+    with UiHarness(generate(10000)) as harness:
+        window = harness.boot()
+        harness.pump(200)
+        window.search_edit.setText('亲亲')
+
+    python -m benchmarks.ui_harness --scripts 10k --screenshot /tmp/main.png   # 启动一次并截图
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# 须在导入 PySide6 之前设置；已设置（如需要在真实屏幕上查看）时保持不变
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+import utils.constants as constants
+import utils.platform_shim as platform_shim
+from benchmarks.bench_import_export import use_data_dir
+from benchmarks.synthetic import generate, parse_size
+
+# 主窗口的默认大小（与用户常用的侧边栏尺寸相近）
+WINDOW_SIZE = (420, 800)
+
+
+def application() -> QApplication:
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+        QApplication.setQuitOnLastWindowClosed(False)
+        # 与 main() 相同的样式表（不经 theme_manager.apply_theme，避免改写用户的主题设置）
+        from styles.theme_manager import theme_manager
+        app.setStyleSheet(theme_manager.load_theme('modern_optimized'))
+    return app
+
+
+class UiHarness:
+    """临时数据目录 + 假窗口/按键后端 + 离屏主窗口"""
+
+    def __init__(self, tree: Optional[List[Dict[str, Any]]] = None, config: Optional[Dict[str, Any]] = None):
+        self.tree = tree
+        self.config = config or {}
+        self.root: Optional[str] = None
+        self.app = application()
+        self.fake_windows, self.fake_keyboard = platform_shim.use_fakes()
+        self.windows: List[Any] = []
+
+    def __enter__(self) -> 'UiHarness':
+        self.root = tempfile.mkdtemp(prefix='ui_harness_')
+        use_data_dir(self.root)
+        if self.tree is not None:
+            with open(constants.real_scripts_abs_path, 'w', encoding='utf-8') as f:
+                json.dump(self.tree, f, ensure_ascii=False)
+        if self.config:
+            with open(constants.real_config_abs_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            config.update(self.config)
+            with open(constants.real_config_abs_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, ensure_ascii=False)
+        return self
+
+    def __exit__(self, *exc):
+        for window in list(self.windows):
+            self.close(window)
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+        return False
+
+    def boot(self, show: bool = True):
+        """创建主窗口（与 main() 相同，只是不启用单实例与日志文件），show=True 时显示并等到首次绘制完成"""
+        from chatAssistant import AssistantMainWindow
+
+        window = AssistantMainWindow()
+        self.windows.append(window)
+        window.resize(*WINDOW_SIZE)
+        if show:
+            window.show()
+            self.paint()
+        return window
+
+    def paint(self):
+        """处理挂起的事件：布局与重绘都在这里完成（离屏平台同样绘制到后备缓冲区）"""
+        self.app.processEvents()
+
+    def pump(self, ms: int = 0):
+        """运行事件循环 ms 毫秒（让定时器、延迟布局等执行）"""
+        loop = QEventLoop()
+        QTimer.singleShot(ms, loop.quit)
+        loop.exec()
+
+    def close(self, window):
+        """停止主窗口的后台线程与定时器并销毁窗口"""
+        if window in self.windows:
+            self.windows.remove(window)
+        monitor = getattr(window, 'window_monitor', None)
+        if monitor is not None:
+            monitor.monitoring = False
+            monitor.wait(2000)
+        window.idle_scheduler.clear()
+        window.stall_watchdog.stop()
+        window.metrics_writer.stop()
+        window.job_runner.shutdown()
+        window.config_store.flush()
+        if getattr(window, 'tray_icon', None) is not None:
+            window.tray_icon.hide()
+        window.close()
+        window.deleteLater()
+        self.app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离屏启动主窗口")
+    parser.add_argument('--scripts', default='1k', help="话术条数：1k/10k/100k/1m 或整数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--screenshot', default=None, help="把主窗口截图保存到该路径（.png）")
+    args = parser.parse_args()
+
+    tree = generate(parse_size(args.scripts), args.seed)
+    with UiHarness(tree) as harness:
+        start = time.perf_counter()
+        window = harness.boot()
+        print(f"主窗口已启动: {(time.perf_counter() - start) * 1000:.0f}ms，"
+              f"{len(window.data_adapter.all_script_data_list)} 条话术")
+        harness.pump(300)
+        if args.screenshot:
+            window.grab().save(args.screenshot)
+            print(f"截图已保存: {args.screenshot}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,7 @@
 秒回 - PySide6版本
 智能客服助手 - 现代化界面版本
 """
-from symbol import compound_stmt
 import sys
-import os
 import json
 import time
 import threading
@@ -13,7 +11,7 @@ from typing import Dict, Any, Optional, List
 import logging
 import traceback
 import random
-import ctypes
+from collections import Counter
 
 # PySide6 imports
 from PySide6.QtWidgets import (
@@ -22,27 +20,37 @@ from PySide6.QtWidgets import (
     QTreeWidgetItem, QGroupBox, QCheckBox, QComboBox, QFrame, QSplitter,
     QScrollArea, QTabWidget, QStatusBar, QMenuBar, QMenu, QMessageBox,
     QDialog, QDialogButtonBox, QProgressBar, QSpacerItem, QSizePolicy,
-    QLayout, QSystemTrayIcon,QStyledItemDelegate
+    QLayout, QSystemTrayIcon,QStyledItemDelegate, QFileDialog, QInputDialog
 )
 from PySide6.QtCore import (
     Qt, QTimer, QThread, QObject, Signal, QSize, QPropertyAnimation,
-    QEasingCurve, QRect, QPoint, Slot, QEvent
+    QEasingCurve, QRect, QPoint, Slot, QEvent, QMimeData
 )
 from PySide6.QtGui import (
     QFont, QIcon, QPalette, QColor, QPixmap, QPainter, QBrush,
-    QLinearGradient, QAction, QKeySequence, QCursor
+    QLinearGradient, QAction, QKeySequence, QCursor, QDrag
 )
 from PySide6.QtNetwork import QLocalServer, QLocalSocket
 # 导入原有模块
-import pyautogui
-import pyperclip
-import win32gui
-import win32con
 from utils.api_manager import APIManager
+from utils.sync_engine import SyncEngine
 from utils.data_adapter import DataAdapter
 import utils.utils as utils
 import utils.constants as constants
-from utils.dock_apps import APPS
+import utils.platform_shim as platform_shim
+from utils.dock_apps import DockAppMatcher
+from utils.clipboard_service import ClipboardService
+from utils.target_profiles import TargetProfileRegistry
+from utils.async_jobs import JobRunner
+from utils.auto_sync import AutoSyncService
+from utils.idle_tasks import IdleScheduler
+from utils.config_store import ConfigStore
+import utils.log_setup as log_setup
+from utils.stall_watchdog import StallWatchdog
+import utils.metrics as metrics
+from utils.sampling_profiler import SamplingProfiler
+from utils.memory_tracker import MemoryTracker
+import utils.import_export as import_export
 
 # 导入主题管理器
 from styles.theme_manager import theme_manager
@@ -57,6 +65,11 @@ from components.custom_title_bar import CustomTitleBar
 from components.add_dialog import AddDialog
 from components.settings_dialog import SettingsDialog
 
+logger = logging.getLogger(__name__)
+
+# 空闲预取时额外准备的最常用一级分类数
+PREFETCH_FREQUENT = 3
+
 
 def setup_pyqt_exception_handling():
     """设置 PyQt 异常处理"""
@@ -80,31 +93,14 @@ def setup_pyqt_exception_handling():
 
 
 def log_exception(exctype, value, traceback_obj):
-    """记录异常"""
+    """记录异常（经日志队列写入 app.log），并导出出错前的最近日志到 crash.log"""
     try:
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler = logging.FileHandler('pyqt_errors.log', mode='a', encoding='utf-8')
-        file_handler.setFormatter(formatter)
-
-        logger = logging.getLogger('pyqt_errors')
-        logger.setLevel(logging.ERROR)
-
-        # 避免重复添加处理器
-        for handler in logger.handlers[:]:
-            logger.removeHandler(handler)
-        logger.addHandler(file_handler)
-
-        error_msg = "".join(traceback.format_exception(exctype, value, traceback_obj))
-
-        print(f"PyQt异常捕获：\n{error_msg}")
-        logger.error(f"PyQt异常捕获：\n{error_msg}")
-
-        # 立即刷新日志
-        file_handler.flush()
-        file_handler.close()
-
-    except Exception as e:
-        print(f"记录异常时出错: {e}")
+        logger.error("PyQt异常捕获", exc_info=(exctype, value, traceback_obj))
+        crash_path = log_setup.dump_recent(min_interval=log_setup.CRASH_DUMP_INTERVAL)
+        if crash_path:
+            logger.info(f"最近日志已导出: {crash_path}")
+    except Exception:
+        traceback.print_exception(exctype, value, traceback_obj)
 
 
 """流式布局类"""
@@ -198,33 +194,48 @@ class WindowMonitor(QThread):
 
     window_changed = Signal(int, str)  # 窗口句柄, 窗口标题
 
-    def __init__(self, parent=None):
+    # 每隔多少轮清理一次已销毁窗口的档案（约 10 秒）
+    PRUNE_EVERY = 20
+
+    def __init__(self, profiles: TargetProfileRegistry, matcher: Optional[DockAppMatcher] = None, parent=None):
         super().__init__(parent)
         self.monitoring = True
         self.position_locked = False
         self.my_window_handle = None
+        self.profiles = profiles
+        # 可吸附软件匹配器：选中了软件时，只有这些软件的窗口才成为发送目标
+        self.matcher = matcher
 
     def run(self):
         """监控线程主循环"""
+        rounds = 0
         while self.monitoring:
             try:
+                rounds += 1
+                if rounds % self.PRUNE_EVERY == 0:
+                    self.profiles.prune(platform_shim.windows.is_window)
+
                 if self.position_locked:
                     self.msleep(500)
                     continue
 
-                current_window = win32gui.GetForegroundWindow()
+                current_window = platform_shim.windows.foreground_window()
 
                 if current_window and current_window != self.my_window_handle:
                     try:
-                        title = win32gui.GetWindowText(current_window)
-                        if title and title.strip() and "秒回" not in title:
-                            self.window_changed.emit(current_window, title.strip())
+                        title = (platform_shim.windows.window_title(current_window) or '').strip()
+                        if title:
+                            # 档案按句柄缓存，只有新窗口才会查询进程ID/类名；跳过本程序的所有窗口
+                            profile = self.profiles.resolve(current_window, title)
+                            if (profile is not None and not profile.is_own
+                                    and (self.matcher is None or self.matcher.is_target(title, current_window))):
+                                self.window_changed.emit(current_window, title)
                     except:
                         pass
 
                 self.msleep(500)
-            except Exception as e:
-                print('监控线程主循环报错', e)
+            except Exception:
+                logger.exception("监控线程主循环报错")
                 self.msleep(1000)
 
 class ModernButton(QPushButton):
@@ -350,12 +361,33 @@ class ElideLabel(QLabel):
             except Exception:
                 pass
 
+# 话术树内拖放排序的 MIME 类型（数据为节点ID）
+SCRIPT_MIME = "application/x-chat-assistant-script"
+SECTION_MIME = "application/x-chat-assistant-section"
+
+
+def start_drag(source: QWidget, mime_type: str, node_id) -> None:
+    """以 source 的截图为拖动图像开始拖放"""
+    mime = QMimeData()
+    mime.setData(mime_type, str(node_id).encode('utf-8'))
+    drag = QDrag(source)
+    drag.setMimeData(mime)
+    pixmap = source.grab()
+    drag.setPixmap(pixmap)
+    drag.setHotSpot(QPoint(10, pixmap.height() // 2))
+    drag.exec(Qt.DropAction.MoveAction)
+
+
 class ScriptRow(QWidget):
     def __init__(self, display_text: str, content: str, bg_color: Optional[str], callbacks: dict, parent=None):
         super().__init__(parent)
         self.display_text = display_text
         self.content = content
         self.callbacks = callbacks or {}
+        # 拖放排序：由 ScriptTree.render 设置
+        self.script_id = None
+        self.drag_enabled = False
+        self._press_pos = None
         layout = QHBoxLayout(self)
         layout.setContentsMargins(0, 4, 0, 0)
         layout.setSpacing(0)
@@ -513,6 +545,22 @@ class ScriptRow(QWidget):
                 cb(self.content)
         super().mouseDoubleClickEvent(event)
 
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._press_pos = event.position().toPoint()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        # 按住左键移动超过系统拖动距离后开始拖动
+        if (self.drag_enabled and self._press_pos is not None
+                and event.buttons() & Qt.MouseButton.LeftButton
+                and (event.position().toPoint() - self._press_pos).manhattanLength() >= QApplication.startDragDistance()):
+            self._press_pos = None
+            self._set_hover(False)
+            start_drag(self, SCRIPT_MIME, self.script_id)
+            return
+        super().mouseMoveEvent(event)
+
     def contextMenuEvent(self, event):
         cb = self.callbacks.get("on_context")
         if cb:
@@ -575,6 +623,8 @@ class SectionWidget(QWidget):
         self.title_name = title_name
         self.callbacks = callbacks or {}
         self.expanded = True
+        self.rows: List[ScriptRow] = []
+        self.drag_enabled = False
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
@@ -599,6 +649,10 @@ class SectionWidget(QWidget):
         self.title_label.setMinimumHeight(20)
         h.addWidget(self.title_label, 1, alignment=Qt.AlignmentFlag.AlignVCenter)
         header.mouseDoubleClickEvent = lambda e: self.toggle()
+        header.mousePressEvent = self._header_press
+        header.mouseMoveEvent = self._header_move
+        self._press_pos = None
+        self.header = header
         header.contextMenuEvent = lambda e: self.callbacks.get("on_context", lambda *_: None)({"type": "title", "title_id": self.title_id}, header.mapToGlobal(e.pos()))
         self.main_layout.addWidget(header)
         # body container
@@ -612,8 +666,21 @@ class SectionWidget(QWidget):
         # self.main_layout.addSpacing(4)
 
     def add_row(self, row: QWidget):
+        self.rows.append(row)
         self.body_layout.addWidget(row)
 
+    def _header_press(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._press_pos = event.position().toPoint()
+
+    def _header_move(self, event):
+        # 拖动标题栏调整二级分类顺序
+        if (self.drag_enabled and self._press_pos is not None
+                and event.buttons() & Qt.MouseButton.LeftButton
+                and (event.position().toPoint() - self._press_pos).manhattanLength() >= QApplication.startDragDistance()):
+            self._press_pos = None
+            start_drag(self.header, SECTION_MIME, self.title_id)
+
     def toggle(self):
         self.expanded = not self.expanded
         self.body.setVisible(self.expanded)
@@ -644,6 +711,12 @@ class ScriptTree(QWidget):
         self.v.addStretch(1)
         self.scroll.setWidget(self.container)
         self.callbacks = {}
+        # 拖放排序（搜索结果中关闭）：话术拖到任意分类的任意位置，分类标题拖动调整顺序
+        self.drag_enabled = False
+        self.setAcceptDrops(True)
+        self.drop_indicator = QFrame(self.container)
+        self.drop_indicator.setStyleSheet("background: #ff6705;")
+        self.drop_indicator.hide()
         # 字体大小配置（默认值）；可通过 set_font_sizes 动态修改
         self.font_sizes = {
             'type': 12,
@@ -669,15 +742,18 @@ class ScriptTree(QWidget):
                 w.setParent(None)
                 w.deleteLater()
 
-    def render(self, sections: Optional[List[Dict[str, Any]]], callbacks: Dict[str, Any]):
+    @metrics.timed('ui.render_tree')
+    def render(self, sections: Optional[List[Dict[str, Any]]], callbacks: Dict[str, Any], drag_enabled: bool = False):
         self.set_callbacks(callbacks)
         self.clear()
+        self.drag_enabled = drag_enabled
         for title_data in sections or []:
             title_id = title_data.get('id')
             title_name = (title_data.get('name') or '').strip()
             section = SectionWidget(title_id, title_name, {
                 "on_context": lambda info, pos, tid=title_id: self._emit_context({"type": "title", "title_id": tid}, pos)
             })
+            section.drag_enabled = drag_enabled
             # 应用 section 标题字体
             try:
                 section.title_label.setStyleSheet(section.title_label.styleSheet() + f"; font-size: {self.font_sizes.get('section', 12)}px;")
@@ -691,6 +767,8 @@ class ScriptTree(QWidget):
                     "on_send": lambda c: self.callbacks.get("on_script_send", lambda *_: None)(c),
                     "on_context": lambda info, pos, sid=script.get('id'): self._emit_context({"type": "script", "script_id": sid}, pos)
                 })
+                row.script_id = script.get('id')
+                row.drag_enabled = drag_enabled
                 # 强制应用脚本内容与标题的字体大小，避免父链无法找到 ScriptTree 时回退到默认值
                 try:
                     content_size = self.font_sizes.get('script_content', 12)
@@ -712,6 +790,99 @@ class ScriptTree(QWidget):
         if cb:
             cb(info, global_pos)
 
+    # ==================== 拖放排序 ====================
+
+    def sections(self) -> List[SectionWidget]:
+        return [self.v.itemAt(i).widget() for i in range(self.v.count() - 1)
+                if isinstance(self.v.itemAt(i).widget(), SectionWidget)]
+
+    def _top_in_container(self, widget: QWidget) -> int:
+        return widget.mapTo(self.container, QPoint(0, 0)).y()
+
+    def _drop_target(self, event):
+        """拖放目标：(类型, 源ID, 目标分类, 插入下标, 指示线 y)；无效时返回 None
+        插入下标按拖动前的列表计算（同一列表内向后拖动时调用方需减一）"""
+        mime = event.mimeData()
+        y = self.container.mapFrom(self, event.position().toPoint()).y()
+        sections = self.sections()
+        if not self.drag_enabled or not sections:
+            return None
+        if mime.hasFormat(SECTION_MIME):
+            node_id = int(bytes(mime.data(SECTION_MIME)).decode('utf-8'))
+            index = sum(1 for s in sections if self._top_in_container(s) + s.height() // 2 < y)
+            line_y = self._top_in_container(sections[index]) if index < len(sections) else \
+                self._top_in_container(sections[-1]) + sections[-1].height()
+            return SECTION_MIME, node_id, None, index, line_y
+        if mime.hasFormat(SCRIPT_MIME):
+            node_id = int(bytes(mime.data(SCRIPT_MIME)).decode('utf-8'))
+            # 落点所在的分类（超出最后一个分类时归入最后一个）
+            section = next((s for s in sections if y < self._top_in_container(s) + s.height()), sections[-1])
+            rows = section.rows if section.expanded else []
+            index = sum(1 for r in rows if self._top_in_container(r) + r.height() // 2 < y)
+            if not section.expanded:
+                index = len(section.rows)
+                line_y = self._top_in_container(section) + section.height()
+            elif index < len(rows):
+                line_y = self._top_in_container(rows[index])
+            elif rows:
+                line_y = self._top_in_container(rows[-1]) + rows[-1].height()
+            else:
+                line_y = self._top_in_container(section) + section.height()
+            return SCRIPT_MIME, node_id, section, index, line_y
+        return None
+
+    def dragEnterEvent(self, event):
+        if self.drag_enabled and (event.mimeData().hasFormat(SCRIPT_MIME) or event.mimeData().hasFormat(SECTION_MIME)):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        target = self._drop_target(event)
+        if target is None:
+            self.drop_indicator.hide()
+            event.ignore()
+            return
+        self.drop_indicator.setGeometry(0, max(0, target[4] - 1), self.container.width(), 2)
+        self.drop_indicator.show()
+        self.drop_indicator.raise_()
+        event.acceptProposedAction()
+
+    def dragLeaveEvent(self, event):
+        self.drop_indicator.hide()
+        super().dragLeaveEvent(event)
+
+    def dropEvent(self, event):
+        self.drop_indicator.hide()
+        target = self._drop_target(event)
+        if target is None:
+            event.ignore()
+            return
+        mime_type, node_id, section, index, _ = target
+        event.acceptProposedAction()
+        sections = self.sections()
+        if mime_type == SECTION_MIME:
+            source = next((i for i, s in enumerate(sections) if s.title_id == node_id), None)
+            if source is None:
+                return
+            pos = index - 1 if source < index else index
+            if pos != source:
+                cb = self.callbacks.get("on_section_moved")
+                if cb:
+                    # 回调晚于拖放事件执行：回调会重新渲染并销毁当前控件
+                    QTimer.singleShot(0, lambda: cb(node_id, pos))
+            return
+        source_section = next((s for s in sections if any(r.script_id == node_id for r in s.rows)), None)
+        if source_section is None:
+            return
+        source = next(i for i, r in enumerate(source_section.rows) if r.script_id == node_id)
+        pos = index - 1 if source_section is section and source < index else index
+        if source_section is section and pos == source:
+            return
+        cb = self.callbacks.get("on_script_moved")
+        if cb:
+            QTimer.singleShot(0, lambda: cb(node_id, section.title_id, pos))
+
     def contextMenuEvent(self, event):
         # 空白处右键
         cb = self.callbacks.get("on_context_menu")
@@ -778,6 +949,8 @@ class AssistantMainWindow(QMainWindow):
         # 新增：吸附位置与可吸附软件初始化
         self.dock_position = "right"
         self.dock_apps = ['全部']
+        # 可吸附软件匹配器：仅在 dock_apps 变化时重新编译
+        self.dock_matcher = DockAppMatcher(self.dock_apps)
 
         # 用户登录状态
         self.current_user_id = None
@@ -788,6 +961,42 @@ class AssistantMainWindow(QMainWindow):
         self.data_adapter = None
         self.window_monitor = None
         self.dock_manager = None
+        # 剪贴板服务（三种发送模式共用）
+        self.clipboard_service = ClipboardService()
+        # 目标窗口档案（句柄 -> 进程/类名/所属软件/发送参数）
+        self.target_profiles = TargetProfileRegistry()
+        # 后台任务（登录/同步/上传/下载等网络请求）
+        self.job_runner = JobRunner(self)
+        self.job_runner.job_started.connect(self.on_job_started)
+        self.job_runner.job_progress.connect(self.on_job_progress)
+        self.job_runner.job_finished.connect(self.on_job_finished)
+        # 本地配置：内存中修改，防抖后后台写入，退出时强制写入
+        self.config_store = ConfigStore(self)
+        # 按模块的日志级别，如 {"utils.sync_engine": "DEBUG"}
+        log_setup.set_levels(self.config_store.get('log_levels'))
+        # 界面卡顿监测：事件循环阻塞超过阈值时记录主线程调用栈，报告见设置弹窗
+        self.stall_watchdog = StallWatchdog(self)
+        self.job_runner.stall_watchdog = self.stall_watchdog
+        self.stall_watchdog.start()
+        # 性能统计：开启期间定期写入 data/logs/metrics.json
+        metrics.set_enabled(self.config_store.get('metrics_enabled'))
+        self.metrics_writer = metrics.SnapshotWriter()
+        self.metrics_writer.start()
+        # 性能分析（托盘菜单开始/停止）
+        self.profiler = SamplingProfiler()
+        # 内存跟踪：切换分类、搜索后检查同一页面的话术树控件数是否增长，报告见设置弹窗
+        self.memory_tracker = MemoryTracker(self)
+        self.memory_tracker.set_enabled(self.config_store.get('memory_tracking'))
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.job_runner.shutdown)
+            app.aboutToQuit.connect(self.config_store.flush)
+            app.aboutToQuit.connect(self.stall_watchdog.stop)
+            app.aboutToQuit.connect(self.metrics_writer.stop)
+            app.aboutToQuit.connect(self.profiler.stop)
+            app.aboutToQuit.connect(log_setup.shutdown_logging)
+        # 登录对话框（后台登录完成后回调）
+        self._login_dialog = None
 
         # UI组件引用
         self.primary_tabs = {}
@@ -799,6 +1008,12 @@ class AssistantMainWindow(QMainWindow):
         self.is_search = False
         self.search_text = ''
 
+        # 空闲预取：切换一级分类后，空闲时准备相邻分类与最常用分类的视图
+        self.idle_scheduler = IdleScheduler(self)
+        # (type_id, level_one_id) -> 切换到该分类的次数
+        self.level_one_usage = Counter()
+        self._last_view_key = None
+
     def setup_window(self):
         """设置窗口属性"""
         self.setWindowTitle("秒回")
@@ -834,8 +1049,8 @@ class AssistantMainWindow(QMainWindow):
         # 获取自己的窗口句柄
         def find_my_window(hwnd, param):
             try:
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
+                if platform_shim.windows.is_visible(hwnd):
+                    title = platform_shim.windows.window_title(hwnd)
                     if "秒回" in title:
                         self.window_monitor.my_window_handle = hwnd
                         return False
@@ -844,7 +1059,7 @@ class AssistantMainWindow(QMainWindow):
             return True
 
         # 创建监控线程
-        self.window_monitor = WindowMonitor(self)
+        self.window_monitor = WindowMonitor(self.target_profiles, self.dock_matcher, self)
         self.window_monitor.window_changed.connect(self.on_window_changed)
 
         # 延迟启动监控
@@ -861,7 +1076,7 @@ class AssistantMainWindow(QMainWindow):
             if self.dock_manager:
                 try:
                     if self.dock_enabled:
-                        if self.is_window_allowed_for_dock(window_title):
+                        if self.is_window_allowed_for_dock(window_title, window_handle):
                             if not self.is_our_window(window_handle):
                                 self.dock_manager.enable_docking(window_handle)
                             else:
@@ -873,7 +1088,7 @@ class AssistantMainWindow(QMainWindow):
                         # 未启用时确保关闭
                         self.dock_manager.disable_docking()
                 except Exception as e:
-                    print(f"更新吸附目标失败: {e}")
+                    logger.warning(f"更新吸附目标失败: {e}")
 
     def start_monitoring(self):
         """启动窗口监控"""
@@ -881,8 +1096,8 @@ class AssistantMainWindow(QMainWindow):
             # 获取自己的窗口句柄
             def find_my_window(hwnd, param):
                 try:
-                    if win32gui.IsWindowVisible(hwnd):
-                        title = win32gui.GetWindowText(hwnd)
+                    if platform_shim.windows.is_visible(hwnd):
+                        title = platform_shim.windows.window_title(hwnd)
                         if "秒回" in title:
                             if self.window_monitor:
                                 self.window_monitor.my_window_handle = hwnd
@@ -892,7 +1107,7 @@ class AssistantMainWindow(QMainWindow):
                 return True
 
             # 查找自己的窗口句柄
-            win32gui.EnumWindows(find_my_window, None)
+            platform_shim.windows.enum_windows(find_my_window)
             self.window_monitor.start()
 
     def init_dock_manager(self):
@@ -911,6 +1126,16 @@ class AssistantMainWindow(QMainWindow):
             show_setting.triggered.connect(self.show_settings_dialog)
             menu.addAction(show_setting)
 
+            # 性能分析（结果写入 data/profiles，供技术支持排查）
+            profile_menu = menu.addMenu("性能分析")
+            self.profile_sample_action = profile_menu.addAction("开始采样分析")
+            self.profile_sample_action.triggered.connect(lambda: self.start_profiling('sample'))
+            self.profile_cprofile_action = profile_menu.addAction("开始 cProfile 分析（较慢）")
+            self.profile_cprofile_action.triggered.connect(lambda: self.start_profiling('cprofile'))
+            self.profile_stop_action = profile_menu.addAction("停止并保存")
+            self.profile_stop_action.triggered.connect(self.stop_profiling)
+            self.update_profile_actions()
+
             exit_action = QAction("退出", self)
             exit_action.triggered.connect(QApplication.instance().quit)
             menu.addAction(exit_action)
@@ -920,7 +1145,29 @@ class AssistantMainWindow(QMainWindow):
             self.tray_icon.show()
 
         except Exception as e:
-            print(f"系统托盘初始化失败: {e}")
+            logger.warning(f"系统托盘初始化失败: {e}")
+
+    def update_profile_actions(self):
+        running = self.profiler.running
+        self.profile_sample_action.setEnabled(not running)
+        self.profile_cprofile_action.setEnabled(not running)
+        self.profile_stop_action.setEnabled(running)
+
+    def start_profiling(self, mode: str):
+        """开始性能分析（托盘菜单）"""
+        if not self.profiler.running:
+            self.profiler.start(mode)
+        self.update_profile_actions()
+
+    def stop_profiling(self):
+        """停止性能分析并提示结果文件位置"""
+        path = self.profiler.stop()
+        self.update_profile_actions()
+        if getattr(self, 'tray_icon', None) is not None:
+            if path:
+                self.tray_icon.showMessage("性能分析", f"结果已保存到 {path}")
+            else:
+                self.tray_icon.showMessage("性能分析", "保存结果失败，详见日志", QSystemTrayIcon.MessageIcon.Warning)
 
     # <============================获取数据方法==============================>
 
@@ -931,19 +1178,27 @@ class AssistantMainWindow(QMainWindow):
             self.data_adapter = DataAdapter()
             # 初始化API管理器
             self.api_manager = APIManager()
-
-            # 读取本地配置并应用（若存在）
-            try:
-                local_conf = self.data_adapter.get_local_config_data()
-                if isinstance(local_conf, dict):
-                    dp = local_conf.get('dock_position')
-                    if dp in ('left', 'right'):
-                        self.dock_position = dp or self.dock_position
-                    da = local_conf.get('dock_apps')
-                    if isinstance(da, list):
-                        self.dock_apps = da or self.dock_apps
-            except Exception as e:
-                print(f"读取本地配置失败: {e}")
+            self.data_adapter.api_manager = self.api_manager
+            # 增量同步引擎 + 后台自动同步（监听本地修改）
+            self.sync_engine = SyncEngine(self.data_adapter, self.api_manager)
+            self.auto_sync = AutoSyncService(self.sync_engine, self.job_runner, self)
+            self.auto_sync.remote_applied.connect(self.on_remote_data_applied)
+            self.auto_sync.conflicts_found.connect(self.on_sync_conflicts)
+            self.data_adapter.add_change_listener(self.auto_sync.on_local_change)
+
+            # 应用本地配置（ConfigStore 启动时已与默认配置合并并校验类型）
+            config = self.config_store
+            dp = config.get('dock_position')
+            if dp in ('left', 'right'):
+                self.dock_position = dp
+            da = config.get('dock_apps')
+            if da:
+                self.dock_apps = list(da)
+                self.dock_matcher.compile(self.dock_apps)
+            # 恢复上次的登录状态，启动后台同步（只拉取云端增量）
+            if config.get('is_logged_in') and config.get('current_user_id'):
+                self.current_user_id = config.get('current_user_id')
+                self.is_logged_in = True
 
             # 加载数据
             self.load_data_from_adapter()
@@ -960,8 +1215,12 @@ class AssistantMainWindow(QMainWindow):
             # 延迟更新按钮布局，确保界面完全渲染
             QTimer.singleShot(100, self.update_level_one_tabs)
 
+            if self.is_logged_in:
+                self.bind_sync_user()
+                self.auto_sync.set_enabled(True)
+
         except Exception as e:
-            print(f"加载初始数据失败: {e}")
+            logger.warning(f"加载初始数据失败: {e}")
 
     def load_data_from_adapter(self):
         """从数据适配器加载数据"""
@@ -979,61 +1238,91 @@ class AssistantMainWindow(QMainWindow):
                 self.current_level_one_id = level_one_list[0]['id']
 
     def sync_cloud_data(self):
-        """同步云端数据"""
+        """同步云端数据：上传发件箱中的本地修改后拉取云端增量（后台执行）；返回是否已发起同步"""
         try:
             if not self.is_logged_in or not self.current_user_id:
                 return False
 
             if self.data_adapter:
-                if self.data_adapter:
-                    self.data_adapter.api_manager = self.api_manager
-                    uid = 0
-                    try:
-                        uid = int(self.current_user_id) if (
-                                self.current_user_id is not None and str(self.current_user_id).isdigit()) else 0
-                    except:
-                        uid = 0
-                    self.data_adapter.user_id = uid
-
-                success = self.data_adapter.load_user_data()
-                if success:
-                    self.load_data_from_adapter()
-                    self.update_all_ui()
-                    print("云端数据同步成功")
-                    return True
-                else:
-                    print("使用默认数据")
-                    return False
+                self.bind_sync_user()
+                self.auto_sync.sync_now()
+                return True
         except Exception as e:
-            print(f"同步云端数据失败: {e}")
-            print("数据同步失败，使用本地数据")
+            logger.warning(f"同步云端数据失败: {e}")
+            logger.warning("数据同步失败，使用本地数据")
             return False
 
+    def on_remote_data_applied(self):
+        """云端变更已应用到本地：刷新界面"""
+        self.load_data_from_adapter()
+        self.update_all_ui()
+
+    def on_sync_conflicts(self, merge):
+        """本地与云端修改冲突：弹窗逐条选择保留的版本"""
+        from components.merge_dialog import MergeDialog
+        dialog = MergeDialog(merge, self)
+        if dialog.exec() == QDialog.Accepted:
+            self.auto_sync.complete_merge(merge)
+        else:
+            self.auto_sync.defer_conflicts()
+
     def load_current_scripts_data(self, isClear: bool = False):
         """加载当前Tab数据"""
+        # 视图由 DataAdapter 缓存并在修改时失效，只读使用，不再复制
         self.current_scripts_data = self.data_adapter.get_tree_scripts_data(self.current_type_id,
                                                                             self.current_level_one_id)
-        self.filtered_scripts = self.current_scripts_data.copy()
+        self.filtered_scripts = self.current_scripts_data
         self.update_tree()
         if isClear:
             self.search_edit.clear()
+        view_key = (self.current_type_id, self.current_level_one_id)
+        if view_key != self._last_view_key:
+            self._last_view_key = view_key
+            self.level_one_usage[view_key] += 1
+        self.schedule_prefetch()
+
+    def prefetch_candidates(self) -> List[tuple]:
+        """预取候选（按优先级）：同类型中相邻的一级分类、相邻话术类型的第一个一级分类、最常用的分类"""
+        adapter = self.data_adapter
+        candidates = []
+        level_one_ids = adapter.type_children_idList_byIds.get(self.current_type_id) or []
+        if self.current_level_one_id in level_one_ids:
+            index = level_one_ids.index(self.current_level_one_id)
+            for neighbour in (index + 1, index - 1):
+                if 0 <= neighbour < len(level_one_ids):
+                    candidates.append((self.current_type_id, level_one_ids[neighbour]))
+        type_ids = adapter.all_type_id_list
+        if self.current_type_id in type_ids:
+            index = type_ids.index(self.current_type_id)
+            for neighbour in (index + 1, index - 1):
+                if 0 <= neighbour < len(type_ids):
+                    first = adapter.type_children_idList_byIds.get(type_ids[neighbour]) or []
+                    if first:
+                        candidates.append((type_ids[neighbour], first[0]))
+        candidates.extend(key for key, _ in self.level_one_usage.most_common(PREFETCH_FREQUENT))
+        current = (self.current_type_id, self.current_level_one_id)
+        return [key for i, key in enumerate(candidates) if key != current and key not in candidates[:i]]
+
+    def schedule_prefetch(self):
+        """按当前分类重新安排空闲预取"""
+        self.idle_scheduler.clear()
+        for key in self.prefetch_candidates():
+            self.idle_scheduler.schedule(('view', key), lambda k=key: self.data_adapter.prefetch_view(*k))
 
     def save_config(self):
-        """保存配置数据"""
+        """保存配置数据：只更新内存中变化的项，文件由 ConfigStore 防抖后写入"""
         try:
-            config = {
+            self.config_store.update({
                 'send_mode': self.send_mode,
-                'always_on_top': self.always_on_top,
+                'always_on_top': bool(self.always_on_top),
                 'current_user_id': self.current_user_id,
-                'is_logged_in': self.is_logged_in,
-                'dock_enabled': getattr(self, 'dock_enabled', False),
+                'is_logged_in': bool(self.is_logged_in),
+                'dock_enabled': bool(getattr(self, 'dock_enabled', False)),
                 'dock_position': getattr(self, 'dock_position', "right"),
-                'dock_apps': getattr(self, 'dock_apps', []),
-            }
-            if self.data_adapter:
-                self.data_adapter.save_local_config_data(config)
+                'dock_apps': list(getattr(self, 'dock_apps', [])),
+            })
         except Exception as e:
-            print(f'保存配置失败: {e}')
+            logger.warning(f'保存配置失败: {e}')
 
     # 托盘关闭拦截：关闭窗口时隐藏到托盘，不退出程序
     def on_minimize_clicked(self):
@@ -1043,7 +1332,7 @@ class AssistantMainWindow(QMainWindow):
             # 最小化直接隐藏，避免被吸附恢复
             QTimer.singleShot(0, self.hide)
         except Exception as e:
-            print(f"最小化到托盘失败: {e}")
+            logger.warning(f"最小化到托盘失败: {e}")
 
     # <============================创建界面元素方法==============================>
 
@@ -1095,15 +1384,9 @@ class AssistantMainWindow(QMainWindow):
         self.type_tab_widget.setTabPosition(QTabWidget.North)  # 标签在顶部
         self.type_tab_widget.currentChanged.connect(self.on_primary_tab_changed)  # 切换标签时触发
 
-        # 4. 为标签栏设置右键菜单功能
-        # try:
-        #     # 设置标签栏支持自定义右键菜单
-        #     self.type_tab_widget.tabBar().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        #     # 连接右键菜单请求信号到处理函数
-        #     self.type_tab_widget.tabBar().customContextMenuRequested.connect(self.show_primary_tab_context_menu)
-        #     print("一级Tab右键菜单设置成功")  # 调试信息
-        # except Exception as e:
-        #     print(f"设置一级Tab右键菜单失败: {e}")  # 错误处理
+        # 4. 为标签栏设置右键菜单功能（新增/重命名/删除话术类型）
+        self.type_tab_widget.tabBar().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.type_tab_widget.tabBar().customContextMenuRequested.connect(self.show_primary_tab_context_menu)
 
         primary_layout.addWidget(self.type_tab_widget, 1)
 
@@ -1137,11 +1420,15 @@ class AssistantMainWindow(QMainWindow):
         # 自绘树形结构替代原生 QTreeWidget
         self.script_tree = ScriptTree()
         tree_layout.addWidget(self.script_tree)
+        # 内存跟踪只统计话术树下的控件
+        self.memory_tracker.root = self.script_tree
         # 绑定回调，保持原交互不变：双击、按钮发送、右键菜单（分类/脚本/空白）
         self.script_tree.set_callbacks({
             "on_script_double": lambda c: self.send_script_text(c),
             "on_script_send": lambda c: self.send_script_directly(c),
-            "on_context_menu": self._on_script_tree_context_menu
+            "on_context_menu": self._on_script_tree_context_menu,
+            "on_script_moved": self.on_script_moved,
+            "on_section_moved": self.on_section_moved,
         })
 
     def create_search_section(self, parent_layout):
@@ -1159,6 +1446,26 @@ class AssistantMainWindow(QMainWindow):
 
     def create_status_section(self, parent_layout):
         """创建状态栏部分"""
+        # 后台任务进度（无任务时隐藏）
+        self.job_status_widget = QWidget()
+        job_layout = QHBoxLayout(self.job_status_widget)
+        job_layout.setContentsMargins(2, 0, 2, 0)
+        job_layout.setSpacing(4)
+        self.job_status_label = QLabel("")
+        job_layout.addWidget(self.job_status_label, 1)
+        self.job_progress_bar = QProgressBar()
+        self.job_progress_bar.setMaximumWidth(80)
+        self.job_progress_bar.setMaximumHeight(12)
+        self.job_progress_bar.setTextVisible(False)
+        job_layout.addWidget(self.job_progress_bar)
+        self.job_cancel_btn = ModernButton("✕", "small")
+        self.job_cancel_btn.setMaximumWidth(24)
+        self.job_cancel_btn.setToolTip("取消")
+        self.job_cancel_btn.clicked.connect(self.cancel_current_jobs)
+        job_layout.addWidget(self.job_cancel_btn)
+        self.job_status_widget.hide()
+        parent_layout.addWidget(self.job_status_widget)
+
         status_layout = QHBoxLayout()
         parent_layout.addLayout(status_layout)
 
@@ -1183,7 +1490,18 @@ class AssistantMainWindow(QMainWindow):
         self.update_login_status()
 
     def update_ui(self, type: str):
-        print('type', type)
+        logger.debug('update_ui: %s', type)
+        with self.stall_watchdog.action(f"update_ui:{type}"):
+            self._update_ui(type)
+
+    def _update_ui(self, type: str):
+        if type in ('add_type', 'edit_type'):
+            self.update_type_tabs()
+        elif type == 'delete_type':
+            self.update_type_tabs()
+            self.update_level_one_tabs()
+            self.load_current_scripts_data()
+
         if type == 'switch_type':
             self.update_level_one_tabs()
             self.load_current_scripts_data()
@@ -1211,36 +1529,53 @@ class AssistantMainWindow(QMainWindow):
             self.load_current_scripts_data()
         elif type == 'delete_script':
             self.load_current_scripts_data()
+        elif type in ('move_script', 'move_level_two'):
+            self.load_current_scripts_data()
 
         if self.is_search:
             self.is_search = False
             self.clear_search()
 
+        if type in ('switch_type', 'switch_level_one'):
+            self.memory_checkpoint()
+
     def update_type_tabs(self):
-        """更新话术类型Tab"""
-        # 清空现有Tab
-        self.type_tab_widget.clear()
-        self.primary_tabs.clear()
-
-        # 添加新Tab
-        if self.scripts_data:
-            for type_attr in self.data_adapter.all_type_data_list:
+        """更新话术类型Tab：按类型列表增删Tab、改名、调整顺序，未变化的Tab保留不重建"""
+        type_list = self.data_adapter.all_type_data_list if self.scripts_data else []
+        type_ids = {type_attr.get('id') for type_attr in type_list}
+        # 调整期间屏蔽切换信号，避免中间状态触发 on_primary_tab_changed
+        self.type_tab_widget.blockSignals(True)
+        try:
+            for type_id in [i for i in self.primary_tabs if i not in type_ids]:
+                tab_widget = self.primary_tabs.pop(type_id)
+                self.type_tab_widget.removeTab(self.type_tab_widget.indexOf(tab_widget))
+                tab_widget.deleteLater()
+
+            for index, type_attr in enumerate(type_list):
                 type_name = type_attr.get('name')
                 type_id = type_attr.get('id')
-                tab_widget = QWidget()
-                tab_widget.setProperty('script_type_id', type_id)
-
-                self.primary_tabs[type_id] = tab_widget
-                self.type_tab_widget.addTab(tab_widget, type_name)
-
-            # 选中当前Tab
+                tab_widget = self.primary_tabs.get(type_id)
+                if tab_widget is None:
+                    tab_widget = QWidget()
+                    tab_widget.setProperty('script_type_id', type_id)
+                    self.primary_tabs[type_id] = tab_widget
+                    self.type_tab_widget.insertTab(index, tab_widget, type_name)
+                    continue
+                current_index = self.type_tab_widget.indexOf(tab_widget)
+                if current_index != index:
+                    self.type_tab_widget.tabBar().moveTab(current_index, index)
+                if self.type_tab_widget.tabText(index) != type_name:
+                    self.type_tab_widget.setTabText(index, type_name)
+        finally:
+            self.type_tab_widget.blockSignals(False)
+
+        # 选中当前Tab
+        if type_list:
             idList = self.data_adapter.all_type_id_list
             if self.current_type_id in idList:
-                index = idList.index(self.current_type_id)
-                self.type_tab_widget.setCurrentIndex(index)
-                self.update_level_one_tabs()
+                self.type_tab_widget.setCurrentIndex(idList.index(self.current_type_id))
             else:
-                print('未找到当前一级tab选中值')
+                logger.info('未找到当前一级tab选中值')
 
     def update_level_one_tabs(self, first: Optional[bool] = False):
         """更新话术分类Tab（按钮形式）"""
@@ -1366,18 +1701,55 @@ class AssistantMainWindow(QMainWindow):
                 "on_script_double": lambda c: self.send_script_text(c),
                 "on_script_send": lambda c: self.send_script_directly(c),
                 "on_context_menu": self._on_script_tree_context_menu,
+                "on_script_moved": self.on_script_moved,
+                "on_section_moved": self.on_section_moved,
             }
-            self.script_tree.render(self.filtered_scripts, callbacks)
-        except Exception as e:
-            print("渲染自绘树失败:", e)
+            # 搜索结果是跨分类的扁平列表，不支持拖放排序
+            with self.stall_watchdog.action("渲染话术树"):
+                self.script_tree.render(self.filtered_scripts, callbacks, drag_enabled=not self.is_search)
+        except Exception:
+            logger.exception("渲染自绘树失败")
 
     def update_login_status(self):
         """更新登录状态"""
         if self.is_logged_in and self.current_user_id:
-            self.login_btn.setText(f"用户:{self.current_user_id[:6]}...")
+            self.login_btn.setText(f"用户:{str(self.current_user_id)[:6]}...")
         else:
             self.login_btn.setText("登录")
 
+    # <============================后台任务状态==============================>
+
+    def on_job_started(self, key: str, label: str):
+        """后台任务开始：显示进度条（进度未知）"""
+        self.job_status_label.setText(f"{label}...")
+        self.job_progress_bar.setRange(0, 0)
+        self.job_status_widget.show()
+
+    def on_job_progress(self, key: str, percent: int, message: str):
+        """后台任务进度"""
+        if message:
+            self.job_status_label.setText(message)
+        if percent < 0:
+            self.job_progress_bar.setRange(0, 0)
+        else:
+            self.job_progress_bar.setRange(0, 100)
+            self.job_progress_bar.setValue(percent)
+
+    def on_job_finished(self, key: str, status: str):
+        """后台任务结束：还有其他任务时显示其名称，否则隐藏"""
+        running = self.job_runner.running_keys()
+        if running:
+            self.job_status_label.setText(f"{self.job_runner.label(running[-1])}...")
+            self.job_progress_bar.setRange(0, 0)
+            return
+        self.job_status_widget.hide()
+        if status == 'cancelled':
+            logger.debug(f"任务 {key} 已取消")
+
+    def cancel_current_jobs(self):
+        """取消全部后台任务"""
+        self.job_runner.cancel_all()
+
     # <============================状态栏相关方法==============================>
 
     def on_dock_changed(self, checked: bool):
@@ -1412,7 +1784,7 @@ class AssistantMainWindow(QMainWindow):
                 # 可选：激活到前台，如不需要可以移除以进一步减少闪烁
                 self.activateWindow()
         except Exception as e:
-            print(f"托盘双击处理失败: {e}")
+            logger.warning(f"托盘双击处理失败: {e}")
 
     def on_lock_changed(self, checked: bool):
         """锁定状态改变"""
@@ -1477,6 +1849,33 @@ class AssistantMainWindow(QMainWindow):
             # 刷新
             self.update_ui('switch_level_one')
 
+    def show_primary_tab_context_menu(self, position):
+        """显示话术类型Tab右键菜单"""
+        try:
+            tab_bar = self.type_tab_widget.tabBar()
+            index = tab_bar.tabAt(position)
+            type_id_list = self.data_adapter.all_type_id_list
+
+            menu = QMenu(self)
+            add_action = QAction("新增话术类型", self)
+            add_action.triggered.connect(lambda checked: self.add_type())
+            menu.addAction(add_action)
+
+            if 0 <= index < len(type_id_list):
+                type_id = type_id_list[index]
+                type_name = tab_bar.tabText(index)
+                rename_action = QAction("修改话术类型名称", self)
+                rename_action.triggered.connect(lambda checked: self.edit_type(type_id, type_name))
+                menu.addAction(rename_action)
+
+                delete_action = QAction("删除话术类型", self)
+                delete_action.triggered.connect(lambda checked: self.delete_type(type_id, type_name))
+                menu.addAction(delete_action)
+
+            menu.exec(tab_bar.mapToGlobal(position))
+        except Exception as e:
+            logger.warning(f"话术类型Tab右键菜单错误: {e}")
+
     def show_level_one_button_context_menu(self, position, type_id: int, level_one_id: int,
                                            level_one_name: str):
         """显示话术分类按钮右键菜单"""
@@ -1502,7 +1901,7 @@ class AssistantMainWindow(QMainWindow):
                 menu.exec(global_pos)
 
         except Exception as e:
-            print(f"话术分类按钮右键菜单错误: {e}")
+            logger.warning(f"话术分类按钮右键菜单错误: {e}")
 
     # <============================树形结构点击事件相关方法==============================>
 
@@ -1573,11 +1972,12 @@ class AssistantMainWindow(QMainWindow):
 
     # <============================搜索框相关方法==============================>
 
+    @metrics.timed('ui.search')
     def on_search_changed(self, text: str):
         """搜索文本改变（按当前列表结构过滤）"""
         self.search_text = text.strip().lower()
         if not self.search_text:
-            self.filtered_scripts = self.current_scripts_data.copy()
+            self.filtered_scripts = self.current_scripts_data
             self.is_search = False
         else:
             self.is_search = True
@@ -1597,12 +1997,24 @@ class AssistantMainWindow(QMainWindow):
                 })
             self.filtered_scripts = filtered
         self.update_tree()
+        self.memory_checkpoint()
+
+    def memory_checkpoint(self):
+        """内存跟踪检查点：当前页面（或搜索词）渲染完成后与同一数据版本下第一次的控件数比较"""
+        version = self.data_adapter.views_generation
+        if self.is_search:
+            self.memory_tracker.checkpoint(f"搜索:{self.search_text}", version)
+        else:
+            self.memory_tracker.checkpoint(f"页面:{self.current_type_id}:{self.current_level_one_id}", version)
 
     def clear_search(self):
         """清空搜索"""
-        self.search_edit.clear()
+        if self.search_edit.text():
+            # textChanged -> on_search_changed 已恢复当前分类并渲染，不再重复渲染
+            self.search_edit.clear()
+            return
         self.search_text = ''
-        self.filtered_scripts = self.current_scripts_data.copy()
+        self.filtered_scripts = self.current_scripts_data
         self.is_search = False
         self.update_tree()
 
@@ -1611,82 +2023,97 @@ class AssistantMainWindow(QMainWindow):
     def send_script_directly(self, script_content: str):
         """直接发送话术（不依赖发送模式设置）"""
         if not script_content.strip():
-            print("❌ 话术内容为空")
+            logger.info("话术内容为空")
             return
 
         # 检查目标窗口
         if not hasattr(self, 'target_window') or not self.target_window:
-            print("❌ 请先选择目标窗口")
+            logger.info("请先选择目标窗口")
             return
 
         try:
             # 直接使用本地发送逻辑，不依赖 APIManager
-            self.send_text_direct(script_content)
-            print("✅ 📤 话术已直接发送")
+            with self.stall_watchdog.action("直接发送"):
+                self.send_text_direct(script_content)
+            logger.info("话术已直接发送")
             return
         except Exception as e:
-            print(f"❌ 发送错误: {str(e)}")
+            logger.warning(f"发送错误: {str(e)}")
 
     # 功能方法
     def send_script_text(self, script: str):
         """发送话术文本"""
         if self.send_mode == "添加到剪贴板":
-            pyperclip.copy(script)
-            print("已复制到剪贴板")
+            self.clipboard_service.copy_text(script)
+            logger.info("已复制到剪贴板")
             return
         elif self.send_mode == "添加到输入框":
             if not self.target_window:
                 QMessageBox.warning(self, "警告", "没有检测到目标窗口！")
                 return
-            self.paste_to_input(script)
+            with self.stall_watchdog.action("添加到输入框"):
+                self.paste_to_input(script)
         else:  # 直接发送
             if not self.target_window:
                 QMessageBox.warning(self, "警告", "没有检测到目标窗口！")
                 return
-            self.send_text_direct(script)
+            with self.stall_watchdog.action("发送话术"):
+                self.send_text_direct(script)
         if self.is_search:
             self.is_search = False
             self.clear_search()
 
+    def _activate_target_window(self) -> bool:
+        """激活目标窗口并按目标档案等待焦点切换；窗口已关闭时返回 False"""
+        if self.target_window and not platform_shim.windows.is_window(self.target_window):
+            self.target_profiles.invalidate(self.target_window)
+            logger.info("目标窗口已关闭")
+            return False
+
+        if self.target_window:
+            profile = self.target_profiles.resolve(self.target_window, self.target_title)
+            platform_shim.windows.activate(self.target_window)
+            time.sleep(profile.focus_delay if profile else 0.2)
+        return True
+
+    @metrics.timed('send.paste_to_input')
     def paste_to_input(self, text: str):
         """粘贴到输入框"""
         try:
-            if self.target_window and not win32gui.IsWindow(self.target_window):
-                print("目标窗口已关闭")
+            if not self._activate_target_window():
                 return
 
-            if self.target_window:
-                win32gui.ShowWindow(self.target_window, win32con.SW_RESTORE)
-                win32gui.SetForegroundWindow(self.target_window)
-                time.sleep(0.2)
-
-            pyperclip.copy(text)
-            pyautogui.hotkey('ctrl', 'v')
-            print("已添加到输入框")
+            self.clipboard_service.begin_paste(text)
+            try:
+                platform_shim.keyboard.hotkey('ctrl', 'v')
+            finally:
+                self.clipboard_service.end_paste()
+            logger.info(f"已添加到输入框 (粘贴耗时 {self.clipboard_service.stats['paste']['last_ms']:.1f}ms)")
 
         except Exception as e:
-            print(f"添加失败: {str(e)}")
+            logger.warning(f"添加失败: {str(e)}")
 
+    @metrics.timed('send.send_text_direct')
     def send_text_direct(self, text: str):
         """直接发送文本"""
         try:
-            if self.target_window and not win32gui.IsWindow(self.target_window):
-                print("目标窗口已关闭")
+            if not self._activate_target_window():
                 return
 
-            if self.target_window:
-                win32gui.ShowWindow(self.target_window, win32con.SW_RESTORE)
-                win32gui.SetForegroundWindow(self.target_window)
-                time.sleep(0.2)
+            profile = self.target_profiles.get(self.target_window) if self.target_window else None
+            submit_keys = profile.submit_keys() if profile else ['enter']
 
-            pyperclip.copy(text)
-            pyautogui.hotkey('ctrl', 'v')
-            time.sleep(0.1)
-            pyautogui.press('enter')
-            print("已直接发送")
+            self.clipboard_service.begin_paste(text)
+            try:
+                platform_shim.keyboard.hotkey('ctrl', 'v')
+                time.sleep(0.1)
+                platform_shim.keyboard.hotkey(*submit_keys)
+            finally:
+                self.clipboard_service.end_paste()
+            logger.info(f"已直接发送 (粘贴耗时 {self.clipboard_service.stats['paste']['last_ms']:.1f}ms)")
 
         except Exception as e:
-            print(f"发送失败: {str(e)}")
+            logger.warning(f"发送失败: {str(e)}")
 
     # <============================权限控制相关方法==============================>
 
@@ -1708,36 +2135,57 @@ class AssistantMainWindow(QMainWindow):
                 self.logout_user()
             return
 
-        # 显示登录对话框
-        from components.Login_dialog import show_login_dialog
-        result = show_login_dialog(self, self._handle_login)
+        # 显示登录对话框（登录请求在后台执行，关闭对话框即取消）
+        from components.Login_dialog import LoginDialog
+        dialog = LoginDialog(self, self._handle_login)
+        dialog.rejected.connect(lambda: self.job_runner.cancel('login'))
+        self._login_dialog = dialog
+        try:
+            dialog.exec()
+        finally:
+            self._login_dialog = None
 
-    def _handle_login(self, username: str, password: str) -> bool:
-        """处理登录逻辑"""
+    def _handle_login(self, username: str, password: str) -> Optional[bool]:
+        """处理登录逻辑：提交后台登录任务，返回 None 表示结果稍后通过 on_login_finished 通知对话框"""
         try:
             if not self.api_manager:
                 QMessageBox.critical(self, "登录失败", "API服务不可用")
                 return False
 
-            result = self.api_manager.login(username, password)
-            if result.get('success'):
-                self.current_user_id = result.get('user_id') or username
-                self.is_logged_in = True
+            api_manager = self.api_manager
 
-                # 同步云端数据
-                self.sync_cloud_data()
+            def login(ctx):
+                ctx.progress(-1, "正在登录...")
+                return api_manager.login(username, password)
 
-                # 保存配置
-                self.save_config()
+            def done(result):
+                dialog = self._login_dialog
+                if result.get('success'):
+                    self.current_user_id = result.get('user_id') or username
+                    self.is_logged_in = True
 
-                # 更新界面
-                self.update_login_status()
+                    # 保存配置
+                    self.save_config()
 
-                QMessageBox.information(self, "登录成功", f"欢迎回来，{username}！")
-                return True
-            else:
-                QMessageBox.critical(self, "登录失败", result.get('message', '用户名或密码错误'))
-                return False
+                    # 更新界面
+                    self.update_login_status()
+
+                    if dialog:
+                        dialog.on_login_finished(True)
+                    QMessageBox.information(self, "登录成功", f"欢迎回来，{username}！")
+
+                    # 启用后台自动同步（先上传离线修改，再拉取云端增量）
+                    self.bind_sync_user()
+                    self.auto_sync.set_enabled(True)
+                elif dialog:
+                    dialog.on_login_finished(False, result.get('message', '用户名或密码错误'))
+
+            def failed(e):
+                if self._login_dialog:
+                    self._login_dialog.on_login_finished(False, f"登录时发生错误: {str(e)}")
+
+            self.job_runner.submit('login', login, done, failed, "登录")
+            return None
         except Exception as e:
             QMessageBox.critical(self, "登录失败", f"登录时发生错误: {str(e)}")
             return False
@@ -1745,14 +2193,20 @@ class AssistantMainWindow(QMainWindow):
     def logout_user(self):
         """用户登出"""
         try:
+            # 停止自动同步并丢弃属于当前用户的同步任务
+            self.auto_sync.set_enabled(False)
+            self.job_runner.cancel('download')
             if self.api_manager:
-                self.api_manager.logout()
+                api_manager = self.api_manager
+                self.job_runner.submit('logout', lambda ctx: api_manager.logout(), label="登出")
 
             self.current_user_id = None
             self.is_logged_in = False
 
             # 重新初始化数据适配器
             self.data_adapter = DataAdapter()
+            self.sync_engine.data_adapter = self.data_adapter
+            self.data_adapter.add_change_listener(self.auto_sync.on_local_change)
 
             # 重新加载数据
             self.load_data_from_adapter()
@@ -1762,7 +2216,7 @@ class AssistantMainWindow(QMainWindow):
             # 保存配置
             self.save_config()
 
-            print("已登出")
+            logger.info("已登出")
         except Exception as e:
             QMessageBox.critical(self, "登出失败", f"登出时发生错误: {str(e)}")
 
@@ -1783,6 +2237,17 @@ class AssistantMainWindow(QMainWindow):
                 self.settings_dialog.dock_apps_changed.connect(self.set_dock_enabled_apps)
                 # 新增：界面字体大小信号接入（统一应用到 ScriptTree 的标题/内容字体）
                 self.settings_dialog.ui_font_size_changed.connect(self.apply_ui_font_size)
+                # 卡顿报告页
+                self.settings_dialog.stall_report_refresh_requested.connect(self.refresh_stall_report)
+                self.settings_dialog.stall_report_clear_requested.connect(self.clear_stall_report)
+                # 性能统计页
+                self.settings_dialog.metrics_enabled_changed.connect(self.set_metrics_enabled)
+                self.settings_dialog.metrics_refresh_requested.connect(self.refresh_metrics_report)
+                self.settings_dialog.metrics_reset_requested.connect(self.reset_metrics)
+                # 内存页
+                self.settings_dialog.memory_tracking_changed.connect(self.set_memory_tracking)
+                self.settings_dialog.memory_refresh_requested.connect(self.refresh_memory_report)
+                self.settings_dialog.memory_clear_requested.connect(self.clear_memory_report)
 
             # 新增：初始化吸附位置与可吸附软件
             if hasattr(self.settings_dialog, 'set_dock_config'):
@@ -1791,6 +2256,9 @@ class AssistantMainWindow(QMainWindow):
             # 同步当前发送模式到弹窗
             if hasattr(self.settings_dialog, 'set_send_mode'):
                 self.settings_dialog.set_send_mode(getattr(self, 'send_mode', "直接发送"))
+            self.refresh_stall_report()
+            self.refresh_metrics_report()
+            self.refresh_memory_report()
 
             # 展示弹窗（非模态，置顶）
             self.settings_dialog.show()
@@ -1807,6 +2275,44 @@ class AssistantMainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"显示设置弹窗失败：{str(e)}")
 
+    def refresh_stall_report(self):
+        """把卡顿报告填入设置弹窗"""
+        if getattr(self, 'settings_dialog', None) is not None:
+            self.settings_dialog.set_stall_report(self.stall_watchdog.format_report())
+
+    def clear_stall_report(self):
+        self.stall_watchdog.clear()
+        self.refresh_stall_report()
+
+    def set_metrics_enabled(self, enabled: bool):
+        """开启/关闭性能统计；关闭时写入已收集的数据"""
+        if not enabled:
+            self.metrics_writer.flush()
+        metrics.set_enabled(enabled)
+        self.config_store.set('metrics_enabled', enabled)
+        self.refresh_metrics_report()
+
+    def refresh_metrics_report(self):
+        if getattr(self, 'settings_dialog', None) is not None:
+            self.settings_dialog.set_metrics_report(metrics.enabled(), metrics.format_summary())
+
+    def reset_metrics(self):
+        metrics.registry.reset()
+        self.refresh_metrics_report()
+
+    def set_memory_tracking(self, enabled: bool):
+        self.memory_tracker.set_enabled(enabled)
+        self.config_store.set('memory_tracking', enabled)
+        self.refresh_memory_report()
+
+    def refresh_memory_report(self):
+        if getattr(self, 'settings_dialog', None) is not None:
+            self.settings_dialog.set_memory_report(self.memory_tracker.enabled, self.memory_tracker.format_report())
+
+    def clear_memory_report(self):
+        self.memory_tracker.clear()
+        self.refresh_memory_report()
+
     def apply_ui_font_size(self, size: int):
         """应用界面字体大小到脚本树"""
         try:
@@ -1821,12 +2327,12 @@ class AssistantMainWindow(QMainWindow):
                 # 重新渲染以确保现有项立即应用新字体
                 try:
                     callbacks = getattr(self.script_tree, 'callbacks', {})
-                    self.script_tree.render(self.filtered_scripts, callbacks)
+                    self.script_tree.render(self.filtered_scripts, callbacks, self.script_tree.drag_enabled)
                 except Exception:
                     # 若渲染失败，至少触发界面刷新
                     self.script_tree.update()
         except Exception as e:
-            print(f"应用界面字体大小失败: {e}")
+            logger.warning(f"应用界面字体大小失败: {e}")
 
     def show_settings_menu(self):
         """显示设置菜单（整合了原菜单栏功能）"""
@@ -1846,13 +2352,13 @@ class AssistantMainWindow(QMainWindow):
         menu.addSeparator()
 
         # 文件管理
-        # import_action = QAction("导入数据", self)
-        # import_action.triggered.connect(self.import_data)
-        # menu.addAction(import_action)
-        #
-        # export_action = QAction("导出数据", self)
-        # export_action.triggered.connect(self.export_data)
-        # menu.addAction(export_action)
+        import_action = QAction("导入数据", self)
+        import_action.triggered.connect(self.import_data)
+        menu.addAction(import_action)
+
+        export_action = QAction("导出数据", self)
+        export_action.triggered.connect(self.export_data)
+        menu.addAction(export_action)
 
         # 云端数据管理
         if self.is_logged_in:
@@ -1880,7 +2386,7 @@ class AssistantMainWindow(QMainWindow):
         """设置发送模式"""
         self.send_mode = mode
         self.save_config()
-        print(f"发送模式: {mode}")
+        logger.info(f"发送模式: {mode}")
 
     def set_dock_position(self, pos: str):
         """设置吸附位置（left/right）"""
@@ -1888,7 +2394,7 @@ class AssistantMainWindow(QMainWindow):
             return
         self.dock_position = pos
         self.save_config()
-        print(f"📎 吸附位置: {'左侧' if pos == 'left' else '右侧'}")
+        logger.info(f"吸附位置: {'左侧' if pos == 'left' else '右侧'}")
         # 若已启用吸附且存在目标窗口，可根据需要刷新吸附
         try:
             # 先设置吸附侧边
@@ -1896,12 +2402,12 @@ class AssistantMainWindow(QMainWindow):
                 try:
                     self.dock_manager.set_side('left' if pos == 'left' else 'right')
                 except Exception as e:
-                    print(f"设置吸附侧边失败: {e}")
+                    logger.warning(f"设置吸附侧边失败: {e}")
             if getattr(self, 'dock_enabled', False) and getattr(self, 'dock_manager', None) and getattr(self,
                                                                                                         'target_window',
                                                                                                         None):
                 # 仅当当前窗口允许吸附且不是本程序窗口时才刷新
-                if self.is_window_allowed_for_dock(self.target_title or "") and not self.is_our_window(
+                if self.is_window_allowed_for_dock(self.target_title or "", self.target_window) and not self.is_our_window(
                         self.target_window):
                     self.dock_manager.disable_docking()
                     self.dock_manager.enable_docking(self.target_window)
@@ -1909,58 +2415,54 @@ class AssistantMainWindow(QMainWindow):
                     # 不允许则关闭吸附
                     self.dock_manager.disable_docking()
         except Exception as e:
-            print(f"更新吸附位置时刷新失败: {e}")
+            logger.warning(f"更新吸附位置时刷新失败: {e}")
 
     def set_dock_enabled_apps(self, apps: list):
         """设置允许吸附的软件列表"""
         # 仅存储并持久化，具体吸附逻辑使用时根据列表判断
         self.dock_apps = list(apps) if isinstance(apps, list) else []
+        self.dock_matcher.compile(self.dock_apps)
         self.save_config()
-        print(f"📎 可吸附软件: {', '.join(self.dock_apps) if self.dock_apps else '未选择'}")
+        logger.info(f"可吸附软件: {', '.join(self.dock_apps) if self.dock_apps else '未选择'}")
+        # 当前目标窗口不属于新选中的软件时清除，等待切换到选中软件的窗口
+        if self.target_window and not self.dock_matcher.is_target(self.target_title or "", self.target_window):
+            self.target_window = None
+            self.target_title = "无"
         # 切换允许列表后，如果当前窗口不允许，则关闭吸附
         try:
             if self.dock_enabled and self.dock_manager:
-                if not self.is_window_allowed_for_dock(self.target_title or ""):
+                if not self.is_window_allowed_for_dock(self.target_title or "", self.target_window):
                     self.dock_manager.disable_docking()
         except Exception as e:
-            print(f"更新允许软件列表后处理失败: {e}")
+            logger.warning(f"更新允许软件列表后处理失败: {e}")
 
-    def is_window_allowed_for_dock(self, title: str) -> bool:
-        """判断当前窗口标题是否在允许吸附的软件列表中（基于统一 APPS 配置）"""
+    def is_window_allowed_for_dock(self, title: str, hwnd: Optional[int] = None) -> bool:
+        """判断当前窗口标题是否在允许吸附的软件列表中（基于预编译的 DockAppMatcher）"""
         try:
-            t = (title or "").lower()
-            selected = set(getattr(self, 'dock_apps', []) or [])
-            if not selected:
-                return False
-            result = list(filter(lambda item: item == '全部', selected))
-            if len(result) > 0:
-                return True
-            # 汇总选中项的关键词
-            keywords = []
-            found = False
-            for app in APPS:
-                name = app.get("name")
-                arr = list(filter(lambda item: item == name, selected))
-                if len(arr):
-                    kws = app.get("keywords", [])
-                    keywords.extend(kws)
-            for kw in keywords:
-                if kw:  # 确保kw不是空值
-                    if kw.lower() == t:
-                        found = True
-            return found
+            return self.dock_matcher.is_allowed(title or "", hwnd)
         except Exception:
             return False
 
     def is_our_window(self, hwnd: int) -> bool:
-        """判断句柄是否属于本程序进程"""
+        """判断句柄是否属于本程序进程（读取缓存的目标档案）"""
         try:
-            import win32process
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            return pid == os.getpid()
+            profile = self.target_profiles.resolve(hwnd)
+            return bool(profile and profile.is_own)
         except Exception:
             return False
 
+    def bind_sync_user(self):
+        """将当前登录用户绑定到数据适配器与同步引擎"""
+        self.data_adapter.api_manager = self.api_manager
+        self.sync_engine.api_manager = self.api_manager
+        uid = 0
+        try:
+            uid = int(self.current_user_id) if (
+                    self.current_user_id is not None and str(self.current_user_id).isdigit()) else 0
+        except:
+            uid = 0
+        self.sync_engine.bind_user(uid)
+
     def upload_data_to_cloud(self):
         """上传数据到云端"""
         try:
@@ -1972,37 +2474,37 @@ class AssistantMainWindow(QMainWindow):
                 QMessageBox.critical(self, "错误", "API服务不可用")
                 return
 
+            if self.job_runner.is_running('sync_push'):
+                logger.debug("上传进行中，忽略重复请求")
+                return
+
             reply = QMessageBox.question(
                 self, "确认上传",
-                "确定要将本地数据上传到云端吗？\n这将覆盖云端的现有数据。",
+                "确定要将本地修改上传到云端吗？\n上传前会先与云端的修改合并，冲突时由您选择保留的版本。",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
 
             if reply == QMessageBox.Yes:
-                self.data_adapter.api_manager = self.api_manager
-                uid = 0
-                try:
-                    uid = int(self.current_user_id) if (
-                            self.current_user_id is not None and str(self.current_user_id).isdigit()) else 0
-                except:
-                    uid = 0
-                self.data_adapter.user_id = uid
-
-                # 统一通过保存与索引刷新后再上传，避免直接赋值
-                if self.data_adapter:
-                    self.data_adapter.init_data()
-                    self.load_data_from_adapter()
-                success = self.data_adapter.push_local_scripts_data()
-                if success:
-                    QMessageBox.information(self, "上传成功", "数据已成功上传到云端！")
-                    print("数据上传成功")
-                else:
-                    QMessageBox.critical(self, "上传失败", "数据上传失败，请稍后重试")
-                    print("数据上传失败")
+                self.bind_sync_user()
+                # 与自动同步共用发件箱：立即上传上次同步之后的本地修改
+                if not self.auto_sync.has_local_changes():
+                    QMessageBox.information(self, "上传成功", "本地没有需要上传的修改")
+                    return
+
+                def flushed(success: bool, message: str):
+                    if success:
+                        QMessageBox.information(self, "上传成功", "数据已成功上传到云端！")
+                        logger.info("数据上传成功")
+                    else:
+                        QMessageBox.critical(self, "上传失败",
+                                             f"数据上传失败，修改已保存在本地，将自动重试\n{message}")
+                        logger.warning(f"数据上传失败: {message}")
+
+                self.auto_sync.sync_now(flushed)
         except Exception as e:
             QMessageBox.critical(self, "上传失败", f"上传时发生错误: {str(e)}")
-            print(f"上传失败: {str(e)}")
+            logger.warning(f"上传失败: {str(e)}")
 
     def download_data_from_cloud(self):
         """从云端下载数据"""
@@ -2015,6 +2517,10 @@ class AssistantMainWindow(QMainWindow):
                 QMessageBox.critical(self, "错误", "API服务不可用")
                 return
 
+            if self.job_runner.is_running('download'):
+                logger.debug("下载进行中，忽略重复请求")
+                return
+
             reply = QMessageBox.question(
                 self, "确认下载",
                 "确定要从云端下载数据吗？\n这将覆盖本地的现有数据。",
@@ -2023,27 +2529,104 @@ class AssistantMainWindow(QMainWindow):
             )
 
             if reply == QMessageBox.Yes:
-                # 先设置 API 管理器与用户ID
-                self.data_adapter.api_manager = self.api_manager
-                uid = 0
-                try:
-                    uid = int(self.current_user_id) if (
-                            self.current_user_id is not None and str(self.current_user_id).isdigit()) else 0
-                except:
-                    uid = 0
-                self.data_adapter.user_id = uid
-                success = self.data_adapter.load_user_data()
-                if success:
-                    self.load_data_from_adapter()
-                    self.update_all_ui()
-                    QMessageBox.information(self, "下载成功", "数据已成功从云端下载！")
-                    print("数据下载成功")
-                else:
-                    QMessageBox.warning(self, "下载失败", "云端暂无数据或下载失败")
-                    print("云端暂无数据")
+                self.bind_sync_user()
+                engine = self.sync_engine
+
+                def fetch(ctx):
+                    ctx.progress(-1, "正在下载云端数据...")
+                    # 用户明确要求覆盖本地：请求完整快照
+                    return engine.fetch_remote_changes(full=True, progress=ctx.progress, check=ctx.check)
+
+                def apply(result):
+                    if engine.apply_remote_changes(result):
+                        # 云端快照已覆盖本地，未上传的本地修改作废
+                        self.auto_sync.discard_pending()
+                        self.load_data_from_adapter()
+                        self.update_all_ui()
+                        QMessageBox.information(self, "下载成功", "数据已成功从云端下载！")
+                        logger.info("数据下载成功")
+                    else:
+                        QMessageBox.warning(self, "下载失败", "云端暂无数据或下载失败")
+                        logger.info("云端暂无数据")
+
+                def failed(e):
+                    QMessageBox.critical(self, "下载失败", f"下载时发生错误: {str(e)}")
+                    logger.warning(f"下载失败: {str(e)}")
+
+                self.job_runner.submit('download', fetch, apply, failed, "下载数据")
         except Exception as e:
             QMessageBox.critical(self, "下载失败", f"下载时发生错误: {str(e)}")
-            print(f"下载失败: {str(e)}")
+            logger.warning(f"下载失败: {str(e)}")
+
+    def import_data(self):
+        """从本地 Excel/CSV/JSON 文件导入话术（本地转换，后台分批写入）"""
+        if self.job_runner.is_running('import'):
+            logger.debug("导入进行中，忽略重复请求")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入数据", "", "话术文件 (*.xlsx *.csv *.json);;所有文件 (*)")
+        if not file_path:
+            return
+        try:
+            import_export.file_format(file_path)
+        except import_export.ImportExportError as e:
+            QMessageBox.warning(self, "导入失败", str(e))
+            return
+
+        importer = import_export.ScriptImporter(self.data_adapter)
+
+        def run(ctx):
+            ctx.progress(0, "正在导入...")
+            # 工作线程只读取与解析文件，每批写入话术库在主线程执行
+            return importer.import_file(file_path, ctx.progress, ctx.check, ctx.call_in_main)
+
+        def done(stats):
+            self.load_data_from_adapter()
+            self.update_all_ui()
+            message = f"已导入 {stats['rows']} 行"
+            if stats['skipped']:
+                message += f"，跳过 {stats['skipped']} 行（缺少分类名称）"
+            QMessageBox.information(self, "导入完成", message)
+            logger.info(f"导入完成: {stats}")
+
+        def failed(e):
+            # 已提交的批次已保存，刷新界面
+            self.load_data_from_adapter()
+            self.update_all_ui()
+            QMessageBox.critical(self, "导入失败", f"导入时发生错误: {str(e)}")
+            logger.warning(f"导入失败: {str(e)}")
+
+        self.job_runner.submit('import', run, done, failed, "导入数据")
+
+    def export_data(self):
+        """把话术导出为本地 Excel/CSV/JSON 文件"""
+        if self.job_runner.is_running('export'):
+            logger.debug("导出进行中，忽略重复请求")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出数据", "话术.csv", "CSV 文件 (*.csv);;Excel 文件 (*.xlsx);;JSON 文件 (*.json)")
+        if not file_path:
+            return
+        try:
+            import_export.file_format(file_path)
+        except import_export.ImportExportError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
+            return
+
+        def run(ctx):
+            # 导出期间界面仍可编辑：在主线程取结构拷贝（不复制字符串），写文件在工作线程
+            tree = ctx.call_in_main(lambda: import_export.copy_tree(self.data_adapter.get_scripts_data()))
+            return import_export.export_file(tree, file_path, ctx.progress, ctx.check)
+
+        def done(count):
+            QMessageBox.information(self, "导出完成", f"已导出 {count} 行到\n{file_path}")
+            logger.info(f"导出完成: {file_path}")
+
+        def failed(e):
+            QMessageBox.critical(self, "导出失败", f"导出时发生错误: {str(e)}")
+            logger.warning(f"导出失败: {str(e)}")
+
+        self.job_runner.submit('export', run, done, failed, "导出数据")
 
     # <============================手动该改变窗口大小相关方法==============================>
 
@@ -2257,8 +2840,8 @@ class AssistantMainWindow(QMainWindow):
                 add_dialog.content_added_signal.connect(lambda level_two_id, content, title: self.add_script_content_with_color(level_two_id, content, title, getattr(add_dialog, 'selected_bg_color', '')))
 
             # 连接弹窗关闭信号
-            add_dialog.accepted.connect(lambda: print("✅ 内容添加成功"))
-            add_dialog.rejected.connect(lambda: print("❌ 取消添加"))
+            add_dialog.accepted.connect(lambda: logger.info("内容添加成功"))
+            add_dialog.rejected.connect(lambda: logger.debug("取消添加"))
 
             # 显示非模态弹窗
             add_dialog.show()
@@ -2268,6 +2851,20 @@ class AssistantMainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"显示添加弹窗失败：{str(e)}")
 
+    def add_type(self):
+        """新增话术类型（追加到最后）"""
+        name, ok = QInputDialog.getText(self, "新增话术类型", "话术类型名称:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            if self.data_adapter.add_type(name) is not None:
+                self.update_ui('add_type')
+            else:
+                QMessageBox.warning(self, "警告", "添加失败")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"添加失败: {str(e)}")
+
     def add_level_one_callback(self, type_id: int, value: str):
         """处理添加话术分类"""
         try:
@@ -2342,8 +2939,8 @@ class AssistantMainWindow(QMainWindow):
                 edit_dialog.content_edited_signal.connect(lambda script_id, new_value, script_title: self.edit_script_with_color(script_id, new_value, script_title, getattr(edit_dialog, 'selected_bg_color', None)))
 
             # 连接弹窗关闭信号
-            edit_dialog.accepted.connect(lambda: print("✅ 编辑成功"))
-            edit_dialog.rejected.connect(lambda: print("❌ 取消编辑"))
+            edit_dialog.accepted.connect(lambda: logger.info("编辑成功"))
+            edit_dialog.rejected.connect(lambda: logger.debug("取消编辑"))
 
             # 显示非模态弹窗
             edit_dialog.show()
@@ -2353,6 +2950,20 @@ class AssistantMainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"显示编辑对话框失败：{str(e)}")
 
+    def edit_type(self, type_id: int, type_name: str):
+        """修改话术类型名称"""
+        name, ok = QInputDialog.getText(self, "修改话术类型名称", "话术类型名称:", text=type_name)
+        name = name.strip()
+        if not ok or not name or name == type_name:
+            return
+        try:
+            if self.data_adapter.edit_type_name(type_id, name):
+                self.update_ui('edit_type')
+            else:
+                QMessageBox.warning(self, "警告", "编辑失败：未找到该话术类型或ID无效")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"编辑话术类型失败: {str(e)}")
+
     def edit_level_one_callback(self, level_one_id: int, new_value: str):
         """编辑话术分类（使用 DataAdapter）"""
         try:
@@ -2403,6 +3014,38 @@ class AssistantMainWindow(QMainWindow):
 
     # <============================删除功能（话术分类、话术标题、话术内容）==============================>
 
+    def delete_type(self, type_id: int, type_name: str):
+        """删除话术类型（连同其下全部分类与话术）"""
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Question)
+        msg.setWindowTitle("确认删除")
+        msg.setText(f"确定要删除话术类型 '{type_name}' 及其所有分类和话术吗？")
+        msg.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        # 设置中文按钮文本
+        yes_btn = msg.button(QMessageBox.Yes)
+        no_btn = msg.button(QMessageBox.No)
+        if yes_btn:
+            yes_btn.setText("确定")
+        if no_btn:
+            no_btn.setText("取消")
+        reply = msg.exec()
+
+        if reply == QMessageBox.Yes:
+            try:
+                success = self.data_adapter.delete_type(type_id)
+                if success:
+                    if self.current_type_id == type_id:
+                        # 删除的是当前类型：切换到第一个类型
+                        id_list = self.data_adapter.all_type_id_list
+                        self.current_type_id = id_list[0] if id_list else 0
+                        level_one_ids = self.data_adapter.type_children_idList_byIds.get(self.current_type_id) or []
+                        self.current_level_one_id = level_one_ids[0] if level_one_ids else 0
+                    self.update_ui('delete_type')
+                else:
+                    QMessageBox.warning(self, "错误", "删除失败：未找到该话术类型或ID无效")
+            except Exception as e:
+                QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+
     def delete_level_one(self, level_one_id: int, level_one_name: str):
         """删除话术分类（使用 DataAdapter）"""
         msg = QMessageBox(self)
@@ -2485,9 +3128,31 @@ class AssistantMainWindow(QMainWindow):
                 else:
                     QMessageBox.warning(self, "错误", "找不到要删除的话术！")
             except Exception as e:
-                print('ValueError', e)
+                logger.warning(f"删除话术失败: {e}")
                 QMessageBox.warning(self, "错误", "找不到要删除的话术！")
 
+    # <============================拖放排序==============================>
+
+    def on_script_moved(self, script_id: int, level_two_id: int, pos: int):
+        """话术拖放到某个话术标题下的 pos 位置"""
+        try:
+            if self.data_adapter.move_script(script_id, level_two_id, pos):
+                self.update_ui('move_script')
+            else:
+                QMessageBox.warning(self, "警告", "移动失败")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"移动失败: {str(e)}")
+
+    def on_section_moved(self, level_two_id: int, pos: int):
+        """话术标题在当前分类内拖放到 pos 位置"""
+        try:
+            if self.data_adapter.move_level_two(level_two_id, self.current_level_one_id, pos):
+                self.update_ui('move_level_two')
+            else:
+                QMessageBox.warning(self, "警告", "移动失败")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"移动失败: {str(e)}")
+
 UNIQUE_KEY = "chatassistant_single_instance"
 def setup_single_instance():
     """确保单实例运行；已有实例则连接并退出，否则启动本地服务器"""
@@ -2524,6 +3189,9 @@ def bring_to_front(win):
 
 def main():
     """主函数"""
+    log_setup.setup_logging()
+    setup_pyqt_exception_handling()
+
     # 创建 Qt 应用
     app = QApplication(sys.argv)
     QApplication.setQuitOnLastWindowClosed(False)
@@ -2553,17 +3221,17 @@ def main():
             if f.open(QFile.ReadOnly | QFile.Text):
                 app.setStyleSheet(bytes(f.readAll()).decode("utf-8"))
                 f.close()
-                print("✅ 已应用内嵌样式")
+                logger.info("已应用内嵌样式")
                 applied = True
         except Exception as e:
-            print(f"⚠️ 内嵌样式加载失败: {e}")
+            logger.warning(f"内嵌样式加载失败: {e}")
 
     if not applied:
         try:
             theme_manager.apply_theme(app, "modern_optimized")
-            print("✅ 本地开发使用文件样式")
+            logger.info("本地开发使用文件样式")
         except Exception as e:
-            print(f"⚠️ 主题加载失败: {e}")
+            logger.warning(f"主题加载失败: {e}")
 
     # 创建主窗口
     window = AssistantMainWindow()
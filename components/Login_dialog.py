@@ -19,11 +19,14 @@ class LoginDialog(QDialog):
         
         Args:
             parent: 父窗口
-            login_callback: 登录回调函数，接收用户名和密码，返回登录是否成功
+            login_callback: 登录回调函数，接收用户名和密码，返回登录是否成功；
+                            返回 None 表示已转入后台执行，完成后由调用方调用 on_login_finished
         """
         super().__init__(parent)
         self.login_callback = login_callback
         self.result = None
+        # 后台登录中的用户名/密码
+        self._pending: Optional[Tuple[str, str]] = None
         
         self.setup_ui()
         
@@ -103,10 +106,16 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "警告", "请输入用户名和密码！")
             return
         
+        if self._pending is not None:
+            return
+
         try:
             if self.login_callback:
                 success = self.login_callback(username, password)
-                if success:
+                if success is None:
+                    # 后台登录中，等待 on_login_finished
+                    self.set_pending((username, password))
+                elif success:
                     self.result = (username, password)
                     self.accept()
             else:
@@ -116,6 +125,25 @@ class LoginDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "登录失败", f"登录时发生错误: {str(e)}")
     
+    def set_pending(self, credentials: Optional[Tuple[str, str]]):
+        """切换后台登录状态：登录中禁用输入与登录按钮"""
+        self._pending = credentials
+        busy = credentials is not None
+        self.username_edit.setEnabled(not busy)
+        self.password_edit.setEnabled(not busy)
+        self.login_btn.setEnabled(not busy)
+        self.login_btn.setText("登录中..." if busy else "登录")
+
+    def on_login_finished(self, success: bool, message: str = ""):
+        """后台登录完成：成功关闭对话框，失败提示并恢复输入"""
+        credentials = self._pending
+        self.set_pending(None)
+        if success:
+            self.result = credentials
+            self.accept()
+        else:
+            QMessageBox.critical(self, "登录失败", message or "用户名或密码错误")
+
     def get_result(self) -> Optional[Tuple[str, str]]:
         """获取登录结果"""
         return self.result
@@ -3,8 +3,8 @@
 包含添加一级分类、二级分类、话术内容等功能，支持权限控制
 """
 
+import logging
 import os
-from tkinter import N
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel,
     QPushButton, QLineEdit, QTextEdit, QComboBox, QGroupBox,
@@ -17,6 +17,8 @@ from typing import Dict, List, Optional, Any
 
 from utils.data_adapter import DataAdapter
 
+logger = logging.getLogger(__name__)
+
 
 class AddDialog(QDialog):
     """添加/编辑内容弹窗"""
@@ -281,7 +283,7 @@ class AddDialog(QDialog):
                 with open(qss_path, 'r', encoding='utf-8') as f2:
                     self.setStyleSheet(f2.read())
         except Exception as e:
-            print(f"加载添加弹窗样式表失败: {e}")
+            logger.warning(f"加载添加弹窗样式表失败: {e}")
 
     def setup_connections(self):
         """设置信号连接"""
@@ -648,12 +650,12 @@ class AddDialog(QDialog):
         """显示事件"""
         super().showEvent(event)
         # 只有在没有设置默认值的情况下才更新下拉框数据
-        print('_defaults_set', self._defaults_set)
+        logger.debug('_defaults_set=%s', self._defaults_set)
         if not getattr(self, '_defaults_set', False):
-            print("showEvent: 更新下拉框数据")
+            logger.debug("showEvent: 更新下拉框数据")
             self.update_script_type_combo()
         else:
-            print("showEvent: 跳过下拉框数据更新，因为已设置默认值")
+            logger.debug("showEvent: 跳过下拉框数据更新，因为已设置默认值")
 
     def set_add_mode(self, add_type: str, id: int = 0):
         """设置新增模式"""
@@ -773,8 +775,8 @@ class AddDialog(QDialog):
                            level_two_id: int = 0, script_id: int = 0, old_value: str = None, script_title: str = None):
         """设置默认值"""
         try:
-            print('type_id', type_id, 'level_one_id', level_one_id, 'level_two_id', level_two_id, 'script_id',
-                  script_id, 'old_value', old_value)
+            logger.debug('设置默认值 type_id=%s level_one_id=%s level_two_id=%s script_id=%s old_value=%r',
+                         type_id, level_one_id, level_two_id, script_id, old_value)
             # 标记正在设置默认值
             self._setting_defaults = True
 
@@ -822,7 +824,7 @@ class AddDialog(QDialog):
             self._setting_defaults = False
             self._defaults_set = True
         except Exception as e:
-            print(f"❌ 设置默认值失败: {e}")
+            logger.warning(f"设置默认值失败: {e}")
             import traceback
             traceback.print_exc()
             self._setting_defaults = False
@@ -0,0 +1,137 @@
+"""
+同步冲突处理弹窗
+逐条展示本地与云端都修改过的话术/分类，选择保留本地或使用云端版本
+"""
+from typing import Any, Dict, List, Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget,
+    QListWidgetItem, QTextEdit, QRadioButton, QButtonGroup
+)
+
+from utils.merge_engine import MergeResult, MergeConflict, LOCAL, REMOTE
+
+
+def _entity_text(entity: Optional[Dict[str, Any]], fields: tuple = ()) -> str:
+    """实体的可读文本；fields 非空时只展示冲突字段"""
+    if entity is None:
+        return "（已删除）"
+    values = entity.get('fields') or {}
+    names = [name for name in fields if name != 'parent'] or list(values)
+    lines = [f"{name}: {values.get(name, '')}" for name in names]
+    if 'parent' in fields:
+        lines.append(f"所属上级ID: {entity.get('parent')}")
+    return "\n".join(lines)
+
+
+class MergeDialog(QDialog):
+    """冲突处理弹窗：确定后 MergeResult 中每个冲突都有 resolution"""
+
+    def __init__(self, merge: MergeResult, parent=None):
+        super().__init__(parent)
+        self.merge = merge
+        self.conflicts: List[MergeConflict] = list(merge.conflicts)
+        for conflict in self.conflicts:
+            if conflict.resolution is None:
+                conflict.resolution = LOCAL
+        self.setup_ui()
+        if self.conflicts:
+            self.conflict_list.setCurrentRow(0)
+
+    def setup_ui(self):
+        self.setWindowTitle("同步冲突")
+        self.setModal(True)
+        self.resize(520, 460)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        stats = self.merge.stats
+        summary = QLabel(
+            f"已自动合并：本地 {stats.get('local', 0)} 项，云端 {stats.get('remote', 0)} 项，"
+            f"双方 {stats.get('merged', 0)} 项\n以下 {len(self.conflicts)} 处修改存在冲突，请选择保留的版本："
+        )
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+
+        self.conflict_list = QListWidget()
+        for conflict in self.conflicts:
+            self.conflict_list.addItem(QListWidgetItem(self._item_text(conflict)))
+        self.conflict_list.currentRowChanged.connect(self.on_conflict_selected)
+        layout.addWidget(self.conflict_list, 1)
+
+        # 本地 / 云端 对比
+        compare = QHBoxLayout()
+        self.local_view = QTextEdit()
+        self.local_view.setReadOnly(True)
+        self.remote_view = QTextEdit()
+        self.remote_view.setReadOnly(True)
+        for title, view in (("本地版本", self.local_view), ("云端版本", self.remote_view)):
+            col = QVBoxLayout()
+            col.addWidget(QLabel(title))
+            col.addWidget(view)
+            compare.addLayout(col)
+        layout.addLayout(compare, 1)
+
+        choice_row = QHBoxLayout()
+        self.rb_local = QRadioButton("保留本地")
+        self.rb_remote = QRadioButton("使用云端")
+        self.choice_group = QButtonGroup(self)
+        self.choice_group.addButton(self.rb_local)
+        self.choice_group.addButton(self.rb_remote)
+        self.rb_local.toggled.connect(self.on_choice_changed)
+        choice_row.addWidget(self.rb_local)
+        choice_row.addWidget(self.rb_remote)
+        choice_row.addStretch()
+        layout.addLayout(choice_row)
+
+        button_row = QHBoxLayout()
+        all_local_btn = QPushButton("全部保留本地")
+        all_local_btn.clicked.connect(lambda: self.resolve_all(LOCAL))
+        all_remote_btn = QPushButton("全部使用云端")
+        all_remote_btn.clicked.connect(lambda: self.resolve_all(REMOTE))
+        button_row.addWidget(all_local_btn)
+        button_row.addWidget(all_remote_btn)
+        button_row.addStretch()
+        later_btn = QPushButton("稍后处理")
+        later_btn.clicked.connect(self.reject)
+        ok_btn = QPushButton("确定")
+        ok_btn.setObjectName("primary_button")
+        ok_btn.clicked.connect(self.accept)
+        button_row.addWidget(later_btn)
+        button_row.addWidget(ok_btn)
+        layout.addLayout(button_row)
+
+    def _item_text(self, conflict: MergeConflict) -> str:
+        side = "本地" if conflict.resolution == LOCAL else "云端"
+        return f"[{side}] {conflict.describe()}"
+
+    def current_conflict(self) -> Optional[MergeConflict]:
+        row = self.conflict_list.currentRow()
+        return self.conflicts[row] if 0 <= row < len(self.conflicts) else None
+
+    def on_conflict_selected(self, row: int):
+        conflict = self.current_conflict()
+        if conflict is None:
+            return
+        self.local_view.setPlainText(_entity_text(conflict.local, conflict.fields))
+        self.remote_view.setPlainText(_entity_text(conflict.remote, conflict.fields))
+        # 切换选中项时不触发 on_choice_changed
+        self.rb_local.blockSignals(True)
+        self.rb_local.setChecked(conflict.resolution == LOCAL)
+        self.rb_remote.setChecked(conflict.resolution == REMOTE)
+        self.rb_local.blockSignals(False)
+
+    def on_choice_changed(self, local_checked: bool):
+        conflict = self.current_conflict()
+        if conflict is None:
+            return
+        conflict.resolution = LOCAL if local_checked else REMOTE
+        self.conflict_list.currentItem().setText(self._item_text(conflict))
+
+    def resolve_all(self, side: str):
+        self.merge.resolve_all(side)
+        for row, conflict in enumerate(self.conflicts):
+            self.conflict_list.item(row).setText(self._item_text(conflict))
+        self.on_conflict_selected(self.conflict_list.currentRow())
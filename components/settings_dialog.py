@@ -1,13 +1,16 @@
 from PySide6.QtWidgets import (
     QDialog, QWidget, QListWidget, QListWidgetItem, QStackedWidget,
     QHBoxLayout, QVBoxLayout, QFormLayout, QGridLayout, QLabel, QCheckBox,
-    QComboBox, QPushButton, QRadioButton, QButtonGroup, QScrollArea
+    QComboBox, QPushButton, QRadioButton, QButtonGroup, QScrollArea, QPlainTextEdit
 )
 from PySide6.QtCore import Qt, Signal, QFile, QIODevice
+import logging
 import os
 from typing import Optional, List
 from utils.dock_apps import APPS
 
+logger = logging.getLogger(__name__)
+
 
 class DockSettingsWidget(QWidget):
     """吸附设置页：选择吸附位置 + 选择支持吸附的软件"""
@@ -180,6 +183,55 @@ class InterfaceSettingsWidget(QWidget):
         # 信号
         self.font_combo.currentTextChanged.connect(lambda t: self.font_size_changed.emit(int(t)))
 
+class ReportWidget(QWidget):
+    """报告页：只读文本（卡顿报告、性能统计），可刷新/清空"""
+    refresh_requested = Signal()
+    clear_requested = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        col = QVBoxLayout(self)
+        col.setContentsMargins(0, 0, 0, 0)
+        col.setSpacing(6)
+
+        self.report_view = QPlainTextEdit()
+        self.report_view.setObjectName("report_view")
+        self.report_view.setReadOnly(True)
+        self.report_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        col.addWidget(self.report_view, 1)
+
+        row = QHBoxLayout()
+        row.addStretch(1)
+        self.refresh_btn = QPushButton("刷新")
+        self.clear_btn = QPushButton("清空")
+        row.addWidget(self.refresh_btn)
+        row.addWidget(self.clear_btn)
+        col.addLayout(row)
+
+        self.refresh_btn.clicked.connect(self.refresh_requested.emit)
+        self.clear_btn.clicked.connect(self.clear_requested.emit)
+
+    def set_report(self, text: str):
+        self.report_view.setPlainText(text)
+
+
+class SwitchReportWidget(ReportWidget):
+    """带开关的报告页（性能统计、内存跟踪）"""
+    enabled_changed = Signal(bool)
+
+    def __init__(self, label: str, parent=None):
+        super().__init__(parent)
+        self.enabled_check = QCheckBox(label)
+        self.layout().insertWidget(0, self.enabled_check)
+        self.enabled_check.toggled.connect(self.enabled_changed.emit)
+
+    def set_state(self, enabled: bool, text: str):
+        self.enabled_check.blockSignals(True)
+        self.enabled_check.setChecked(enabled)
+        self.enabled_check.blockSignals(False)
+        self.set_report(text)
+
+
 class SettingsDialog(QDialog):
     """设置弹窗：左侧菜单，右侧内容"""
     # 对外信号
@@ -190,6 +242,17 @@ class SettingsDialog(QDialog):
     send_mode_changed = Signal(str)  # "直接发送" | "添加到输入框" | "添加到剪贴板"
     # 新增：界面字体大小变更信号（与主窗口联动）
     ui_font_size_changed = Signal(int)
+    # 卡顿报告页：请求刷新 / 清空（由主窗口填充内容）
+    stall_report_refresh_requested = Signal()
+    stall_report_clear_requested = Signal()
+    # 性能统计页：开关 / 请求刷新 / 清空
+    metrics_enabled_changed = Signal(bool)
+    metrics_refresh_requested = Signal()
+    metrics_reset_requested = Signal()
+    # 内存
+    memory_tracking_changed = Signal(bool)
+    memory_refresh_requested = Signal()
+    memory_clear_requested = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -217,6 +280,15 @@ class SettingsDialog(QDialog):
         item3 = QListWidgetItem("界面设置")
         item3.setData(Qt.ItemDataRole.UserRole, 2)
         self.menu.addItem(item3)
+        item4 = QListWidgetItem("卡顿报告")
+        item4.setData(Qt.ItemDataRole.UserRole, 3)
+        self.menu.addItem(item4)
+        item5 = QListWidgetItem("性能统计")
+        item5.setData(Qt.ItemDataRole.UserRole, 4)
+        self.menu.addItem(item5)
+        item6 = QListWidgetItem("内存")
+        item6.setData(Qt.ItemDataRole.UserRole, 5)
+        self.menu.addItem(item6)
         # 居中所有菜单项（批量设置）
         for i in range(self.menu.count()):
             it = self.menu.item(i)
@@ -230,10 +302,16 @@ class SettingsDialog(QDialog):
         self.dock_page = DockSettingsWidget()
         self.send_page = SendSettingsWidget()
         self.ui_page = InterfaceSettingsWidget()
+        self.stall_page = ReportWidget()
+        self.metrics_page = SwitchReportWidget("记录性能统计（定期保存到 data/logs/metrics.json）")
+        self.memory_page = SwitchReportWidget("跟踪内存（切换分类、搜索后检查控件数是否增长）")
 
         self.stack.addWidget(self.send_page)
         self.stack.addWidget(self.dock_page)
         self.stack.addWidget(self.ui_page)
+        self.stack.addWidget(self.stall_page)
+        self.stack.addWidget(self.metrics_page)
+        self.stack.addWidget(self.memory_page)
 
         # 底部操作区（可选）
         right_wrap = QVBoxLayout()
@@ -279,6 +357,12 @@ class SettingsDialog(QDialog):
             if idx is None:
                 idx = self.menu.row(current)
             self.stack.setCurrentIndex(int(idx))
+            if self.stack.currentWidget() is self.stall_page:
+                self.stall_report_refresh_requested.emit()
+            elif self.stack.currentWidget() is self.metrics_page:
+                self.metrics_refresh_requested.emit()
+            elif self.stack.currentWidget() is self.memory_page:
+                self.memory_refresh_requested.emit()
 
         self.menu.currentItemChanged.connect(_on_menu_changed)
         # 默认选中第一项并触发切换
@@ -293,6 +377,17 @@ class SettingsDialog(QDialog):
         self.send_page.send_mode_changed.connect(self.send_mode_changed.emit)
         # 新的界面字体大小信号
         self.ui_page.font_size_changed.connect(self.ui_font_size_changed.emit)
+        # 卡顿报告
+        self.stall_page.refresh_requested.connect(self.stall_report_refresh_requested.emit)
+        self.stall_page.clear_requested.connect(self.stall_report_clear_requested.emit)
+        # 性能统计
+        self.metrics_page.enabled_changed.connect(self.metrics_enabled_changed.emit)
+        self.metrics_page.refresh_requested.connect(self.metrics_refresh_requested.emit)
+        self.metrics_page.clear_requested.connect(self.metrics_reset_requested.emit)
+        # 内存
+        self.memory_page.enabled_changed.connect(self.memory_tracking_changed.emit)
+        self.memory_page.refresh_requested.connect(self.memory_refresh_requested.emit)
+        self.memory_page.clear_requested.connect(self.memory_clear_requested.emit)
 
     def _load_stylesheet(self):
         try:
@@ -311,7 +406,7 @@ class SettingsDialog(QDialog):
                 with open(qss_path, 'r', encoding='utf-8') as f2:
                     self.setStyleSheet(f2.read())
         except Exception as e:
-            print(f"加载设置弹窗样式失败: {e}")
+            logger.warning(f"加载设置弹窗样式失败: {e}")
 
     # 提供便捷设置/读取当前值的接口（供外部初始化/持久化）
     def set_dock_values(self, enabled: bool = False, gap: int = 0):
@@ -328,4 +423,16 @@ class SettingsDialog(QDialog):
 
     def set_send_mode(self, mode: str = "直接发送"):
         """设置发送模式（推荐使用新接口）"""
-        self.send_page.set_mode(mode)
\ No newline at end of file
+        self.send_page.set_mode(mode)
+
+    def set_stall_report(self, text: str):
+        """设置卡顿报告页的内容"""
+        self.stall_page.set_report(text)
+
+    def set_metrics_report(self, enabled: bool, text: str):
+        """设置性能统计页的开关状态与内容"""
+        self.metrics_page.set_state(enabled, text)
+
+    def set_memory_report(self, enabled: bool, text: str):
+        """设置内存页的开关状态与内容"""
+        self.memory_page.set_state(enabled, text)
\ No newline at end of file
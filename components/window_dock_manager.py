@@ -1,12 +1,15 @@
 """
 窗口吸附管理器 - 实现窗口自动吸附功能
 """
-import win32gui
-import win32con
+import logging
 from PySide6.QtCore import QTimer, QObject, Signal
 from PySide6.QtWidgets import QWidget
 from typing import Optional, Tuple
 
+import utils.platform_shim as platform_shim
+
+logger = logging.getLogger(__name__)
+
 
 class WindowDockManager(QObject):
     """窗口吸附管理器"""
@@ -57,27 +60,26 @@ class WindowDockManager(QObject):
     def get_window_rect(self, window_handle: int) -> Optional[Tuple[int, int, int, int]]:
         """获取窗口矩形区域"""
         try:
-            if not win32gui.IsWindow(window_handle):
+            if not platform_shim.windows.is_window(window_handle):
                 return None
 
-            rect = win32gui.GetWindowRect(window_handle)
+            rect = platform_shim.windows.window_rect(window_handle)
             return rect  # (left, top, right, bottom)
         except Exception as e:
-            print(f"获取窗口矩形失败: {e}")
+            logger.warning(f"获取窗口矩形失败: {e}")
             return None
 
     def is_window_minimized(self, window_handle: int) -> bool:
         """检查窗口是否最小化"""
         try:
-            placement = win32gui.GetWindowPlacement(window_handle)
-            return placement[1] == win32con.SW_SHOWMINIMIZED
+            return platform_shim.windows.is_minimized(window_handle)
         except:
             return False
 
     def is_window_visible(self, window_handle: int) -> bool:
         """检查窗口是否可见"""
         try:
-            return bool(win32gui.IsWindowVisible(window_handle))
+            return platform_shim.windows.is_visible(window_handle)
         except:
             return False
 
@@ -114,7 +116,7 @@ class WindowDockManager(QObject):
 
         # 检查目标窗口是否仍然有效
         if not self.is_window_visible(self.target_window_handle):
-            print("目标窗口不可见，停止吸附")
+            logger.warning("目标窗口不可见，停止吸附")
             self.disable_docking()
             return
 
@@ -132,7 +134,7 @@ class WindowDockManager(QObject):
         # 获取目标窗口位置
         target_rect = self.get_window_rect(self.target_window_handle)
         if not target_rect:
-            print("无法获取目标窗口位置")
+            logger.warning("无法获取目标窗口位置")
             return
 
         # 检查目标窗口位置是否发生变化
@@ -155,7 +157,7 @@ class WindowDockManager(QObject):
             self.main_window.setGeometry(dock_x, dock_y, dock_width, dock_height)
 
         except Exception as e:
-            print(f"更新吸附位置失败: {e}")
+            logger.warning(f"更新吸附位置失败: {e}")
         finally:
             self.is_docking = False
 
@@ -165,7 +167,7 @@ class WindowDockManager(QObject):
             return ""
 
         try:
-            return win32gui.GetWindowText(self.target_window_handle)
+            return platform_shim.windows.window_title(self.target_window_handle)
         except:
             return ""
 
@@ -1,11 +1,14 @@
 """
 主题管理器 - 支持多主题切换
 """
+import logging
 from pathlib import Path
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QSettings
 from typing import Dict, List
 
+logger = logging.getLogger(__name__)
+
 
 class ThemeManager:
     """主题管理器类"""
@@ -58,21 +61,21 @@ class ThemeManager:
             样式表字符串
         """
         if theme_name not in self.available_themes:
-            print(f"警告: 主题 {theme_name} 不存在，使用默认主题")
+            logger.warning(f"主题 {theme_name} 不存在，使用默认主题")
             theme_name = "modern"
         
         theme_info = self.available_themes[theme_name]
         style_file = self.styles_dir / theme_info["file"]
         
         if not style_file.exists():
-            print(f"警告: 样式文件 {style_file} 不存在")
+            logger.warning(f"样式文件 {style_file} 不存在")
             return ""
         
         try:
             with open(style_file, 'r', encoding='utf-8') as f:
                 return f.read()
         except Exception as e:
-            print(f"加载主题文件失败: {e}")
+            logger.warning(f"加载主题文件失败: {e}")
             return ""
     
     def apply_theme(self, app: QApplication, theme_name: str):
@@ -88,9 +91,9 @@ class ThemeManager:
             app.setStyleSheet(style_sheet)
             self.current_theme = theme_name
             self.save_current_theme()
-            print(f"已应用 {self.available_themes[theme_name]['name']} 主题")
+            logger.info(f"已应用 {self.available_themes[theme_name]['name']} 主题")
         else:
-            print("应用主题失败，使用系统默认样式")
+            logger.warning("应用主题失败，使用系统默认样式")
     
     def save_current_theme(self):
         """保存当前主题设置"""
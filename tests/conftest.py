@@ -0,0 +1,21 @@
+"""
+pytest 公共夹具：在后台线程启动本地参考服务端（tools/reference_server.py）
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.reference_server import ReferenceServer
+
+
+@pytest.fixture
+def server():
+    server = ReferenceServer().start()
+    yield server
+    server.delay = 0.0
+    server.stop()
@@ -0,0 +1,129 @@
+"""HttpTransport / APIManager 对参考服务端的重试、超时与 gzip 行为"""
+import pytest
+
+from benchmarks.synthetic import generate
+from tools.reference_server import RESET
+from utils.api_manager import APIManager, APIRequestError
+from utils.http_transport import HttpTransport
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录退避等待的秒数（不真正等待）"""
+    delays = []
+    backoff_delay = HttpTransport.backoff_delay
+
+    def record(self, attempt, retry_after=None):
+        delays.append(backoff_delay(self, attempt, retry_after))
+        return 0
+    monkeypatch.setattr(HttpTransport, 'backoff_delay', record)
+    return delays
+
+
+def make_api(server, **kwargs) -> APIManager:
+    kwargs.setdefault('backoff_base', 0.05)
+    return APIManager(base_url=server.url, transport=HttpTransport(**kwargs))
+
+
+def test_retries_5xx_with_backoff(server, sleeps):
+    api = make_api(server, max_retries=3)
+    server.inject_faults(2, 503)
+    assert api.get_user_data()['code'] == 404  # 服务端尚无数据，HTTP 200
+    assert server.request_count == 3
+    assert len(sleeps) == 2
+    # full jitter：第 n 次重试前等待 [0, base * 2^n]
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= 0.05 * 2 ** attempt
+
+
+def test_gives_up_after_max_retries(server, sleeps):
+    api = make_api(server, max_retries=2)
+    server.inject_faults(5, 502)
+    with pytest.raises(APIRequestError) as info:
+        api.get_user_data()
+    assert info.value.status_code == 502
+    assert server.request_count == 3
+    assert len(sleeps) == 2
+
+
+def test_retries_connection_reset(server, sleeps):
+    api = make_api(server, max_retries=3)
+    server.inject_faults(1, RESET)
+    assert api.get_user_data()['code'] == 404
+    assert server.request_count == 2
+    assert len(sleeps) == 1
+
+
+def test_post_not_retried_after_connection_reset(server, sleeps):
+    api = make_api(server, max_retries=3)
+    server.inject_faults(1, RESET)
+    with pytest.raises(APIRequestError) as info:
+        api.push_user_changes(0, [], [])
+    assert info.value.status_code is None
+    assert server.request_count == 1
+    assert sleeps == []
+
+
+def test_read_timeout_retried_then_raised(server, sleeps):
+    api = make_api(server, max_retries=1, read_timeout=0.1)
+    server.delay = 0.5
+    with pytest.raises(APIRequestError) as info:
+        api.get_user_data()
+    assert info.value.status_code is None
+    assert server.request_count == 2
+    assert len(sleeps) == 1
+
+
+def test_post_read_timeout_not_retried(server, sleeps):
+    api = make_api(server, max_retries=3, read_timeout=0.1)
+    server.delay = 0.5
+    with pytest.raises(APIRequestError):
+        api.push_user_changes(0, [], [])
+    assert server.request_count == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize('status', [400, 401, 404, 409])
+def test_4xx_not_retried(server, sleeps, status):
+    api = make_api(server, max_retries=3)
+    server.inject_faults(1, status)
+    with pytest.raises(APIRequestError) as info:
+        api.get_user_data()
+    assert info.value.status_code == status
+    assert server.request_count == 1
+    assert sleeps == []
+
+
+def test_gzip_only_after_server_advertises(server):
+    api = make_api(server)
+    data = {'scripts_data': generate(300)}
+    assert not api.gzip_uploads
+    api.save_user_data(data)
+    assert server.gzip_requests == 0
+    # 第一次响应带 Accept-Encoding: gzip，之后的上传才压缩
+    assert api.gzip_uploads
+    api.save_user_data(data)
+    assert server.gzip_requests == 1
+    # 小请求体不压缩
+    api.push_user_changes(0, [], [])
+    assert server.gzip_requests == 1
+
+
+def test_no_gzip_when_server_does_not_advertise(server):
+    server.accept_gzip = False
+    api = make_api(server)
+    data = {'scripts_data': generate(300)}
+    for _ in range(2):
+        assert api.save_user_data(data)['code'] == 200
+    assert not api.gzip_uploads
+    assert server.gzip_requests == 0
+
+
+def test_compress_uploads_forced(server):
+    api = APIManager(base_url=server.url, transport=HttpTransport(), compress_uploads=True)
+    api.save_user_data({'scripts_data': generate(300)})
+    assert server.gzip_requests == 1
+    api = APIManager(base_url=server.url, transport=HttpTransport(), compress_uploads=False)
+    api.get_user_data()
+    api.save_user_data({'scripts_data': generate(300)})
+    assert server.gzip_requests == 1
@@ -0,0 +1,188 @@
+"""SyncEngine 对参考服务端的增量拉取/上传、304、整库回退与版本快进"""
+import pytest
+
+import utils.constants as constants
+import utils.sync_protocol as sync_protocol
+from benchmarks.bench_import_export import use_data_dir
+from utils.api_manager import APIManager
+from utils.data_adapter import DataAdapter
+from utils.sync_engine import SyncEngine
+
+USER_ID = 1
+
+
+@pytest.fixture
+def make_client(tmp_path, server, monkeypatch):
+    """make_client(name) 返回一台“电脑”的 SyncEngine（各自的数据目录，同一云端用户）"""
+    # use_data_dir 会改写 constants 的路径：先原样登记，测试结束时由 monkeypatch 还原
+    for name in dir(constants):
+        if name.endswith('_abs_path'):
+            monkeypatch.setattr(constants, name, getattr(constants, name))
+
+    def make(name: str) -> SyncEngine:
+        root = tmp_path / name
+        root.mkdir()
+        use_data_dir(str(root))
+        engine = SyncEngine(DataAdapter(), APIManager(base_url=server.url))
+        engine.bind_user(USER_ID)
+        return engine
+    return make
+
+
+def entities(engine: SyncEngine):
+    return sync_protocol.flatten_tree(engine.data_adapter.scripts_data)
+
+
+def seed(engine: SyncEngine):
+    """新建一个类型、一级/二级分类与两条话术，返回二级分类ID"""
+    adapter = engine.data_adapter
+    type_id = adapter.add_type('售前')
+    assert adapter.add_level_one(type_id, '问候')
+    level_one_id = adapter.get_level_one_list(type_id)[-1]['id']
+    assert adapter.add_level_two(level_one_id, '开场')
+    level_two_id = adapter.get_level_two_list(type_id, level_one_id)[-1]['id']
+    assert adapter.add_script(level_two_id, '你好', '亲，在的')
+    assert adapter.add_script(level_two_id, '稍等', '请稍等')
+    return level_two_id
+
+
+def remote_entities(server):
+    return sync_protocol.flatten_tree(server.users[USER_ID]['scripts_data'])
+
+
+def test_pull_not_modified_uses_if_none_match(server, make_client):
+    a, b = make_client('a'), make_client('b')
+    seed(a)
+    assert a.push()
+    assert b.pull()
+    assert entities(b) == entities(a)
+
+    count = server.request_count
+    # 云端无变化：一次 304 往返，不返回数据
+    assert b.fetch_remote_changes() is None
+    assert server.request_count == count + 1
+    assert not b.pull()
+
+
+def test_delta_push_then_pull_round_trip(server, make_client):
+    a, b = make_client('a'), make_client('b')
+    level_two_id = seed(a)
+    assert a.push()
+    assert b.pull()
+
+    pushed = []
+    push_user_changes = a.api_manager.push_user_changes
+
+    def record(base_rev, changes, deleted, user_id, full):
+        pushed.append((changes, deleted, full))
+        return push_user_changes(base_rev, changes, deleted, user_id, full)
+    a.api_manager.push_user_changes = record
+
+    adapter = a.data_adapter
+    scripts = [script for script in adapter.all_script_data_list if script['levelTwoId'] == level_two_id]
+    assert adapter.edit_script(scripts[0]['id'], '你好呀', '亲，在的~')
+    assert adapter.delete_script(scripts[1]['id'])
+    assert adapter.add_script(level_two_id, '再见', '欢迎下次光临')
+    assert a.push()
+
+    # 只上传了变化的实体与删除
+    (changes, deleted, full), = pushed
+    assert not full
+    assert {e['kind'] for e in changes} == {'script'}
+    assert len(changes) == 2
+    assert deleted == [sync_protocol.entity_key('script', scripts[1]['id'])]
+    assert remote_entities(server) == entities(a)
+
+    result = b.fetch_remote_changes()
+    assert result is not None and not result['full']
+    assert b.apply_remote_changes(result)
+    assert entities(b) == entities(a)
+    assert b.state['rev'] == a.state['rev'] == server.users[USER_ID]['rev']
+
+
+def test_falls_back_to_whole_library_on_404(server, make_client):
+    server.delta_api = False
+    a, b = make_client('a'), make_client('b')
+    level_two_id = seed(a)
+    assert a.push()
+    assert not a.delta_supported and not a.chunked_supported
+    assert remote_entities(server) == entities(a)
+
+    assert b.pull()
+    assert not b.delta_supported
+    assert entities(b) == entities(a)
+
+    assert a.data_adapter.add_script(level_two_id, '再见', '欢迎下次光临')
+    assert a.push()
+    assert remote_entities(server) == entities(a)
+    assert b.pull()
+    assert entities(b) == entities(a)
+
+
+def test_fallback_snapshot_taken_in_main_thread(server, make_client):
+    a = make_client('a')
+    level_two_id = seed(a)
+    assert a.push()
+    # 上传准备好之后后端才回退为旧版：整库上传需要的树经 run_in_main 读取
+    assert a.data_adapter.add_script(level_two_id, '再见', '欢迎下次光临')
+    payload = a.prepare_push()
+    assert not payload['complete']
+    server.delta_api = False
+    calls = []
+
+    def run_in_main(fn):
+        calls.append(fn)
+        return fn()
+    response = a.send_push(payload, run_in_main=run_in_main)
+    assert len(calls) == 1
+    assert a.commit_push(payload, response)
+    assert remote_entities(server) == entities(a)
+
+
+def test_commit_push_fast_forwards_only_without_concurrent_changes(server, make_client):
+    a, b = make_client('a'), make_client('b')
+    level_two_id = seed(a)
+    assert a.push()
+    assert b.pull()
+
+    assert a.data_adapter.add_script(level_two_id, 'A1', 'a')
+    assert a.push()
+    # 云端只有自己的修改：直接快进，下一次拉取为 304
+    assert a.state['rev'] == server.users[USER_ID]['rev']
+    assert a.fetch_remote_changes() is None
+
+    stale_rev = b.state['rev']
+    assert b.data_adapter.add_script(level_two_id, 'B1', 'b')
+    assert b.push()
+    # 上传期间云端已有 A 的修改：不快进，下一次拉取补齐
+    assert b.state['rev'] == stale_rev
+    assert b.pull()
+    assert b.state['rev'] == server.users[USER_ID]['rev']
+    assert entities(b) == remote_entities(server)
+
+
+def test_duplicate_ids_from_remote_repaired_with_subtree(server, make_client):
+    # 旧版客户端按秒生成ID：两个一级分类ID相同，各有自己的二级分类与话术
+    tree = [{'id': 1, 'name': '售前', 'data': [
+        {'id': 10, 'name': '问候', 'data': [{'id': 100, 'name': '开场', 'data': [
+            {'id': 1000, 'title': '你好', 'content': '亲，在的', 'bgColor': ''}]}]},
+        {'id': 10, 'name': '催付', 'data': [{'id': 101, 'name': '提醒', 'data': [
+            {'id': 1001, 'title': '付款', 'content': '记得付款哦', 'bgColor': ''}]}]},
+    ]}]
+    server.delta_api = False
+    with server.lock:
+        server.replace_tree(server.user(USER_ID), tree)
+    b = make_client('b')
+    assert b.pull()
+
+    level_ones = b.data_adapter.scripts_data[0]['data']
+    assert level_ones[0]['id'] == 10 and level_ones[1]['id'] != 10
+    # 换了ID的一级分类连同子树都待上传（子节点的上级ID变了）
+    pending = b.data_adapter.collect_changes(b.state['pushed_seq'])[1]
+    assert {(e['kind'], e['id']) for e in pending} == {
+        ('level_one', level_ones[1]['id']), ('level_two', 101), ('script', 1001)}
+
+    assert b.push()
+    remote = remote_entities(server)
+    assert remote == entities(b)
+    assert remote['level_two:101']['parent'] == level_ones[1]['id']
@@ -0,0 +1,454 @@
+"""
+本地参考服务端 - 模拟云端 API，供联调、验证与基准测试使用（仅标准库）
+
+用法:
+    python -m tools.reference_server --port 8000
+
+代码中使用:
+    server = ReferenceServer()
+    server.start()
+    api = APIManager(base_url=server.url)
+    ...
+    server.stop()
+"""
+import argparse
+import gzip
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.sync_protocol as sync_protocol
+
+
+# inject_faults 的特殊状态：断开连接而不回应
+RESET = 0
+# 旧版后端只有的接口（delta_api=False 时其余接口返回 404）
+LEGACY_HANDLERS = frozenset({'handle_login', 'handle_logout', 'handle_get_data', 'handle_put_data'})
+
+
+class ReferenceHandler(BaseHTTPRequestHandler):
+    """请求处理：路由表 (方法, 正则) -> 处理函数"""
+
+    protocol_version = "HTTP/1.1"
+    # 头部与正文分两次写出，关闭 Nagle 避免与延迟 ACK 叠加出 40ms 级别的假延迟
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        ('POST', re.compile(r'^/api/auth/login$'), 'handle_login'),
+        ('POST', re.compile(r'^/api/auth/logout$'), 'handle_logout'),
+        ('GET', re.compile(r'^/api/user/(\d+)/data$'), 'handle_get_data'),
+        ('PUT', re.compile(r'^/api/user/(\d+)/data$'), 'handle_put_data'),
+        ('GET', re.compile(r'^/api/user/(\d+)/changes$'), 'handle_get_changes'),
+        ('POST', re.compile(r'^/api/user/(\d+)/changes$'), 'handle_post_changes'),
+        ('GET', re.compile(r'^/api/user/(\d+)/snapshot/manifest$'), 'handle_get_manifest'),
+        ('GET', re.compile(r'^/api/user/(\d+)/snapshot/(\d+)/chunks/([\w.\-]+)$'), 'handle_get_chunk'),
+        ('POST', re.compile(r'^/api/user/(\d+)/uploads$'), 'handle_create_upload'),
+        ('GET', re.compile(r'^/api/user/(\d+)/uploads/(\w+)$'), 'handle_get_upload'),
+        ('PUT', re.compile(r'^/api/user/(\d+)/uploads/(\w+)/chunks/([\w.\-]+)$'), 'handle_put_chunk'),
+        ('POST', re.compile(r'^/api/user/(\d+)/uploads/(\w+)/commit$'), 'handle_commit_upload'),
+    ]
+
+    @property
+    def reference(self) -> "ReferenceServer":
+        return self.server.reference
+
+    def log_message(self, format, *args):
+        if self.reference.verbose:
+            super().log_message(format, *args)
+
+    # ==================== 请求/响应编解码 ====================
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.headers.get('Content-Encoding') == 'gzip':
+            self.reference.gzip_requests += 1
+            body = gzip.decompress(body)
+        return body
+
+    def read_json(self) -> Any:
+        body = self.read_body()
+        return json.loads(body.decode('utf-8')) if body else None
+
+    def send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_bytes(status, body, 'application/json; charset=utf-8', headers)
+
+    def send_bytes(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None,
+                   compress: bool = True):
+        accept = self.headers.get('Accept-Encoding') or ''
+        gzipped = compress and 'gzip' in accept and len(body) >= 1024
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        # 声明接受 gzip 请求体（RFC 7694），客户端据此开启上传压缩
+        if self.reference.accept_gzip:
+            self.send_header('Accept-Encoding', 'gzip')
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.reference.bytes_sent += len(body)
+
+    # ==================== 分发 ====================
+
+    def dispatch(self):
+        ref = self.reference
+        ref.request_count += 1
+        path = self.path.split('?', 1)[0]
+        if ref.delay:
+            time.sleep(ref.delay)
+        fault = ref.take_fault()
+        if fault == RESET:
+            # 不回应，直接以 RST 断开连接
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+        if fault is not None:
+            # 丢弃请求体，返回注入的错误状态码
+            self.read_body()
+            self.send_json(fault, {'code': fault, 'message': 'injected fault'})
+            return
+        if self.headers.get('Content-Encoding') == 'gzip' and not ref.accept_gzip:
+            self.read_body()
+            self.send_json(415, {'code': 415, 'message': 'unsupported content encoding'})
+            return
+        for method, pattern, name in self.ROUTES:
+            if method != self.command or (not ref.delta_api and name not in LEGACY_HANDLERS):
+                continue
+            m = pattern.match(path)
+            if m:
+                getattr(self, name)(*m.groups())
+                return
+        # 读掉请求体，否则残留在长连接上被当作下一个请求
+        self.read_body()
+        self.send_json(404, {'code': 404, 'message': 'not found'})
+
+    do_GET = do_POST = do_PUT = do_DELETE = dispatch
+
+    # ==================== 接口实现 ====================
+
+    def handle_login(self):
+        body = self.read_json() or {}
+        username = body.get('username') or ''
+        if not username or not body.get('password'):
+            self.send_json(200, {'success': False, 'message': '用户名或密码错误'})
+            return
+        user_id = self.reference.user_id_for(username)
+        self.send_json(200, {'success': True, 'user_id': user_id, 'token': f'token-{user_id}'})
+
+    def handle_logout(self):
+        self.read_body()
+        self.send_json(200, {'success': True})
+
+    def query(self) -> Dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+
+    def handle_get_data(self, uid: str):
+        ref = self.reference
+        with ref.lock:
+            user = ref.users.get(int(uid))
+            if not user or user.get('scripts_data') is None:
+                self.send_json(200, {'code': 404, 'message': 'no data'})
+                return
+            body = {'code': 200, 'user_id': int(uid), 'rev': user['rev'], 'scripts_data': user['scripts_data']}
+            etag = ref.etag(int(uid))
+        self.send_json(200, body, {'ETag': etag})
+
+    def handle_put_data(self, uid: str):
+        body = self.read_json() or {}
+        data = body.get('data') or {}
+        ref = self.reference
+        with ref.lock:
+            user = ref.user(int(uid))
+            if 'scripts_data' in data:
+                ref.replace_tree(user, data['scripts_data'] or [])
+            if 'config_data' in data:
+                user['config_data'] = data['config_data']
+        self.send_json(200, {'code': 200, 'message': 'saved', 'rev': user['rev']})
+
+    def handle_get_changes(self, uid: str):
+        ref = self.reference
+        since = int(self.query().get('since') or 0)
+        with ref.lock:
+            user = ref.users.get(int(uid))
+            if not user or user.get('scripts_data') is None:
+                self.send_json(200, {'code': 404, 'message': 'no data'})
+                return
+            etag = ref.etag(int(uid))
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            entities = sync_protocol.flatten_tree(user['scripts_data'])
+            if since <= 0 or since < user['history_start']:
+                body = {'code': 200, 'rev': user['rev'], 'full': True,
+                        'changes': list(entities.values()), 'deleted': []}
+            else:
+                revs = user['revs']
+                body = {'code': 200, 'rev': user['rev'], 'full': False,
+                        'changes': [e for k, e in entities.items() if revs.get(k, 0) > since],
+                        'deleted': [k for k, r in user['tombstones'].items() if r > since]}
+        self.send_json(200, body, {'ETag': etag})
+
+    def handle_post_changes(self, uid: str):
+        body = self.read_json() or {}
+        ref = self.reference
+        with ref.lock:
+            user = ref.user(int(uid))
+            previous = user['rev']
+            if body.get('full'):
+                ref.replace_tree(user, sync_protocol.build_tree(body.get('changes') or []))
+            else:
+                ref.apply_changes(user, body.get('changes') or [], body.get('deleted') or [])
+            result = {'code': 200, 'rev': user['rev'], 'previous_rev': previous, 'etag': ref.etag(int(uid))}
+        self.send_json(200, result, {'ETag': result['etag']})
+
+    # ==================== 分块传输 ====================
+
+    def handle_get_manifest(self, uid: str):
+        ref = self.reference
+        with ref.lock:
+            user = ref.users.get(int(uid))
+            if not user or user.get('scripts_data') is None:
+                self.send_json(200, {'code': 404, 'message': 'no data'})
+                return
+            snapshot = ref.snapshot(user)
+            body = {'code': 200, 'rev': user['rev'], 'chunks': snapshot['manifest']}
+            etag = ref.etag(int(uid))
+        self.send_json(200, body, {'ETag': etag})
+
+    def handle_get_chunk(self, uid: str, rev: str, chunk_id: str):
+        ref = self.reference
+        with ref.lock:
+            user = ref.users.get(int(uid)) or {}
+            snapshot = (user.get('snapshots') or {}).get(int(rev))
+            data = snapshot['chunks'].get(chunk_id) if snapshot else None
+        if data is None:
+            # 快照已过期（云端版本已变化）或块不存在
+            self.send_json(410, {'code': 410, 'message': 'snapshot expired'})
+            return
+        m = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if m:
+            start = int(m.group(1))
+            if start >= len(data):
+                self.send_json(416, {'code': 416, 'message': 'range not satisfiable'})
+                return
+            # 续传：返回剩余字节（不压缩，保证偏移量与原始字节一致）
+            self.send_bytes(206, data[start:], 'application/json',
+                            {'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'}, compress=False)
+            return
+        self.send_bytes(200, data, 'application/json', {'Accept-Ranges': 'bytes'})
+
+    def handle_create_upload(self, uid: str):
+        body = self.read_json() or {}
+        manifest = body.get('chunks') or []
+        result = self.reference.create_upload(int(uid), manifest)
+        self.send_json(200, {'code': 200, **result})
+
+    def handle_get_upload(self, uid: str, upload_id: str):
+        upload = self.reference.uploads.get(upload_id)
+        if not upload or upload['uid'] != int(uid):
+            self.send_json(404, {'code': 404, 'message': 'upload not found'})
+            return
+        self.send_json(200, {'code': 200, 'upload_id': upload_id, 'received': sorted(upload['chunks'])})
+
+    def handle_put_chunk(self, uid: str, upload_id: str, chunk_id: str):
+        data = self.read_body()
+        ref = self.reference
+        with ref.lock:
+            upload = ref.uploads.get(upload_id)
+            expected = upload['manifest'].get(chunk_id) if upload and upload['uid'] == int(uid) else None
+            if expected is None:
+                self.send_json(404, {'code': 404, 'message': 'unknown chunk'})
+                return
+            if sync_protocol.chunk_digest(data) != expected['sha256']:
+                self.send_json(422, {'code': 422, 'message': 'checksum mismatch'})
+                return
+            upload['chunks'][chunk_id] = data
+        self.send_json(200, {'code': 200, 'chunk': chunk_id})
+
+    def handle_commit_upload(self, uid: str, upload_id: str):
+        self.read_body()
+        ref = self.reference
+        with ref.lock:
+            upload = ref.uploads.get(upload_id)
+            if not upload or upload['uid'] != int(uid):
+                self.send_json(404, {'code': 404, 'message': 'upload not found'})
+                return
+            missing = [c for c in upload['manifest'] if c not in upload['chunks']]
+            if missing:
+                self.send_json(409, {'code': 409, 'message': 'missing chunks', 'missing': missing})
+                return
+            entities = []
+            for chunk_id in upload['manifest']:
+                entities.extend(sync_protocol.parse_chunk(upload['chunks'][chunk_id]))
+            user = ref.user(int(uid))
+            previous = user['rev']
+            ref.replace_tree(user, sync_protocol.build_tree(entities))
+            del ref.uploads[upload_id]
+            result = {'code': 200, 'rev': user['rev'], 'previous_rev': previous, 'etag': ref.etag(int(uid))}
+        self.send_json(200, result, {'ETag': result['etag']})
+
+
+class ReferenceServer:
+    """内存中的参考服务端，可在后台线程运行"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, verbose: bool = False):
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        # user_id -> {'scripts_data': [...], 'config_data': {...}, 'rev': 版本,
+        #             'revs': {实体键: 最后修改版本}, 'tombstones': {实体键: 删除版本}, 'history_start': 版本}
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self._usernames: Dict[str, int] = {}
+        # 分块上传会话：upload_id -> {'uid', 'digest', 'manifest': {块ID: {...}}, 'chunks': {块ID: bytes}}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.chunk_bytes = sync_protocol.DEFAULT_CHUNK_BYTES
+        # 故障注入：每次请求前的延迟（秒）、接下来 N 次请求返回的状态码（RESET 为断开连接）
+        self.delay = 0.0
+        self._faults: list = []
+        # 是否提供增量同步与分块传输接口；为 False 时模拟只有整库 GET/PUT 的旧版后端
+        self.delta_api = True
+        # 是否接受 gzip 请求体；为 False 时不声明 Accept-Encoding，收到压缩请求体返回 415
+        self.accept_gzip = True
+        # 统计
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.gzip_requests = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), ReferenceHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.reference = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/api"
+
+    def user_id_for(self, username: str) -> int:
+        with self.lock:
+            if username not in self._usernames:
+                self._usernames[username] = len(self._usernames) + 1
+            return self._usernames[username]
+
+    # ==================== 版本管理（调用方持有 self.lock） ====================
+
+    def user(self, uid: int) -> Dict[str, Any]:
+        return self.users.setdefault(uid, {'scripts_data': None, 'rev': 0, 'revs': {}, 'tombstones': {},
+                                           'history_start': 0})
+
+    def etag(self, uid: int) -> str:
+        return f'"{uid}-{self.users[uid]["rev"]}"'
+
+    def replace_tree(self, user: Dict[str, Any], tree: list):
+        """整库替换：所有实体记为新版本，消失的实体记为删除"""
+        user['rev'] += 1
+        old_keys = set(sync_protocol.flatten_tree(user['scripts_data'] or []))
+        user['scripts_data'] = tree
+        new_keys = set(sync_protocol.flatten_tree(tree))
+        user['revs'] = {k: user['rev'] for k in new_keys}
+        for key in old_keys - new_keys:
+            user['tombstones'][key] = user['rev']
+        for key in new_keys:
+            user['tombstones'].pop(key, None)
+
+    def apply_changes(self, user: Dict[str, Any], changes: list, deleted: list):
+        user['rev'] += 1
+        if user['scripts_data'] is None:
+            user['scripts_data'] = []
+        sync_protocol.apply_changes(user['scripts_data'], changes, deleted)
+        for entity in changes:
+            key = sync_protocol.entity_key(entity['kind'], entity['id'])
+            user['revs'][key] = user['rev']
+            user['tombstones'].pop(key, None)
+        if deleted:
+            alive = sync_protocol.flatten_tree(user['scripts_data'])
+            for key in list(user['revs']):
+                if key not in alive:
+                    user['revs'].pop(key)
+                    user['tombstones'][key] = user['rev']
+
+    def snapshot(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """当前版本的分块快照（按版本缓存，只保留最近两个版本）"""
+        snapshots = user.setdefault('snapshots', {})
+        snapshot = snapshots.get(user['rev'])
+        if snapshot is None:
+            chunks = sync_protocol.build_chunks(user['scripts_data'] or [], self.chunk_bytes)
+            snapshot = {'manifest': sync_protocol.build_manifest(chunks), 'chunks': dict(chunks)}
+            snapshots[user['rev']] = snapshot
+            for rev in sorted(snapshots)[:-2]:
+                del snapshots[rev]
+        return snapshot
+
+    def create_upload(self, uid: int, manifest: list) -> Dict[str, Any]:
+        """创建分块上传；相同清单的未完成上传直接复用（续传）"""
+        digest = sync_protocol.manifest_digest(manifest)
+        with self.lock:
+            for upload_id, upload in self.uploads.items():
+                if upload['uid'] == uid and upload['digest'] == digest:
+                    return {'upload_id': upload_id, 'received': sorted(upload['chunks'])}
+            upload_id = f"{uid}x{len(self.uploads) + 1}x{digest[:12]}"
+            self.uploads[upload_id] = {'uid': uid, 'digest': digest,
+                                       'manifest': {c['id']: c for c in manifest}, 'chunks': {}}
+            return {'upload_id': upload_id, 'received': []}
+
+    def inject_faults(self, count: int, status: int = 503):
+        """接下来 count 次请求直接返回 status（RESET 为断开连接）"""
+        with self.lock:
+            self._faults.extend([status] * count)
+
+    def take_fault(self) -> Optional[int]:
+        with self.lock:
+            return self._faults.pop(0) if self._faults else None
+
+    def start(self) -> "ReferenceServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='reference-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='秒回 本地参考服务端')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    server = ReferenceServer(args.host, args.port, verbose=True)
+    print(f"参考服务端已启动: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,33 @@
+import gzip
+import logging
 import requests
 import json
 from typing import Dict, List, Optional, Any
+from utils.http_transport import HttpTransport
+import utils.metrics as metrics
+
+logger = logging.getLogger(__name__)
+
+
+class APIRequestError(Exception):
+    """API 请求失败（status_code 为 HTTP 状态码，网络错误时为 None）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class APIManager:
     """简化的API管理类 - 以用户数据为中心的粗粒度操作"""
     
-    def __init__(self, base_url: str = "http://localhost:8000/api"):
+    def __init__(self, base_url: str = "http://localhost:8000/api", transport: Optional[HttpTransport] = None,
+                 compress_uploads: Optional[bool] = None):
         self.base_url = base_url
-        self.session = requests.Session()
+        # 传输层：超时、重试退避、连接池、gzip
+        self.transport = transport or HttpTransport()
+        self.session = self.transport.session
+        # 上传话术数据时是否 gzip 压缩请求体；None 表示服务端声明支持（响应头 Accept-Encoding: gzip）后才压缩
+        self.compress_uploads = compress_uploads
         self.user_id = 0  # 为登录功能预留
         
         # 设置默认headers
@@ -22,19 +42,23 @@ class APIManager:
         if token:
             self.session.headers.update({'Authorization': f'Bearer {token}'})
     
-    def _make_request(self, method: str, url: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    @property
+    def gzip_uploads(self) -> bool:
+        """当前上传是否 gzip 压缩请求体"""
+        if self.compress_uploads is None:
+            return self.transport.server_accepts_gzip
+        return self.compress_uploads
+
+    def _make_request(self, method: str, url: str, data: Optional[Dict[str, Any]] = None,
+                      compress: bool = False, timeout=None) -> Dict[str, Any]:
         """统一的请求处理方法"""
         url = f"{self.base_url}/{url.lstrip('/')}"
         
         try:
             if method.upper() == 'GET':
-                response = self.session.get(url, params=data)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, json=data)
-            elif method.upper() == 'PUT':
-                response = self.session.put(url, json=data)
-            elif method.upper() == 'DELETE':
-                response = self.session.delete(url, json=data)
+                response = self.transport.request('GET', url, params=data, timeout=timeout)
+            elif method.upper() in ('POST', 'PUT', 'DELETE'):
+                response = self.transport.request(method, url, json_data=data, compress=compress, timeout=timeout)
             else:
                 raise ValueError(f"不支持的HTTP方法: {method}")
             
@@ -42,10 +66,12 @@ class APIManager:
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API请求失败: {str(e)}")
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            raise APIRequestError(f"API请求失败: {str(e)}", status)
     
     # ==================== 核心数据操作（粗粒度） ====================
     
+    @metrics.timed('api.get_user_data')
     def get_user_data(self, user_id: int = 0) -> Dict[str, Any]:
         """获取用户完整数据
         
@@ -73,6 +99,7 @@ class APIManager:
         result = self._make_request('GET', f'/user/{uid}/data')
         return result
     
+    @metrics.timed('api.save_user_data')
     def save_user_data(self, data: Dict[str, Any], user_id: int = 0) -> Dict[str, Any]:
         """保存用户完整数据
         
@@ -84,12 +111,123 @@ class APIManager:
             'user_id': uid,
             'data': data
         }
-        result = self._make_request('PUT', f'/user/{uid}/data', request_data)
+        result = self._make_request('PUT', f'/user/{uid}/data', request_data, compress=self.gzip_uploads)
         return result
 
+    # ==================== 增量同步 ====================
+
+    @metrics.timed('api.get_user_changes')
+    def get_user_changes(self, since_rev: int = 0, etag: Optional[str] = None,
+                         user_id: int = 0) -> Optional[Dict[str, Any]]:
+        """拉取 since_rev 之后的变更；携带 If-None-Match，云端无变化（304）时返回 None
+
+        返回格式:
+        {
+            "code": 200,
+            "rev": 12,                 # 云端当前版本
+            "full": false,             # true 表示 changes 为完整快照
+            "changes": [实体, ...],     # 见 utils/sync_protocol.py
+            "deleted": ["script:3", ...],
+            "etag": "\"1-12\""
+        }
+        """
+        uid = user_id or self.user_id
+        url = f"{self.base_url}/user/{uid}/changes"
+        headers = {'If-None-Match': etag} if etag else None
+        try:
+            response = self.transport.request('GET', url, params={'since': since_rev}, headers=headers)
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            result = response.json()
+            result['etag'] = response.headers.get('ETag')
+            return result
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            raise APIRequestError(f"API请求失败: {str(e)}", status)
+
+    @metrics.timed('api.push_user_changes')
+    def push_user_changes(self, base_rev: int, changes: List[Dict[str, Any]], deleted: List[str],
+                          user_id: int = 0, full: bool = False) -> Dict[str, Any]:
+        """上传本地变更（full=True 时 changes 为完整快照，云端以其替换整库）
+
+        返回格式: {"code": 200, "rev": 13, "previous_rev": 12, "etag": "\"1-13\""}
+        previous_rev 与 base_rev 不一致说明期间有其他端的变更，需要再拉取一次
+        """
+        uid = user_id or self.user_id
+        request_data = {
+            'base_rev': base_rev,
+            'changes': changes,
+            'deleted': deleted,
+            'full': full
+        }
+        return self._make_request('POST', f'/user/{uid}/changes', request_data, compress=self.gzip_uploads)
+
+    # ==================== 分块传输（大话术库） ====================
+
+    @metrics.timed('api.get_snapshot_manifest')
+    def get_snapshot_manifest(self, user_id: int = 0) -> Dict[str, Any]:
+        """获取云端当前版本的分块清单
+
+        返回格式: {"code": 200, "rev": 12, "chunks": [{"id": "l1-3", "sha256": "...", "size": 1024}, ...]}
+        """
+        uid = user_id or self.user_id
+        return self._make_request('GET', f'/user/{uid}/snapshot/manifest')
+
+    @metrics.timed('api.open_snapshot_chunk')
+    def open_snapshot_chunk(self, rev: int, chunk_id: str, offset: int = 0,
+                            user_id: int = 0) -> requests.Response:
+        """以流式响应打开一个分块；offset > 0 时通过 Range 从断点继续（调用方负责关闭响应）"""
+        uid = user_id or self.user_id
+        url = f"{self.base_url}/user/{uid}/snapshot/{rev}/chunks/{chunk_id}"
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        try:
+            response = self.transport.request('GET', url, headers=headers, stream=True)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            raise APIRequestError(f"API请求失败: {str(e)}", status)
+
+    @metrics.timed('api.create_upload')
+    def create_upload(self, manifest: List[Dict[str, Any]], user_id: int = 0) -> Dict[str, Any]:
+        """创建分块上传；返回 {"upload_id": "...", "received": [已收到的块ID]}"""
+        uid = user_id or self.user_id
+        return self._make_request('POST', f'/user/{uid}/uploads', {'chunks': manifest})
+
+    @metrics.timed('api.get_upload')
+    def get_upload(self, upload_id: str, user_id: int = 0) -> Dict[str, Any]:
+        """查询分块上传进度（续传）"""
+        uid = user_id or self.user_id
+        return self._make_request('GET', f'/user/{uid}/uploads/{upload_id}')
+
+    @metrics.timed('api.upload_chunk')
+    def upload_chunk(self, upload_id: str, chunk_id: str, data: bytes, user_id: int = 0) -> Dict[str, Any]:
+        """上传一个分块（gzip 压缩，云端按清单中的 sha256 校验）"""
+        uid = user_id or self.user_id
+        url = f"{self.base_url}/user/{uid}/uploads/{upload_id}/chunks/{chunk_id}"
+        body, headers = data, {'Content-Type': 'application/json'}
+        if self.gzip_uploads and len(data) >= self.transport.compress_min_bytes:
+            body = gzip.compress(data, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        try:
+            response = self.transport.request('PUT', url, data=body, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            raise APIRequestError(f"API请求失败: {str(e)}", status)
+
+    @metrics.timed('api.commit_upload')
+    def commit_upload(self, upload_id: str, user_id: int = 0) -> Dict[str, Any]:
+        """全部分块上传完成后提交，云端以其替换整库；返回格式同 push_user_changes"""
+        uid = user_id or self.user_id
+        return self._make_request('POST', f'/user/{uid}/uploads/{upload_id}/commit')
+
     
     # ==================== 用户管理（为登录功能预留） ====================
     
+    @metrics.timed('api.login')
     def login(self, username: str, password: str) -> Dict[str, Any]:
         """用户登录"""
         request_data = {
@@ -106,6 +244,7 @@ class APIManager:
         
         return result
     
+    @metrics.timed('api.logout')
     def logout(self) -> Dict[str, Any]:
         """用户登出"""
         result = self._make_request('POST', '/auth/logout')
@@ -117,6 +256,7 @@ class APIManager:
     
     # ==================== 文件导入导出（格式转换） ====================
     
+    @metrics.timed('api.upload_and_convert_file')
     def upload_and_convert_file(self, file_path: str, user_id: int = 0) -> Optional[Dict[str, Any]]:
         """上传文件并转换为JSON格式
         
@@ -137,15 +277,9 @@ class APIManager:
                 files = {'file': f}
                 data = {'user_id': uid}
                 
-                # 临时移除Content-Type header让requests自动设置multipart
-                original_headers = dict(self.session.headers)
-                if 'Content-Type' in self.session.headers:
-                    del self.session.headers['Content-Type']
-                
-                response = self.session.post(url, files=files, data=data)
-                
-                # 恢复原始headers
-                self.session.headers.update(original_headers)
+                # 去掉默认的 JSON Content-Type，让 requests 自动设置 multipart
+                response = self.transport.request('POST', url, files=files, data=data,
+                                                  headers={'Content-Type': None})
                 
                 response.raise_for_status()
                 result = response.json()
@@ -153,16 +287,17 @@ class APIManager:
                 if result.get('success'):
                     return result.get('data')
                 else:
-                    print(f"文件转换失败: {result.get('message', '未知错误')}")
+                    logger.warning(f"文件转换失败: {result.get('message', '未知错误')}")
                     return None
                     
         except requests.exceptions.RequestException as e:
-            print(f"文件上传失败: {str(e)}")
+            logger.warning(f"文件上传失败: {str(e)}")
             return None
         except Exception as e:
-            print(f"文件处理失败: {str(e)}")
+            logger.warning(f"文件处理失败: {str(e)}")
             return None
     
+    @metrics.timed('api.export_and_convert_data')
     def export_and_convert_data(self, data: Dict[str, Any], file_path: str, 
                                file_format: str = "json", user_id: int = 0) -> bool:
         """导出数据并转换为指定格式
@@ -186,7 +321,8 @@ class APIManager:
                 'format': file_format.lower()
             }
             
-            response = self.session.post(f"{self.base_url}/file/export-convert", json=request_data)
+            response = self.transport.request('POST', f"{self.base_url}/file/export-convert",
+                                              json_data=request_data, compress=self.gzip_uploads)
             response.raise_for_status()
             
             # 如果返回的是文件内容，直接保存
@@ -200,22 +336,22 @@ class APIManager:
                 if result.get('success'):
                     # 如果有文件URL，下载文件
                     if 'file_url' in result:
-                        download_response = self.session.get(result['file_url'])
+                        download_response = self.transport.request('GET', result['file_url'])
                         download_response.raise_for_status()
                         with open(file_path, 'wb') as f:
                             f.write(download_response.content)
                         return True
                     else:
-                        print(f"导出失败: {result.get('message', '未知错误')}")
+                        logger.warning(f"导出失败: {result.get('message', '未知错误')}")
                         return False
                 else:
-                    print(f"导出失败: {result.get('message', '未知错误')}")
+                    logger.warning(f"导出失败: {result.get('message', '未知错误')}")
                     return False
                     
         except requests.exceptions.RequestException as e:
-            print(f"文件导出失败: {str(e)}")
+            logger.warning(f"文件导出失败: {str(e)}")
             return False
         except Exception as e:
-            print(f"文件处理失败: {str(e)}")
+            logger.warning(f"文件处理失败: {str(e)}")
             return False
     
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+后台任务执行器 - 网络请求等耗时操作放到 QThreadPool 中执行，结果回到主线程处理
+同一 key 的任务在执行中再次提交时合并为一次（只追加回调），支持进度上报与取消。
+
+用法:
+    def fetch(ctx):
+        ctx.progress(-1, "正在下载...")
+        data = api.get_user_data(uid)
+        ctx.check()            # 已取消时抛出 JobCancelled
+        return data
+
+    runner.submit('download', fetch, on_success=apply, on_error=show_error, label="下载数据")
+
+需要修改主线程数据（如 DataAdapter）的步骤用 ctx.call_in_main(fn) 交给主线程执行，工作线程等待其结果。
+"""
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """任务已取消（任务函数中调用 ctx.check() 时抛出）"""
+
+
+class _Job:
+    """一次提交的任务；同 key 合并后的回调都挂在同一个任务上"""
+
+    def __init__(self, key: str, fn: Callable[["JobContext"], Any], label: str):
+        self.key = key
+        self.fn = fn
+        self.label = label
+        self.callbacks: List[Tuple[Optional[Callable], Optional[Callable]]] = []
+        self.cancel_event = threading.Event()
+
+
+class _MainCall:
+    """工作线程交给主线程执行的一次调用"""
+
+    def __init__(self, job: _Job, fn: Callable[[], Any]):
+        self.job = job
+        self.fn = fn
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.finished = threading.Event()
+
+
+class JobContext:
+    """传给任务函数的上下文：查询取消状态、上报进度（可在工作线程调用）"""
+
+    def __init__(self, runner: "JobRunner", job: _Job):
+        self._runner = runner
+        self._job = job
+
+    @property
+    def key(self) -> str:
+        return self._job.key
+
+    def cancelled(self) -> bool:
+        return self._job.cancel_event.is_set()
+
+    def check(self):
+        """已取消时抛出 JobCancelled，供任务函数在各步骤之间调用"""
+        if self._job.cancel_event.is_set():
+            raise JobCancelled(self._job.key)
+
+    def progress(self, percent: int, message: str = ""):
+        """上报进度：percent 为 0~100，-1 表示进度未知"""
+        if not self._job.cancel_event.is_set():
+            self._runner._job_progress.emit(self._job, int(percent), message)
+
+    def call_in_main(self, fn: Callable[[], Any]) -> Any:
+        """在主线程执行 fn 并等待其返回（fn 抛出的异常在这里重新抛出）；等待期间任务被取消时抛出 JobCancelled"""
+        self.check()
+        call = _MainCall(self._job, fn)
+        self._runner._main_call.emit(call)
+        while not call.finished.wait(0.1):
+            # 已交给主线程但尚未开始的调用会被跳过；退出时主线程在 shutdown() 中等待本线程结束
+            self.check()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class _JobRunnable(QRunnable):
+    """在线程池中执行任务函数，通过信号把结果送回主线程"""
+
+    def __init__(self, runner: "JobRunner", job: _Job):
+        super().__init__()
+        self.setAutoDelete(True)
+        self._runner = runner
+        self._job = job
+
+    def run(self):
+        job = self._job
+        status, payload = 'done', None
+        try:
+            payload = job.fn(JobContext(self._runner, job))
+        except JobCancelled:
+            status = 'cancelled'
+        except Exception as e:
+            status, payload = 'error', e
+        if job.cancel_event.is_set():
+            status = 'cancelled'
+        try:
+            self._runner._job_done.emit(job, status, payload)
+        except RuntimeError:
+            # 退出时执行器可能已销毁
+            pass
+
+
+class JobRunner(QObject):
+    """后台任务执行器（在主线程创建；回调与信号均在主线程触发）"""
+
+    job_started = Signal(str, str)  # key, 描述
+    job_progress = Signal(str, int, str)  # key, 百分比(-1 表示未知), 提示文字
+    job_finished = Signal(str, str)  # key, 状态: done / error / cancelled
+
+    # 工作线程 -> 主线程（跨线程自动排队）
+    _job_progress = Signal(object, int, str)
+    _job_done = Signal(object, str, object)
+    _main_call = Signal(object)
+
+    def __init__(self, parent=None, max_threads: int = 2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # 执行中的任务：key -> 任务
+        self._jobs: Dict[str, _Job] = {}
+        # 可选的卡顿监测（utils/stall_watchdog.py）：回调执行期间标记为正在执行的操作
+        self.stall_watchdog = None
+        self._job_progress.connect(self._on_job_progress)
+        self._job_done.connect(self._on_job_done)
+        self._main_call.connect(self._on_main_call)
+
+    def submit(self, key: str, fn: Callable[[JobContext], Any],
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               label: str = "") -> bool:
+        """提交任务；同 key 任务执行中时只追加回调，返回 False"""
+        job = self._jobs.get(key)
+        if job is not None:
+            job.callbacks.append((on_success, on_error))
+            logger.debug(f"任务 {key} 执行中，已合并重复请求")
+            return False
+        job = _Job(key, fn, label or key)
+        job.callbacks.append((on_success, on_error))
+        self._jobs[key] = job
+        self.job_started.emit(key, job.label)
+        self.pool.start(_JobRunnable(self, job))
+        return True
+
+    def is_running(self, key: str) -> bool:
+        return key in self._jobs
+
+    def running_keys(self) -> List[str]:
+        return list(self._jobs)
+
+    def label(self, key: str) -> str:
+        job = self._jobs.get(key)
+        return job.label if job else ""
+
+    def cancel(self, key: str) -> bool:
+        """取消任务：立即释放 key 并丢弃其结果（正在进行的网络请求受超时约束自然结束）"""
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        self.job_finished.emit(key, 'cancelled')
+        return True
+
+    def cancel_all(self):
+        for key in list(self._jobs):
+            self.cancel(key)
+
+    def shutdown(self, wait_ms: int = 3000):
+        """退出前取消全部任务并等待工作线程结束"""
+        self.cancel_all()
+        self.pool.waitForDone(wait_ms)
+
+    # ==================== 主线程回调 ====================
+
+    @Slot(object, int, str)
+    def _on_job_progress(self, job: _Job, percent: int, message: str):
+        if self._jobs.get(job.key) is job:
+            self.job_progress.emit(job.key, percent, message)
+
+    @Slot(object)
+    def _on_main_call(self, call: _MainCall):
+        if call.job.cancel_event.is_set() or self._jobs.get(call.job.key) is not call.job:
+            # 任务已取消：不再修改数据，工作线程在 check() 中结束
+            call.error = JobCancelled(call.job.key)
+            call.finished.set()
+            return
+        watchdog = self.stall_watchdog
+        try:
+            with watchdog.action(f"任务:{call.job.key}") if watchdog else nullcontext():
+                call.result = call.fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            call.finished.set()
+
+    @Slot(object, str, object)
+    def _on_job_done(self, job: _Job, status: str, payload: Any):
+        # 已取消（或被同 key 的新任务替换）的结果直接丢弃
+        if self._jobs.get(job.key) is not job:
+            return
+        del self._jobs[job.key]
+        if status == 'cancelled':
+            self.job_finished.emit(job.key, status)
+            return
+        watchdog = self.stall_watchdog
+        with watchdog.action(f"任务回调:{job.key}") if watchdog else nullcontext():
+            for on_success, on_error in job.callbacks:
+                try:
+                    if status == 'done' and on_success:
+                        on_success(payload)
+                    elif status == 'error':
+                        if on_error:
+                            on_error(payload)
+                        else:
+                            logger.warning(f"任务 {job.key} 失败: {payload}")
+                except Exception as e:
+                    logger.exception(f"任务 {job.key} 回调执行失败: {e}")
+        self.job_finished.emit(job.key, status)
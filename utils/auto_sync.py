@@ -0,0 +1,288 @@
+"""
+自动同步服务 - 监听 DataAdapter 的本地增删改，合并为批次写入磁盘发件箱，后台定时上传
+网络不可用时发件箱保留在 data/sync_outbox.json 中，按指数退避重试；启动/登录时只拉取云端增量。
+
+一次同步周期：发件箱入队 -> 拉取云端变更 -> 逐批上传。
+本地还有未上传的修改时，拉取结果与本地做三方合并（utils/merge_engine.py），
+存在冲突时发出 conflicts_found，由界面选择后调用 complete_merge；上传的是合并后的结果。
+"""
+import json
+import logging
+import os
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import utils.constants as constants
+from utils.async_jobs import JobRunner
+from utils.data_adapter import json_file_lock
+from utils.merge_engine import MergeResult
+from utils.sync_engine import SyncEngine
+
+logger = logging.getLogger(__name__)
+
+# 任务 key（与 JobRunner 的合并机制配合，同一时间每类最多一个请求）
+PUSH_JOB = 'sync_push'
+PULL_JOB = 'sync'
+
+
+class AutoSyncService(QObject):
+    """后台自动同步（主线程对象，网络请求经 JobRunner 在工作线程执行）"""
+
+    status_changed = Signal(str)  # 同步状态文字
+    remote_applied = Signal()  # 云端变更已应用到本地，界面需刷新
+    conflicts_found = Signal(object)  # MergeResult：需要用户处理的冲突
+
+    def __init__(self, engine: SyncEngine, job_runner: JobRunner, parent=None,
+                 debounce_ms: int = 2000, min_backoff_s: float = 5.0, max_backoff_s: float = 300.0,
+                 pull_interval_ms: int = 5 * 60 * 1000):
+        super().__init__(parent)
+        self.engine = engine
+        self.job_runner = job_runner
+        self.outbox_file = constants.sync_outbox_abs_path
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.enabled = False
+        # 发件箱：待上传批次（prepare_push 的结果），按序上传
+        self.outbox: List[Dict[str, Any]] = []
+        # 连续失败次数（决定退避时长）
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        # 发件箱清空/上传失败时通知（手动“上传数据”使用）
+        self._flush_callbacks: List[Callable[[bool, str], None]] = []
+        # 等待用户处理冲突的合并结果；用户暂不处理时暂停自动同步，直到手动同步
+        self.pending_merge: Optional[MergeResult] = None
+        self.conflicts_deferred = False
+
+        # 本地修改防抖：连续编辑合并为一个批次
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self.auto_sync)
+
+        # 失败后的退避重试
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.auto_sync)
+
+        # 定时拉取云端变更
+        self._pull_timer = QTimer(self)
+        self._pull_timer.setInterval(pull_interval_ms)
+        self._pull_timer.timeout.connect(self.auto_sync)
+
+        self.load_outbox()
+
+    # ==================== 发件箱持久化 ====================
+
+    def load_outbox(self):
+        if not os.path.exists(self.outbox_file):
+            return
+        try:
+            with open(self.outbox_file, 'r', encoding='utf-8') as f:
+                self.outbox = list(json.load(f).get('batches', []))
+        except Exception as e:
+            logger.warning(f"加载同步发件箱失败: {e}")
+
+    def save_outbox(self) -> bool:
+        try:
+            with json_file_lock:
+                with open(self.outbox_file, 'w', encoding='utf-8') as f:
+                    json.dump({'batches': self.outbox}, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            logger.warning(f"保存同步发件箱失败: {e}")
+            return False
+
+    def pending_count(self) -> int:
+        """发件箱中待上传的实体数（含删除）"""
+        return sum(len(b.get('changes', [])) + len(b.get('deleted', [])) for b in self.outbox)
+
+    def has_local_changes(self) -> bool:
+        """是否存在尚未上传的本地修改（发件箱或尚未入队的变更）"""
+        queued_seq = self.outbox[-1]['seq'] if self.outbox else self.engine.state.get('pushed_seq', 0)
+        return bool(self.outbox) or self.engine.data_adapter.change_seq > queued_seq
+
+    def discard_pending(self):
+        """丢弃全部未上传的本地修改（以云端完整快照覆盖本地后调用）"""
+        self._debounce_timer.stop()
+        self.outbox = []
+        self.save_outbox()
+
+    # ==================== 启停 ====================
+
+    def set_enabled(self, enabled: bool):
+        """登录后启用（立即执行一次同步周期），登出后停用"""
+        self.enabled = enabled
+        if enabled:
+            self.failures = 0
+            self.conflicts_deferred = False
+            self._pull_timer.start()
+            self.sync_now()
+        else:
+            self._debounce_timer.stop()
+            self._retry_timer.stop()
+            self._pull_timer.stop()
+            self.job_runner.cancel(PUSH_JOB)
+            self.job_runner.cancel(PULL_JOB)
+            self.pending_merge = None
+            self._finish_flush(False, "已停止同步")
+
+    def on_local_change(self, kind: str, entity_id: int, deleted: bool):
+        """DataAdapter 本地变更回调：重新计时，停止编辑后再入队上传"""
+        if self.enabled:
+            self._debounce_timer.start()
+
+    # ==================== 同步周期 ====================
+
+    def enqueue(self) -> bool:
+        """把尚未入队的本地变更打包为一个批次写入发件箱；返回是否新增批次"""
+        since = self.outbox[-1]['seq'] if self.outbox else self.engine.state.get('pushed_seq', 0)
+        payload = self.engine.prepare_push(since)
+        if payload is None:
+            return False
+        self.outbox.append(payload)
+        self.save_outbox()
+        return True
+
+    def auto_sync(self):
+        """定时/防抖触发的同步；存在待处理或被暂缓的冲突时跳过"""
+        if self.pending_merge is not None or self.conflicts_deferred:
+            return
+        self.sync_now()
+
+    def sync_now(self, on_flushed: Optional[Callable[[bool, str], None]] = None):
+        """立即执行一次同步周期；on_flushed(成功, 提示) 在发件箱清空或上传失败时调用"""
+        if on_flushed:
+            self._flush_callbacks.append(on_flushed)
+        if not self.enabled:
+            self._finish_flush(False, "未登录，无法同步")
+            return
+        if self.pending_merge is not None:
+            # 冲突仍待处理：再次提示
+            self.conflicts_found.emit(self.pending_merge)
+            return
+        self.conflicts_deferred = False
+        self._debounce_timer.stop()
+        self._retry_timer.stop()
+        self.enqueue()
+        self.pull()
+
+    def pull(self):
+        """拉取云端增量；本地有未上传修改时与之三方合并，然后上传发件箱"""
+        engine = self.engine
+
+        def fetch(ctx):
+            ctx.progress(-1, "正在检查云端变更...")
+            return engine.fetch_remote_changes(progress=ctx.progress, check=ctx.check)
+
+        def apply(result):
+            self.failures = 0
+            self.last_error = None
+            if result is None or result.get('code', 200) != 200:
+                # 云端无变化（304）或暂无数据
+                self.flush_or_finish()
+                return
+            if not self.has_local_changes():
+                if engine.apply_remote_changes(result):
+                    logger.info("云端数据同步成功")
+                    self.remote_applied.emit()
+                self.status_changed.emit("已同步")
+                self.flush_or_finish()
+                return
+            merge = engine.merge_remote_changes(result)
+            logger.info(f"合并云端变更: {merge.stats}")
+            if merge.conflicts:
+                self.pending_merge = merge
+                self.status_changed.emit(f"存在 {len(merge.conflicts)} 处冲突待处理")
+                self.conflicts_found.emit(merge)
+            else:
+                self.complete_merge(merge)
+
+        self.job_runner.submit(PULL_JOB, fetch, apply, lambda e: self._on_failure(str(e)), "同步云端数据")
+
+    def complete_merge(self, merge: MergeResult):
+        """冲突处理完毕（或无冲突）：写入合并结果并上传合并后的差异"""
+        self.pending_merge = None
+        if merge.context.get('local_seq') != self.engine.data_adapter.change_seq:
+            # 处理冲突期间本地又有修改，合并结果已过期，重新同步
+            self.sync_now()
+            return
+        # 旧批次基于合并前的本地数据，由合并结果与云端的差异替代
+        self.discard_pending()
+        self.engine.apply_merge(merge)
+        self.remote_applied.emit()
+        self.enqueue()
+        self.flush_or_finish()
+
+    def defer_conflicts(self):
+        """用户暂不处理冲突：保留本地数据，暂停自动同步直到下一次手动同步"""
+        self.pending_merge = None
+        self.conflicts_deferred = True
+        self.status_changed.emit("存在未处理的冲突，请手动同步")
+        self._finish_flush(False, "存在未处理的冲突")
+
+    def flush_or_finish(self):
+        if self.outbox:
+            self.flush()
+        else:
+            self._finish_flush(True, "")
+
+    def flush(self):
+        """上传发件箱中的第一个批次；成功后继续下一批"""
+        if not self.outbox or self.job_runner.is_running(PUSH_JOB):
+            return
+        batch = self.outbox[0]
+        # 基准版本取发送时的云端版本（批次可能在离线期间入队）
+        batch['base_rev'] = self.engine.state.get('rev', 0)
+        engine = self.engine
+        self.status_changed.emit(f"正在同步 {self.pending_count()} 项修改")
+
+        def send(ctx):
+            ctx.progress(-1, f"正在上传 {len(batch.get('changes', [])) + len(batch.get('deleted', []))} 项修改...")
+            return engine.send_push(batch, ctx.progress, ctx.check, ctx.call_in_main)
+
+        def done(response):
+            if not engine.commit_push(batch, response):
+                self._on_failure(response.get('message') or "云端拒绝了本次上传")
+                return
+            if self.outbox and self.outbox[0] is batch:
+                self.outbox.pop(0)
+                self.save_outbox()
+            self.failures = 0
+            self.last_error = None
+            if self.outbox:
+                self.flush()
+                return
+            self._finish_flush(True, "")
+            self.status_changed.emit("已同步")
+            if response.get('previous_rev') not in (None, batch['base_rev']):
+                # 上传期间其他端也有修改，稍后拉取
+                self._debounce_timer.start()
+
+        self.job_runner.submit(PUSH_JOB, send, done, lambda e: self._on_failure(str(e)), "自动同步")
+
+    # ==================== 失败退避 ====================
+
+    def backoff_delay(self) -> float:
+        """第 failures 次失败后的等待时间（秒），带 50% 抖动"""
+        delay = min(self.max_backoff_s, self.min_backoff_s * (2 ** max(0, self.failures - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _on_failure(self, message: str):
+        self.failures += 1
+        self.last_error = message
+        delay = self.backoff_delay()
+        logger.warning(f"自动同步失败（第{self.failures}次），{delay:.0f}秒后重试: {message}")
+        self.status_changed.emit(f"离线，{self.pending_count()} 项修改待同步")
+        self._finish_flush(False, message)
+        if self.enabled:
+            self._retry_timer.start(int(delay * 1000))
+
+    def _finish_flush(self, success: bool, message: str):
+        callbacks, self._flush_callbacks = self._flush_callbacks, []
+        for callback in callbacks:
+            try:
+                callback(success, message)
+            except Exception as e:
+                logger.exception(f"同步回调执行失败: {e}")
@@ -0,0 +1,199 @@
+"""
+分块传输 - 大话术库的整库上传/下载按块进行，逐块校验 sha256，中断后从断点继续
+
+下载：获取清单 -> 逐块流式写入 data/transfer/ 下的临时文件（已有部分文件时用 Range 续传）
+      -> 校验通过后逐块解析并并入话术树（sync_protocol.TreeBuilder），并入后即丢弃该块的实体；
+      已完成的块记录在 data/transfer_state.json，重启后跳过。
+上传：逐块编码生成清单（只保留摘要）-> 创建上传（相同清单的未完成上传由云端复用）
+      -> 再次逐块编码，只上传云端缺少的块 -> 提交。
+单块默认不超过 256KB：除最终的树之外，同时只有一块的内容在内存中。
+"""
+import json
+import logging
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional
+
+import utils.constants as constants
+import utils.sync_protocol as sync_protocol
+from utils.api_manager import APIManager, APIRequestError
+from utils.data_adapter import json_file_lock
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, str], None]
+CancelCheck = Callable[[], None]
+
+# 流式读取的缓冲大小
+STREAM_BYTES = 64 * 1024
+
+
+class ChecksumError(Exception):
+    """分块内容与清单中的 sha256 不一致"""
+
+
+class ChunkedTransfer:
+    """整库分块上传/下载（可在后台线程调用）"""
+
+    def __init__(self, api_manager: APIManager, max_chunk_bytes: int = sync_protocol.DEFAULT_CHUNK_BYTES):
+        self.api_manager = api_manager
+        self.max_chunk_bytes = max_chunk_bytes
+        self.state_file = constants.transfer_state_abs_path
+        self.work_dir = constants.transfer_dir_abs_path
+        # 'download': {'uid', 'rev', 'done': [块ID]}；'upload': {'uid', 'digest', 'upload_id'}
+        self.state: Dict[str, Any] = {}
+        self.load_state()
+
+    # ==================== 断点状态 ====================
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except Exception as e:
+            logger.warning(f"加载传输状态失败: {e}")
+            self.state = {}
+
+    def save_state(self):
+        try:
+            with json_file_lock:
+                with open(self.state_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.state, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"保存传输状态失败: {e}")
+
+    def _chunk_path(self, chunk_id: str) -> str:
+        return os.path.join(self.work_dir, f"{chunk_id}.part")
+
+    def clear_download(self):
+        """丢弃下载断点与临时文件"""
+        self.state.pop('download', None)
+        self.save_state()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # ==================== 下载 ====================
+
+    def download_snapshot(self, user_id: int, progress: Optional[ProgressCallback] = None,
+                          check: Optional[CancelCheck] = None) -> Optional[Dict[str, Any]]:
+        """分块下载云端整库；返回完整快照（'tree' 为已构建的话术树，changes 为空），云端无数据返回 None"""
+        manifest_resp = self.api_manager.get_snapshot_manifest(user_id)
+        if manifest_resp.get('code') != 200:
+            return None
+        rev = manifest_resp.get('rev', 0)
+        manifest = manifest_resp.get('chunks') or []
+
+        resume = self.state.get('download') or {}
+        if resume.get('uid') != user_id or resume.get('rev') != rev:
+            # 云端版本变化后旧的断点作废
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            resume = {'uid': user_id, 'rev': rev, 'done': []}
+        os.makedirs(self.work_dir, exist_ok=True)
+        done = set(resume['done'])
+        self.state['download'] = resume
+        self.save_state()
+
+        total = sum(c.get('size', 0) for c in manifest) or 1
+        finished = sum(c.get('size', 0) for c in manifest if c['id'] in done)
+        for chunk in manifest:
+            if check:
+                check()
+            if chunk['id'] in done and self._verify_file(chunk):
+                continue
+            self._download_chunk(user_id, rev, chunk, check)
+            done.add(chunk['id'])
+            resume['done'] = sorted(done)
+            self.save_state()
+            finished += chunk.get('size', 0)
+            if progress:
+                progress(int(finished * 100 / total), f"正在下载 {len(done)}/{len(manifest)} 块...")
+
+        builder = sync_protocol.TreeBuilder()
+        for chunk in manifest:
+            if check:
+                check()
+            with open(self._chunk_path(chunk['id']), 'rb') as f:
+                builder.add(sync_protocol.parse_chunk(f.read()))
+        if builder.dropped:
+            logger.warning(f"快照中有 {builder.dropped} 个实体缺少上级节点，已丢弃")
+        self.clear_download()
+        return {'code': 200, 'rev': rev, 'full': True, 'tree': builder.tree, 'changes': [], 'deleted': [],
+                'etag': f'"{user_id}-{rev}"'}
+
+    def _verify_file(self, chunk: Dict[str, Any]) -> bool:
+        path = self._chunk_path(chunk['id'])
+        if not os.path.exists(path) or os.path.getsize(path) != chunk.get('size'):
+            return False
+        with open(path, 'rb') as f:
+            return sync_protocol.chunk_digest(f.read()) == chunk['sha256']
+
+    def _download_chunk(self, user_id: int, rev: int, chunk: Dict[str, Any], check: Optional[CancelCheck]):
+        """流式下载单块到临时文件；已有部分内容时从断点续传，最后校验 sha256"""
+        path = self._chunk_path(chunk['id'])
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        if offset >= chunk.get('size', 0):
+            offset = 0
+        response = self.api_manager.open_snapshot_chunk(rev, chunk['id'], offset, user_id)
+        try:
+            if offset and response.status_code != 206:
+                # 云端不支持 Range，从头下载
+                offset = 0
+            with open(path, 'ab' if offset else 'wb') as f:
+                for block in response.iter_content(STREAM_BYTES):
+                    if check:
+                        check()
+                    f.write(block)
+        finally:
+            response.close()
+        if not self._verify_file(chunk):
+            os.remove(path)
+            raise ChecksumError(f"分块 {chunk['id']} 校验失败")
+
+    # ==================== 上传 ====================
+
+    def upload_snapshot(self, user_id: int, entities: List[Dict[str, Any]],
+                        progress: Optional[ProgressCallback] = None,
+                        check: Optional[CancelCheck] = None) -> Dict[str, Any]:
+        """分块上传整库（entities 为完整快照的实体列表），返回提交结果"""
+        def chunks():
+            # 每次遍历重新编码，同时只有一块在内存中
+            return sync_protocol.iter_entity_chunks(entities, self.max_chunk_bytes)
+        manifest = sync_protocol.build_manifest(chunks())
+        digest = sync_protocol.manifest_digest(manifest)
+
+        upload = self.state.get('upload') or {}
+        received: List[str] = []
+        upload_id = None
+        if upload.get('uid') == user_id and upload.get('digest') == digest:
+            try:
+                upload_id = upload['upload_id']
+                received = self.api_manager.get_upload(upload_id, user_id).get('received') or []
+            except APIRequestError as e:
+                if e.status_code != 404:
+                    raise
+                upload_id = None
+        if upload_id is None:
+            created = self.api_manager.create_upload(manifest, user_id)
+            upload_id = created['upload_id']
+            received = created.get('received') or []
+            self.state['upload'] = {'uid': user_id, 'digest': digest, 'upload_id': upload_id}
+            self.save_state()
+
+        received_set = set(received)
+        total = sum(c['size'] for c in manifest) or 1
+        sent = sum(c['size'] for c in manifest if c['id'] in received_set)
+        for (chunk_id, data), info in zip(chunks(), manifest):
+            if chunk_id in received_set:
+                continue
+            if check:
+                check()
+            self.api_manager.upload_chunk(upload_id, chunk_id, data, user_id)
+            sent += info['size']
+            if progress:
+                progress(int(sent * 100 / total), f"正在上传 {chunk_id}...")
+
+        result = self.api_manager.commit_upload(upload_id, user_id)
+        self.state.pop('upload', None)
+        self.save_state()
+        return result
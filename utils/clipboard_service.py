@@ -0,0 +1,135 @@
+"""
+剪贴板服务 - 三种发送模式统一的剪贴板通道
+基于 Qt 剪贴板（不经过 pyperclip 的子进程后端），发送前保存用户原有剪贴板内容，粘贴完成后恢复。
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+from PySide6.QtCore import QMimeData, QTimer
+from PySide6.QtGui import QGuiApplication
+
+logger = logging.getLogger(__name__)
+
+
+class ClipboardService:
+    """剪贴板服务：快照/恢复原剪贴板、跳过重复写入、记录各环节耗时"""
+
+    def __init__(self, restore_delay_ms: int = 300):
+        # 粘贴是异步的（目标程序收到 Ctrl+V 后才读取剪贴板），需延迟恢复
+        self.restore_delay_ms = restore_delay_ms
+        # 最近一次由本服务写入的文本，用于跳过重复写入
+        self._last_written: Optional[str] = None
+        # 等待恢复的原剪贴板快照
+        self._pending_snapshot: Optional[QMimeData] = None
+        # 本次粘贴开始时间（统计 写入->按键 的整段耗时）
+        self._paste_start: Optional[float] = None
+
+        self._restore_timer = QTimer()
+        self._restore_timer.setSingleShot(True)
+        self._restore_timer.timeout.connect(self.restore_now)
+
+        # 耗时统计：{环节: {'count', 'total_ms', 'max_ms', 'last_ms'}}
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.skipped_writes = 0
+
+        # 退出前恢复尚未恢复的剪贴板内容
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.restore_now)
+
+    # ==================== 基础读写 ====================
+
+    def _clipboard(self):
+        return QGuiApplication.clipboard()
+
+    def _record(self, name: str, start: float) -> float:
+        """记录一次耗时（毫秒）"""
+        elapsed = (time.perf_counter() - start) * 1000
+        item = self.stats.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+        item['count'] += 1
+        item['total_ms'] += elapsed
+        item['last_ms'] = elapsed
+        if elapsed > item['max_ms']:
+            item['max_ms'] = elapsed
+        return elapsed
+
+    def snapshot(self) -> Optional[QMimeData]:
+        """复制当前剪贴板的全部格式（文本、图片、文件等）"""
+        start = time.perf_counter()
+        try:
+            source = self._clipboard().mimeData()
+            if source is None:
+                return None
+            copied = QMimeData()
+            for fmt in source.formats():
+                copied.setData(fmt, source.data(fmt))
+            return copied
+        except Exception as e:
+            logger.warning(f"保存剪贴板内容失败: {e}")
+            return None
+        finally:
+            self._record('snapshot', start)
+
+    def set_text(self, text: str) -> bool:
+        """写入文本；剪贴板仍持有同一文本时跳过写入，返回是否实际写入"""
+        start = time.perf_counter()
+        clipboard = self._clipboard()
+        if self._last_written == text and clipboard.ownsClipboard():
+            self.skipped_writes += 1
+            return False
+        clipboard.setText(text)
+        self._last_written = text
+        self._record('write', start)
+        return True
+
+    # ==================== 发送模式接口 ====================
+
+    def copy_text(self, text: str) -> bool:
+        """剪贴板模式：文本需保留在剪贴板上，取消尚未执行的恢复"""
+        self._restore_timer.stop()
+        self._pending_snapshot = None
+        return self.set_text(text)
+
+    def begin_paste(self, text: str) -> bool:
+        """粘贴前调用：保存原剪贴板并写入话术"""
+        self._paste_start = time.perf_counter()
+        if self._restore_timer.isActive():
+            # 上一次粘贴的恢复尚未执行，此时剪贴板是我们写入的内容，沿用最初的快照
+            self._restore_timer.stop()
+        else:
+            self._pending_snapshot = self.snapshot()
+        return self.set_text(text)
+
+    def end_paste(self):
+        """粘贴后调用：延迟恢复原剪贴板内容"""
+        if self._paste_start is not None:
+            self._record('paste', self._paste_start)
+            self._paste_start = None
+        if self._pending_snapshot is not None:
+            self._restore_timer.start(self.restore_delay_ms)
+
+    def restore_now(self):
+        """立即恢复保存的剪贴板内容"""
+        self._restore_timer.stop()
+        snapshot = self._pending_snapshot
+        self._pending_snapshot = None
+        if snapshot is None:
+            return
+        start = time.perf_counter()
+        try:
+            # setMimeData 会接管 QMimeData 的所有权
+            self._clipboard().setMimeData(snapshot)
+            self._last_written = None
+        except Exception as e:
+            logger.warning(f"恢复剪贴板内容失败: {e}")
+        finally:
+            self._record('restore', start)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取耗时统计（含平均值）"""
+        result = {}
+        for name, item in self.stats.items():
+            avg = item['total_ms'] / item['count'] if item['count'] else 0.0
+            result[name] = dict(item, avg_ms=avg)
+        return result
@@ -0,0 +1,147 @@
+"""
+配置存储 - data/config.json 的内存副本：类型化的键、变更跟踪、防抖后的后台写入，退出时强制写入
+
+加载时以 default_config.json（以及 CONFIG_KEYS 中的默认值）为底合并一次，之后的读写都在内存中进行。
+set()/update() 只在值确实变化时记为待写入并重新开始防抖计时；计时结束后在后台线程把快照写入文件
+（先写临时文件再替换，写到一半退出不会损坏原文件）。flush() 同步写入，程序退出时调用。
+config.json 中 CONFIG_KEYS 以外的键原样保留。
+"""
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QTimer
+
+import utils.constants as constants
+import utils.utils as utils
+from utils.data_adapter import json_file_lock
+
+logger = logging.getLogger(__name__)
+
+# 键 -> (允许的类型, 默认值)；default_config.json 中的值优先于这里的默认值
+CONFIG_KEYS: Dict[str, Tuple[Tuple[type, ...], Any]] = {
+    'send_mode': ((str,), "直接发送"),
+    'always_on_top': ((bool,), False),
+    'current_user_id': ((int, str, type(None)), None),
+    'is_logged_in': ((bool,), False),
+    'dock_enabled': ((bool,), False),
+    'dock_gap': ((int,), 1),
+    'dock_position': ((str,), "right"),
+    'dock_apps': ((list,), ['全部']),
+    # 模块名 -> 日志级别（见 utils/log_setup.py）
+    'log_levels': ((dict,), {}),
+    # 性能统计开关（见 utils/metrics.py）
+    'metrics_enabled': ((bool,), False),
+    # 内存跟踪开关（见 utils/memory_tracker.py）
+    'memory_tracking': ((bool,), False),
+}
+
+
+class ConfigStore(QObject):
+    """本地配置（主线程使用；文件写入在后台线程）"""
+
+    def __init__(self, parent=None, path: Optional[str] = None, debounce_ms: int = 1000):
+        super().__init__(parent)
+        self.path = path or constants.real_config_abs_path
+        self._values: Dict[str, Any] = {}
+        # 上次写入后修改过的键
+        self._dirty: Set[str] = set()
+        # 每次修改递增；只写入比已写入版本更新的快照
+        self._version = 0
+        self._written_version = 0
+        self._io_lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._flush_async)
+        self.load()
+
+    # ==================== 读取 ====================
+
+    def load(self):
+        """默认配置 + config.json 合并为内存副本（只在启动时调用）"""
+        values = {key: copy.deepcopy(default) for key, (_, default) in CONFIG_KEYS.items()}
+        try:
+            values.update(utils.init_config_data())
+        except Exception as e:
+            logger.warning(f"读取默认配置失败: {e}")
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if isinstance(saved, dict):
+                    values.update(saved)
+            except Exception as e:
+                logger.warning(f"读取本地配置失败: {e}")
+        # 类型不符的值（旧版本或手动修改）回退到默认值
+        for key, (types, default) in CONFIG_KEYS.items():
+            if not isinstance(values.get(key), types):
+                values[key] = copy.deepcopy(default)
+        self._values = values
+        self._dirty.clear()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._values)
+
+    def pending_keys(self) -> Set[str]:
+        """尚未写入文件的键"""
+        return set(self._dirty)
+
+    # ==================== 修改 ====================
+
+    def set(self, key: str, value: Any) -> bool:
+        """修改一项配置；值未变化时不写文件。返回是否变化"""
+        return self.update({key: value})
+
+    def update(self, values: Dict[str, Any]) -> bool:
+        """批量修改；只有变化的键会被记为待写入。返回是否有变化"""
+        changed = False
+        for key, value in values.items():
+            spec = CONFIG_KEYS.get(key)
+            if spec is None:
+                raise KeyError(f"未知的配置项: {key}")
+            if not isinstance(value, spec[0]):
+                raise TypeError(f"配置项 {key} 的类型应为 {'/'.join(t.__name__ for t in spec[0])}")
+            if self._values.get(key) != value:
+                self._values[key] = copy.deepcopy(value)
+                self._dirty.add(key)
+                changed = True
+        if changed:
+            self._version += 1
+            self._timer.start()
+        return changed
+
+    # ==================== 写入 ====================
+
+    def flush(self) -> bool:
+        """立即同步写入（退出时调用）；没有未写入的修改时直接返回"""
+        self._timer.stop()
+        return self._write(copy.deepcopy(self._values), self._version)
+
+    def _flush_async(self):
+        snapshot, version = copy.deepcopy(self._values), self._version
+        threading.Thread(target=self._write, args=(snapshot, version), name='config-writer', daemon=True).start()
+
+    def _write(self, snapshot: Dict[str, Any], version: int) -> bool:
+        with self._io_lock:
+            if version <= self._written_version:
+                return True
+            try:
+                temp_path = f"{self.path}.tmp"
+                with json_file_lock:
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                    os.replace(temp_path, self.path)
+                self._written_version = version
+                if version == self._version:
+                    self._dirty.clear()
+                return True
+            except Exception as e:
+                logger.warning(f"保存配置失败: {e}")
+                return False
@@ -28,18 +28,36 @@ def get_resource_root():
 # 统一的资源根目录
 file_abs_path = get_resource_root()
 
-# 相对路径常量（保持兼容）
-default_scripts_rel_path = r"data\default_scripts.json"
-default_config_rel_path = r"data\default_config.json"
-real_scripts_rel_path = r"data\scripts.json"
-real_config_rel_path = r"data\config.json"
-index_file = r"data\index.json"
+# 相对路径常量（保持兼容；用 os.path.join 拼接，非 Windows 平台同样可用）
+default_scripts_rel_path = os.path.join("data", "default_scripts.json")
+default_config_rel_path = os.path.join("data", "default_config.json")
+real_scripts_rel_path = os.path.join("data", "scripts.json")
+real_config_rel_path = os.path.join("data", "config.json")
+change_log_file = os.path.join("data", "changes.json")
+sync_state_file = os.path.join("data", "sync_state.json")
+sync_outbox_file = os.path.join("data", "sync_outbox.json")
+sync_base_file = os.path.join("data", "sync_base.json")
+transfer_state_file = os.path.join("data", "transfer_state.json")
+transfer_dir = os.path.join("data", "transfer")
+node_id_file = os.path.join("data", "node_id")
+log_dir = os.path.join("data", "logs")
+metrics_file = os.path.join("data", "logs", "metrics.json")
+profile_dir = os.path.join("data", "profiles")
 
 # 绝对路径常量（DataAdapter/工具模块使用）
 default_scripts_abs_path = os.path.join(file_abs_path, default_scripts_rel_path)
 default_config_abs_path = os.path.join(file_abs_path, default_config_rel_path)
 real_scripts_abs_path = os.path.join(file_abs_path, real_scripts_rel_path)
 real_config_abs_path = os.path.join(file_abs_path, real_config_rel_path)
-index_abs_path = os.path.join(file_abs_path, index_file)
+change_log_abs_path = os.path.join(file_abs_path, change_log_file)
+sync_state_abs_path = os.path.join(file_abs_path, sync_state_file)
+sync_outbox_abs_path = os.path.join(file_abs_path, sync_outbox_file)
+sync_base_abs_path = os.path.join(file_abs_path, sync_base_file)
+transfer_state_abs_path = os.path.join(file_abs_path, transfer_state_file)
+transfer_dir_abs_path = os.path.join(file_abs_path, transfer_dir)
+node_id_abs_path = os.path.join(file_abs_path, node_id_file)
+log_dir_abs_path = os.path.join(file_abs_path, log_dir)
+metrics_abs_path = os.path.join(file_abs_path, metrics_file)
+profile_dir_abs_path = os.path.join(file_abs_path, profile_dir)
 
 user_id = None
\ No newline at end of file
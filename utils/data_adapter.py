@@ -1,27 +1,47 @@
 import json
 
 
+import logging
 import os
-from typing import Dict, Optional, Any, List, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Any, List, Tuple
 import threading
 from utils.api_manager import APIManager
 import utils.utils as utils
 import utils.constants as constants
+import utils.sync_protocol as sync_protocol
+import utils.metrics as metrics
+from utils.records import RECORD_TYPES, LevelOneRecord, LevelTwoRecord, ScriptRecord, TypeRecord
+
+logger = logging.getLogger(__name__)
 
 json_file_lock = threading.Lock()
 
+# 缓存的一级分类界面视图数（LRU）
+VIEW_CACHE_SIZE = 32
+# 单个批次的操作数超过此值时，四表在提交时整体重排，而不是逐个操作插入/删除记录
+FLAT_PATCH_LIMIT = 256
+
+
+class BatchError(Exception):
+    """批量操作无效或保存失败（内存中的数据已恢复到执行前）"""
+
+    def __init__(self, message: str, index: int = -1):
+        super().__init__(message)
+        # 出错操作的下标，保存失败时为 -1
+        self.index = index
+
 
 class DataAdapter:
     """数据适配器 - 用户登录后获取云端数据，获取不到则使用默认数据
     扩展：引入“四表分离 + 子集索引”的内存结构，保留树形持久化不变。
+    四表与 ById 中的记录是 utils/records.py 的轻量记录，字段直接读取树节点，不另存副本。
     """
     def __init__(self, api_manager: Optional[APIManager] = None):
         self.api_manager = api_manager
         # 使用绝对路径，确保打包态/开发态一致
         self.scripts_file = constants.real_scripts_abs_path
         self.config_file = constants.real_config_abs_path
-        # 索引缓存文件（与树保持同步）
-        self.index_file = constants.index_abs_path
         # 确保 data 目录存在
         try:
             os.makedirs(os.path.join(constants.file_abs_path, "data"), exist_ok=True)
@@ -59,6 +79,25 @@ class DataAdapter:
         self.level_one_index_list_ById: Dict[int, List[int]] = {}
         self.level_two_index_list_ById: Dict[int, List[int]] = {}
         self.script_index_list_ById: Dict[int, List[int]] = {}
+        # 批次执行期间四表是否需要在提交时整体重排
+        self._flat_dirty = False
+        # 一级分类界面视图（get_tree_scripts_data 的结果）LRU：(type_id, level_one_id) -> 视图
+        # 导入在工作线程执行批次，读写都加锁；_views_generation 每次失效递增，构建期间发生失效的视图不写入缓存
+        self._views: 'OrderedDict[Tuple[int, int], List[Dict[str, Any]]]' = OrderedDict()
+        self._views_lock = threading.Lock()
+        self._views_generation = 0
+        # 预取统计：界面取视图时命中/未命中缓存，其中命中的是预取结果的次数
+        self._prefetched: set = set()
+        self.view_stats = {'hits': 0, 'misses': 0, 'prefetched': 0, 'prefetch_hits': 0}
+
+        # 变更跟踪（增量同步）：本地每次增删改递增 change_seq，并记录实体最后一次修改/删除时的序号
+        self.change_log_file = constants.change_log_abs_path
+        self.change_seq: int = 0
+        self.entity_change_seq: Dict[str, int] = {}
+        self.deleted_change_seq: Dict[str, int] = {}
+        self.load_change_log()
+        # 本地变更监听：callback(kind, entity_id, deleted)，用于自动同步
+        self.change_listeners: List[Callable[[str, int, bool], None]] = []
 
         # 初始化数据
         self.init_data()
@@ -66,13 +105,9 @@ class DataAdapter:
     def init_data(self):
         """初始化数据"""
         self.load_user_data()
-        # 优先加载索引缓存，加速启动；失败则从树重建索引
-        loaded = self.load_index_cache()
-        if not loaded:
+        # 读取树后已重建索引（记录引用树节点，每次启动从树重建，不再保存索引缓存）
+        if not self.type_data_ById:
             self.rebuild_indexes()
-        else:
-            # 索引缓存已加载，刷新缓存以确保与当前树一致
-            self.save_index_cache()
 
     # ==================== 核心数据本地操作 ====================
 
@@ -85,12 +120,38 @@ class DataAdapter:
         if os.path.exists(self.scripts_file):
             with open(self.scripts_file, 'r', encoding='utf-8') as f:
                 self.scripts_data = json.load(f)
+            # 旧版按秒生成ID，同一秒内新增的节点ID重复，加载时修复并保存
+            if self.repair_duplicate_ids():
+                self.save_local_scripts_data()
+                return
         else:
             self.scripts_data = utils.init_scripts_data()
             self.save_local_scripts_data()
         # 每次读取后重建索引
         self.rebuild_indexes()
 
+    def repair_duplicate_ids(self) -> int:
+        """同一层级中ID重复的节点（保留第一个）重新分配ID，并记为本地修改以便同步；返回修复数量
+        换了ID的节点连同整棵子树都记为修改（子节点实体中的上级ID随之变化），上传后云端把它们挂到新节点下"""
+        seen: Dict[str, set] = {kind: set() for kind in sync_protocol.KINDS}
+        repaired = []
+        for kind, node, _, _, _ in sync_protocol.walk_tree(self.scripts_data):
+            node_id = node.get('id')
+            if node_id is None or node_id in seen[kind]:
+                node['id'] = utils.generate_id()
+                repaired.append((kind, node))
+            seen[kind].add(node['id'])
+        marked = set()
+        for kind, node in repaired:
+            for sub_kind, sub_node in self._walk_subtree(kind, node):
+                key = sync_protocol.entity_key(sub_kind, sub_node.get('id'))
+                if key not in marked:
+                    marked.add(key)
+                    self._mark_changed(sub_kind, sub_node.get('id'))
+        if repaired:
+            logger.info(f"已修复 {len(repaired)} 个重复的ID")
+        return len(repaired)
+
     def get_local_config_data(self) -> Dict[str, Any]:
         """读取本地配置数据"""
         if os.path.exists(self.config_file):
@@ -100,8 +161,9 @@ class DataAdapter:
             self.config_data = utils.init_config_data()
         return self.config_data
 
-    def save_local_scripts_data(self) -> bool:
-        """将话术保存到本地json文件"""
+    @metrics.timed('data.save_local_scripts_data')
+    def save_local_scripts_data(self, rebuild: bool = True) -> bool:
+        """将话术保存到本地json文件；rebuild=False 表示索引已增量更新，不再重建"""
         try:
             # 用户数据保存到本地文件
             with json_file_lock:
@@ -109,10 +171,12 @@ class DataAdapter:
                     json.dump(self.scripts_data, f, ensure_ascii=False, indent=2)
 
             # 保存后可按需重建索引，确保与树一致
-            self.rebuild_indexes()
+            if rebuild:
+                self.rebuild_indexes()
+            self.save_change_log()
             return True
         except Exception as e:
-            print(f"保存本地数据失败: {e}")
+            logger.warning(f"保存本地数据失败: {e}")
             return False
 
     def save_local_config_data(self, config) -> bool:
@@ -126,7 +190,7 @@ class DataAdapter:
 
             return True
         except Exception as e:
-            print(f"保存本地数据失败: {e}")
+            logger.warning(f"保存本地数据失败: {e}")
             return False
 
     # ==================== 索引构建（四表 + 子集索引） ====================
@@ -145,7 +209,12 @@ class DataAdapter:
         ]
         for attr in list:
             getattr(self, attr).clear()
+        # 记录已重建，视图全部作废
+        with self._views_lock:
+            self._views.clear()
+            self._views_generation += 1
 
+    @metrics.timed('data.build_from_tree')
     def _build_from_tree(self, tree: List[Dict[str, Any]]):
         """将树形数据打平成四表，并构建 ById 与 children 索引"""
         if not isinstance(tree, list):
@@ -154,9 +223,8 @@ class DataAdapter:
             type_id = type_data.get('id')
             if not isinstance(type_id, int):
                 continue
-            name = type_data.get('name', '')
             # type
-            type_rec = {'id': type_id, 'name': name}
+            type_rec = TypeRecord(type_data)
             self.all_type_id_list.append(type_id)
             self.all_type_data_list.append(type_rec)
             self.type_data_ById[type_id] = type_rec
@@ -166,8 +234,7 @@ class DataAdapter:
                 level_one_id = level_one_data.get('id')
                 if not isinstance(level_one_id, int):
                     continue
-                level_one_name = level_one_data.get('name', '')
-                level_one_rec = {'id': level_one_id, 'name': level_one_name, 'typeId': type_id}
+                level_one_rec = LevelOneRecord(level_one_data, type_rec)
                 self.all_level_one_data_list.append(level_one_rec)
                 self.level_one_data_ById[level_one_id] = level_one_rec
                 children_level_one_ids = self.type_children_idList_byIds.get(type_id)
@@ -180,9 +247,7 @@ class DataAdapter:
 
                 for level_two_index, level_two_data in enumerate(level_one_data.get('data', [])):
                     level_two_id = level_two_data.get('id')
-                    level_two_name = level_two_data.get('name', '')
-                    level_two_rec = {'id': level_two_id, 'name': level_two_name, 'typeId': type_id,
-                                     'levelOneId': level_one_id}
+                    level_two_rec = LevelTwoRecord(level_two_data, level_one_rec)
                     self.all_level_two_data_list.append(level_two_rec)
                     self.level_two_data_ById[level_two_id] = level_two_rec
                     children_level_two_ids = self.level_one_children_idList_byIds.get((type_id, level_one_id))
@@ -195,18 +260,7 @@ class DataAdapter:
 
                     for script_index, script in enumerate(level_two_data.get('data', [])):
                         script_id = script.get('id')
-                        script_title = script.get('title', '')
-                        bgColor = script.get('bgColor', '')
-                        script_content = script.get('content', '')
-                        script_rec = {
-                            'id': script_id,
-                            'title': script_title,
-                            'bgColor': bgColor,
-                            'content': script_content,
-                            'typeId': type_id,
-                            'levelOneId': level_one_id,
-                            'levelTwoId': level_two_id
-                        }
+                        script_rec = ScriptRecord(script, level_two_rec)
                         self.all_script_data_list.append(script_rec)
                         self.script_data_ById[script_id] = script_rec
                         children_script_ids = self.level_two_children_idList_byIds.get(
@@ -218,8 +272,6 @@ class DataAdapter:
                         children_script_ids.append(script_id)
                         self.script_index_list_ById[script_id] = [type_index, level_one_index, level_two_index,
                                                                   script_index]
-        # 同步索引缓存，确保与树一致
-        self.save_index_cache()
 
     # ==================== 便捷 getter（避免层层遍历） ====================
 
@@ -282,241 +334,717 @@ class DataAdapter:
         if script_id:
             return self.script_index_list_ById.get(script_id)
 
-    def get_tree_scripts_data(self, type_id, level_one_id) -> list:
-        """获取当前选中Tab的数据（通过索引构建 UI 所需的 title 列表）"""
+    def get_tree_scripts_data(self, type_id, level_one_id, prefetch: bool = False) -> list:
+        """获取当前选中Tab的数据（通过索引构建 UI 所需的 title 列表）
+        话术列表直接引用树中的节点列表（只读视图，不复制话术），调用方不得修改。
+        prefetch=True 表示空闲时预取，不计入命中统计"""
         if not type_id or not level_one_id:
             return []
-        # 取二级分类
-        level_two_list = self.get_level_two_list(type_id, level_one_id)
+        key = (type_id, level_one_id)
+        with self._views_lock:
+            titles = self._views.get(key)
+            if not prefetch:
+                self.view_stats['hits' if titles is not None else 'misses'] += 1
+                if key in self._prefetched:
+                    self._prefetched.discard(key)
+                    if titles is not None:
+                        self.view_stats['prefetch_hits'] += 1
+            if titles is not None:
+                self._views.move_to_end(key)
+                return titles
+            generation = self._views_generation
         titles = []
-        for level_two in level_two_list:
-            level_two_id = level_two['id']
-            # 取脚本
-            scripts_list = self.get_script_list(type_id, level_one_id, level_two_id)
-            # 组装为 UI 需要的结构
-            title_node = {
+        for level_two in self.get_level_two_list(type_id, level_one_id) or []:
+            titles.append({
                 'name': level_two['name'],
-                'id': level_two_id,
-                'data': [
-                    {
-                        'content': script['content'],
-                        'title': script.get('title', ''),
-                        'bgColor': script.get('bgColor', ''),
-                        'id': script['id']
-                    } for script in scripts_list
-                ]
-            }
-            titles.append(title_node)
-        # 更新当前二级分类缓存与返回
+                'id': level_two['id'],
+                'data': level_two.node.setdefault('data', [])
+            })
+        with self._views_lock:
+            if generation == self._views_generation:
+                self._views[key] = titles
+                while len(self._views) > VIEW_CACHE_SIZE:
+                    self._prefetched.discard(self._views.popitem(last=False)[0])
+                if prefetch:
+                    self._prefetched.add(key)
+                    self.view_stats['prefetched'] += 1
         return titles
 
-    # ==================== 索引缓存（与树保持一致） ====================
-    def save_index_cache(self) -> bool:
-        """将当前四表与 children 索引保存为缓存 index.json"""
+    def prefetch_view(self, type_id: int, level_one_id: int) -> bool:
+        """预先构建一级分类视图（空闲时调用）；已缓存或分类不存在时返回 False"""
+        with self._views_lock:
+            if (type_id, level_one_id) in self._views:
+                return False
+        rec = self.level_one_data_ById.get(level_one_id)
+        if rec is None or rec['typeId'] != type_id:
+            return False
+        self.get_tree_scripts_data(type_id, level_one_id, prefetch=True)
+        return True
+
+    @property
+    def views_generation(self) -> int:
+        """话术库数据版本：每次增删改、导入、同步或重建后递增（内存跟踪据此重置页面基线）"""
+        return self._views_generation
+
+    def _invalidate_views(self, kind: str, rec: Optional[Dict[str, Any]]):
+        """kind 节点（含其子树）变化后，丢弃受影响的一级分类视图（视图不含类型与一级分类名称）"""
+        if rec is None:
+            return
+        with self._views_lock:
+            self._views_generation += 1
+            if kind == 'type':
+                for key in [k for k in self._views if k[0] == rec['id']]:
+                    del self._views[key]
+            elif kind == 'level_one':
+                self._views.pop((rec['typeId'], rec['id']), None)
+            else:
+                self._views.pop((rec['typeId'], rec['levelOneId']), None)
+
+    # ==================== 变更跟踪（增量同步） ====================
+    def load_change_log(self):
+        """加载本地变更记录 changes.json"""
+        if not os.path.exists(self.change_log_file):
+            return
+        try:
+            with open(self.change_log_file, 'r', encoding='utf-8') as f:
+                log = json.load(f)
+            self.change_seq = int(log.get('seq', 0))
+            self.entity_change_seq = dict(log.get('entities', {}))
+            self.deleted_change_seq = dict(log.get('deleted', {}))
+        except Exception as e:
+            logger.warning(f"加载变更记录失败: {e}")
+
+    def save_change_log(self) -> bool:
+        """保存本地变更记录"""
         try:
-            children_by_type = {str(k): v[:] for k, v in self.type_children_idList_byIds.items()}
-            children_by_level_one = {f"{k[0]}:{k[1]}": v[:] for k, v in self.level_one_children_idList_byIds.items()}
-            children_by_level_two = {f"{k[0]}:{k[1]}:{k[2]}": v[:] for k, v in
-                                     self.level_two_children_idList_byIds.items()}
-            cache = {
-                "all_type_data_list": self.all_type_data_list[:],
-                "all_level_one_data_list": self.all_level_one_data_list[:],
-                "all_level_two_data_list": self.all_level_two_data_list[:],
-                "scripts": self.all_script_data_list[:],
-                "children_by_type": children_by_type,
-                "children_by_level_one": children_by_level_one,
-                "children_by_level_two": children_by_level_two
+            log = {
+                'seq': self.change_seq,
+                'entities': self.entity_change_seq,
+                'deleted': self.deleted_change_seq
             }
             with json_file_lock:
-                with open(self.index_file, 'w', encoding='utf-8') as f:
-                    json.dump(cache, f, ensure_ascii=False, indent=2)
+                with open(self.change_log_file, 'w', encoding='utf-8') as f:
+                    json.dump(log, f, ensure_ascii=False)
             return True
         except Exception as e:
-            print(f"保存索引缓存失败: {e}")
+            logger.warning(f"保存变更记录失败: {e}")
             return False
 
-    def load_index_cache(self) -> bool:
-        """加载索引缓存 index.json 到内存索引（不修改树）"""
-        if not os.path.exists(self.index_file):
-            return False
-        try:
-            with open(self.index_file, 'r', encoding='utf-8') as f:
-                cache = json.load(f)
+    def add_change_listener(self, callback: Callable[[str, int, bool], None]):
+        """注册本地变更监听（远端变更的应用不会触发）"""
+        if callback not in self.change_listeners:
+            self.change_listeners.append(callback)
 
-            # 还原四表
-            self.all_type_data_list = list(cache.get("all_type_data_list", []))
-            self.all_level_one_data_list = list(cache.get("all_level_one_data_list", []))
-            self.all_level_two_data_list = list(cache.get("all_level_two_data_list", []))
-            self.all_script_data_list = list(cache.get("scripts", []))
-            # 重建 ById
-            self.type_data_ById = {t["id"]: t for t in self.all_type_data_list if isinstance(t.get("id"), int)}
+    def remove_change_listener(self, callback: Callable[[str, int, bool], None]):
+        if callback in self.change_listeners:
+            self.change_listeners.remove(callback)
 
-            self.level_one_data_ById = {l1["id"]: l1 for l1 in self.all_level_one_data_list if
-                                        isinstance(l1.get("id"), int)}
-
-            self.level_two_data_ById = {l2["id"]: l2 for l2 in self.all_level_two_data_list if
-                                        isinstance(l2.get("id"), int)}
-
-            self.script_data_ById = {s["id"]: s for s in self.all_script_data_list if isinstance(s.get("id"), int)}
-
-            # 还原 children（反序列化字符串键）
-            self.type_children_idList_byIds = {int(k): list(v) for k, v in cache.get("children_by_type", {}).items() if
-                                               k.isdigit()}
-
-            self.level_one_children_idList_byIds = {}
-            for k, v in cache.get("children_by_level_one", {}).items():
+    def _notify_change(self, kind: str, entity_id: int, deleted: bool):
+        for callback in list(self.change_listeners):
+            try:
+                callback(kind, entity_id, deleted)
+            except Exception as e:
+                logger.exception(f"变更监听回调失败: {e}")
+
+    def _mark_changed(self, kind: str, entity_id: int, notify: bool = True):
+        self.change_seq += 1
+        key = sync_protocol.entity_key(kind, entity_id)
+        self.entity_change_seq[key] = self.change_seq
+        self.deleted_change_seq.pop(key, None)
+        if notify:
+            self._notify_change(kind, entity_id, False)
+
+    def _mark_deleted(self, kind: str, entity_id: int, notify: bool = True):
+        self.change_seq += 1
+        key = sync_protocol.entity_key(kind, entity_id)
+        self.entity_change_seq.pop(key, None)
+        self.deleted_change_seq[key] = self.change_seq
+        if notify:
+            self._notify_change(kind, entity_id, True)
+
+    def mark_entities(self, changed_keys: List[str], deleted_keys: List[str]):
+        """按实体键批量记为本地修改（合并后需要上传的差异），只保存一次变更记录"""
+        for key in deleted_keys:
+            kind, _, raw_id = key.partition(':')
+            self._mark_deleted(kind, int(raw_id))
+        for key in changed_keys:
+            kind, _, raw_id = key.partition(':')
+            self._mark_changed(kind, int(raw_id))
+        self.save_change_log()
+
+    def get_entity(self, kind: str, entity_id: int) -> Optional[Dict[str, Any]]:
+        """按索引生成单个实体（父节点ID + 位置 + 字段），不遍历树"""
+        if kind == 'type':
+            rec, index_list, parent_id = self.type_data_ById.get(entity_id), self.type_index_list_ById.get(entity_id), None
+        elif kind == 'level_one':
+            rec, index_list = self.level_one_data_ById.get(entity_id), self.level_one_index_list_ById.get(entity_id)
+            parent_id = rec.get('typeId') if rec else None
+        elif kind == 'level_two':
+            rec, index_list = self.level_two_data_ById.get(entity_id), self.level_two_index_list_ById.get(entity_id)
+            parent_id = rec.get('levelOneId') if rec else None
+        else:
+            rec, index_list = self.script_data_ById.get(entity_id), self.script_index_list_ById.get(entity_id)
+            parent_id = rec.get('levelTwoId') if rec else None
+        if not rec or not index_list:
+            return None
+        return sync_protocol.make_entity(kind, rec, parent_id, index_list[-1])
+
+    def collect_changes(self, since_seq: int = 0, full: bool = False) -> Tuple[int, List[Dict[str, Any]], List[str]]:
+        """收集 since_seq 之后的本地变更，返回 (当前序号, 变更实体列表, 删除的实体键)
+        full=True 时返回整棵树的全部实体（首次上传）"""
+        if full:
+            return self.change_seq, list(sync_protocol.flatten_tree(self.scripts_data).values()), []
+        changes = []
+        for key, seq in self.entity_change_seq.items():
+            if seq <= since_seq:
+                continue
+            kind, _, raw_id = key.partition(':')
+            try:
+                entity = self.get_entity(kind, int(raw_id))
+            except ValueError:
+                entity = None
+            if entity is not None:
+                changes.append(entity)
+        deleted = [key for key, seq in self.deleted_change_seq.items() if seq > since_seq]
+        return self.change_seq, changes, deleted
+
+    def compact_change_log(self, synced_seq: int):
+        """丢弃已同步到云端的变更记录"""
+        self.entity_change_seq = {k: v for k, v in self.entity_change_seq.items() if v > synced_seq}
+        self.deleted_change_seq = {k: v for k, v in self.deleted_change_seq.items() if v > synced_seq}
+        self.save_change_log()
+
+    def apply_remote_changes(self, changes: List[Dict[str, Any]], deleted: List[str], full: bool = False,
+                             tree: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """应用云端变更（不计入本地变更记录），保存一次并重建索引；full 时给出 tree（分块下载已构建的树）则直接使用
+        云端的树可能含旧版客户端生成的重复ID，与读取本地文件时一样修复，修复的节点记为本地修改"""
+        if full:
+            self.scripts_data = tree if tree is not None else sync_protocol.build_tree(changes)
+        else:
+            sync_protocol.apply_changes(self.scripts_data, changes, deleted)
+        self.repair_duplicate_ids()
+        return self.save_local_scripts_data()
+
+    # ==================== 批量操作（单次提交） ====================
+    @metrics.timed('data.apply_batch')
+    def apply_batch(self, operations: List[Dict[str, Any]], notify: bool = True) -> List[int]:
+        """按顺序执行一组增删改/移动/排序操作，全部成功后只保存一次
+
+        操作格式（kind 为 type / level_one / level_two / script，parent 为上级节点ID，话术类型无上级）：
+            {'op': 'add', 'kind', 'parent', 'fields': {...}, 'id'(可选，预先生成), 'pos'(可选，默认追加到末尾)}
+            {'op': 'edit', 'kind', 'id', 'fields': {...}}        # 只更新给出的字段
+            {'op': 'delete', 'kind', 'id'}                       # 连同子树一起删除
+            {'op': 'move', 'kind', 'id', 'parent', 'pos'(可选)}  # pos 为移动后在新上级中的下标，默认末尾
+            {'op': 'reorder', 'kind', 'parent', 'ids': [...]}    # ids 为该上级下全部子节点的新顺序
+        后面的操作可以引用前面新增的节点（add 时传入 id）。
+        每个操作只修正受影响的同级列表及其子树的下标与 children 索引，不重建整棵树的索引；
+        任一操作无效或保存失败时，树、索引与变更记录恢复到执行前并抛出 BatchError。
+        notify=False 时不通知变更监听（工作线程调用）。返回每个操作对应的节点ID。"""
+        undo: List[Callable[[], None]] = []
+        # 实体键 -> 是否删除（保序）；批内新增又删除的节点不再上报
+        marks: Dict[str, bool] = {}
+        added: set = set()
+        results = []
+        self._flat_dirty = len(operations) > FLAT_PATCH_LIMIT
+        try:
+            for index, operation in enumerate(operations):
                 try:
-                    t, l1 = k.split(":")
-                    self.level_one_children_idList_byIds[(int(t), int(l1))] = list(v)
-                except Exception:
-                    continue
+                    results.append(self._apply_operation(operation, undo, marks, added))
+                except (KeyError, ValueError, TypeError) as e:
+                    raise BatchError(f"第 {index + 1} 个操作无效（{operation.get('op')}）: {e}", index)
+        except BatchError:
+            self._rollback(undo)
+            raise
+        if not undo:
+            return results
+
+        # 变更记录：保存失败时恢复
+        previous_seq = self.change_seq
+        previous = {key: (self.entity_change_seq.get(key), self.deleted_change_seq.get(key)) for key in marks}
+        for key, deleted in marks.items():
+            kind, _, raw_id = key.partition(':')
+            if deleted:
+                self._mark_deleted(kind, int(raw_id), notify=False)
+            else:
+                self._mark_changed(kind, int(raw_id), notify=False)
+
+        if self._flat_dirty:
+            self._refresh_flat_lists()
+        if not self.save_local_scripts_data(rebuild=False):
+            self._rollback(undo)
+            self.change_seq = previous_seq
+            for key, (changed_seq, deleted_seq) in previous.items():
+                for table, seq in ((self.entity_change_seq, changed_seq), (self.deleted_change_seq, deleted_seq)):
+                    if seq is None:
+                        table.pop(key, None)
+                    else:
+                        table[key] = seq
+            raise BatchError("保存失败，已撤销本次修改")
+        if notify:
+            for key, deleted in marks.items():
+                kind, _, raw_id = key.partition(':')
+                self._notify_change(kind, int(raw_id), deleted)
+        return results
+
+    def _rollback(self, undo: List[Callable[[], None]]):
+        """按相反顺序撤销树上的修改，再从树重建索引"""
+        if not undo:
+            return
+        for step in reversed(undo):
+            step()
+        self.rebuild_indexes()
 
-            self.level_two_children_idList_byIds = {}
-            for k, v in cache.get("children_by_level_two", {}).items():
-                try:
-                    t, l1, l2 = k.split(":")
-                    self.level_two_children_idList_byIds[(int(t), int(l1), int(l2))] = list(v)
-                except Exception:
-                    continue
+    @staticmethod
+    def _batch_fields(kind: str, fields: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        fields = dict(fields or {})
+        unknown = [name for name in fields if name not in sync_protocol.FIELDS[kind]]
+        if unknown:
+            raise ValueError(f"未知字段 {', '.join(unknown)}")
+        for name, value in fields.items():
+            if value is None:
+                fields[name] = ''
+            elif not isinstance(value, str):
+                raise TypeError(f"字段 {name} 应为字符串")
+        return fields
+
+    def _batch_rec(self, kind: str, node_id: Any) -> Dict[str, Any]:
+        if kind not in sync_protocol.KIND_LEVEL:
+            raise ValueError(f"未知的节点类型 {kind}")
+        rec = self._rec_map(kind).get(node_id)
+        if rec is None:
+            raise ValueError(f"节点不存在: {kind} {node_id}")
+        return rec
+
+    def _batch_parent(self, kind: str, parent_id: Any) -> Optional[Dict[str, Any]]:
+        """add/move/reorder 的目标上级（话术类型为 None）"""
+        if kind not in sync_protocol.KIND_LEVEL:
+            raise ValueError(f"未知的节点类型 {kind}")
+        if kind == 'type':
+            if parent_id is not None:
+                raise ValueError("话术类型没有上级")
+            return None
+        return self._batch_rec(self._parent_kind(kind), parent_id)
+
+    def _apply_operation(self, operation: Dict[str, Any], undo: List[Callable[[], None]],
+                         marks: Dict[str, bool], added: set) -> int:
+        """在树上执行单个操作、修正受影响的索引，并记录撤销步骤"""
+        action, kind = operation.get('op'), operation.get('kind')
+
+        if action == 'add':
+            parent_rec = self._batch_parent(kind, operation.get('parent'))
+            node_id = operation.get('id') or utils.generate_id()
+            if node_id in self._rec_map(kind):
+                raise ValueError(f"ID 已存在: {node_id}")
+            node = {'id': node_id}
+            node.update({name: '' for name in sync_protocol.FIELDS[kind]})
+            node.update(self._batch_fields(kind, operation.get('fields')))
+            if kind != 'script':
+                node['data'] = []
+            siblings = self._children_of(kind, parent_rec)
+            pos = self._insert_pos(operation.get('pos'), siblings)
+            siblings.insert(pos, node)
+            self._register_subtree(kind, node, parent_rec, self._child_index(kind, parent_rec, pos))
+            self._reindex_siblings(kind, parent_rec, siblings, pos + 1)
+            self._flat_insert(kind, node)
+            self._invalidate_views(kind, self._rec_map(kind)[node_id])
+            undo.append(lambda: self._remove_node(siblings, node))
+            key = sync_protocol.entity_key(kind, node_id)
+            added.add(key)
+            marks[key] = False
+            return node_id
+
+        if action == 'reorder':
+            parent_rec = self._batch_parent(kind, operation.get('parent'))
+            siblings = self._children_of(kind, parent_rec)
+            ids = list(operation.get('ids') or [])
+            by_id = {sibling.get('id'): sibling for sibling in siblings}
+            if len(ids) != len(siblings) or set(ids) != set(by_id):
+                raise ValueError("ids 必须包含该上级下的全部子节点")
+            old = list(siblings)
+            siblings[:] = [by_id[i] for i in ids]
+            moved = [pos for pos, sibling in enumerate(siblings) if old[pos] is not sibling]
+            if not moved:
+                return operation.get('parent')
+            self._reindex_siblings(kind, parent_rec, siblings, moved[0])
+            self._flat_resort_siblings(kind, parent_rec, moved[0], moved[-1])
+            if kind in ('level_two', 'script'):
+                self._invalidate_views(kind, self._rec_map(kind)[siblings[0]['id']])
+
+            def undo_reorder():
+                siblings[:] = old
+            undo.append(undo_reorder)
+            for pos in moved:
+                marks[sync_protocol.entity_key(kind, siblings[pos].get('id'))] = False
+            return operation.get('parent')
+
+        node_id = operation.get('id')
+        rec = self._batch_rec(kind, node_id)
+        key = sync_protocol.entity_key(kind, node_id)
+        index_list = self._index_list(kind, node_id)
+        node = self._node_at(index_list)
+
+        if action == 'edit':
+            fields = self._batch_fields(kind, operation.get('fields'))
+            old = {name: node[name] for name in fields if name in node}
+            # 记录直接读取树节点，更新节点即可
+            node.update(fields)
+            if kind in ('level_two', 'script'):
+                self._invalidate_views(kind, rec)
+
+            def undo_edit():
+                for name in fields:
+                    if name in old:
+                        node[name] = old[name]
+                    else:
+                        node.pop(name, None)
+            undo.append(undo_edit)
+            marks[key] = False
+            return node_id
+
+        parent_rec = self._parent_rec(kind, rec)
+        siblings = self._children_of(kind, parent_rec)
+        pos = index_list[-1]
+
+        if action == 'delete':
+            self._invalidate_views(kind, rec)
+            del siblings[pos]
+            for sub_kind, sub_node in self._walk_subtree(kind, node):
+                marks.pop(sync_protocol.entity_key(sub_kind, sub_node.get('id')), None)
+            self._flat_remove_subtree(kind, node, index_list)
+            self._unregister_subtree(kind, node)
+            self._reindex_siblings(kind, parent_rec, siblings, pos)
+            undo.append(lambda: siblings.insert(pos, node))
+            if key not in added:
+                marks[key] = True
+            return node_id
+
+        if action == 'move':
+            target_rec = self._batch_parent(kind, operation.get('parent'))
+            self._invalidate_views(kind, rec)
+            if target_rec is parent_rec:
+                del siblings[pos]
+                new_pos = self._insert_pos(operation.get('pos'), siblings)
+                siblings.insert(new_pos, node)
+                self._reindex_siblings(kind, parent_rec, siblings, min(pos, new_pos))
+                self._flat_resort_siblings(kind, parent_rec, min(pos, new_pos), max(pos, new_pos))
+                target = siblings
+            else:
+                # 换了上级：子树中记录的上级ID与 children 键都会变化，整棵子树重新登记，四表中切出后插到新位置
+                self._flat_remove_subtree(kind, node, index_list)
+                del siblings[pos]
+                target = self._children_of(kind, target_rec)
+                new_pos = self._insert_pos(operation.get('pos'), target)
+                target.insert(new_pos, node)
+                self._unregister_subtree(kind, node)
+                self._register_subtree(kind, node, target_rec, self._child_index(kind, target_rec, new_pos))
+                self._reindex_siblings(kind, parent_rec, siblings, pos)
+                self._reindex_siblings(kind, target_rec, target, new_pos + 1)
+                self._flat_insert(kind, node)
+                self._invalidate_views(kind, self._rec_map(kind)[node_id])
+
+            def undo_move():
+                self._remove_node(target, node)
+                siblings.insert(pos, node)
+            undo.append(undo_move)
+            marks[key] = False
+            return node_id
+
+        raise ValueError(f"未知的操作 {action}")
+
+    @staticmethod
+    def _remove_node(siblings: List[Dict[str, Any]], node: Dict[str, Any]):
+        """按对象（而非内容相等）从列表中移除节点"""
+        for i, sibling in enumerate(siblings):
+            if sibling is node:
+                del siblings[i]
+                return
+
+    @staticmethod
+    def _insert_pos(pos: Optional[int], siblings: List[Dict[str, Any]]) -> int:
+        return len(siblings) if pos is None else max(0, min(int(pos), len(siblings)))
+
+    @staticmethod
+    def _walk_subtree(kind: str, node: Dict[str, Any]):
+        """遍历以 node 为根的子树，产出 (kind, 节点)"""
+        stack = [(sync_protocol.KIND_LEVEL[kind], node)]
+        while stack:
+            level, current = stack.pop()
+            yield sync_protocol.KINDS[level], current
+            if level < 3:
+                stack.extend((level + 1, child) for child in current.get('data') or [])
+
+    # ==================== 索引增量维护 ====================
+    def _rec_map(self, kind: str) -> Dict[int, Dict[str, Any]]:
+        return {
+            'type': self.type_data_ById,
+            'level_one': self.level_one_data_ById,
+            'level_two': self.level_two_data_ById,
+            'script': self.script_data_ById,
+        }[kind]
+
+    def _index_map(self, kind: str) -> Dict[int, List[int]]:
+        return {
+            'type': self.type_index_list_ById,
+            'level_one': self.level_one_index_list_ById,
+            'level_two': self.level_two_index_list_ById,
+            'script': self.script_index_list_ById,
+        }[kind]
+
+    def _index_list(self, kind: str, entity_id: Optional[int]) -> Optional[List[int]]:
+        return self._index_map(kind).get(entity_id)
+
+    def _node_at(self, index_list: List[int]) -> Dict[str, Any]:
+        node = self.scripts_data[index_list[0]]
+        for index in index_list[1:]:
+            node = node['data'][index]
+        return node
+
+    def _parent_rec(self, kind: str, rec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if kind == 'level_one':
+            return self.type_data_ById[rec['typeId']]
+        if kind == 'level_two':
+            return self.level_one_data_ById[rec['levelOneId']]
+        if kind == 'script':
+            return self.level_two_data_ById[rec['levelTwoId']]
+        return None
+
+    @staticmethod
+    def _parent_kind(kind: str) -> str:
+        return sync_protocol.KINDS[sync_protocol.KIND_LEVEL[kind] - 1]
+
+    def _child_index(self, kind: str, parent_rec: Optional[Dict[str, Any]], pos: int) -> List[int]:
+        """parent_rec 下第 pos 个 kind 节点的下标列表"""
+        if parent_rec is None:
+            return [pos]
+        return self._index_map(self._parent_kind(kind))[parent_rec['id']] + [pos]
+
+    def _children_of(self, kind: str, parent_rec: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """parent_rec 下存放 kind 节点的列表（树中的 data）；parent_rec 为 None 表示树根"""
+        if parent_rec is None:
+            return self.scripts_data
+        return self._node_at(self._index_map(self._parent_kind(kind))[parent_rec['id']]).setdefault('data', [])
+
+    def _children_entry(self, kind: str, rec: Dict[str, Any]) -> Tuple[Dict, Any]:
+        """kind 节点自身的 children 索引 (映射, 键)"""
+        if kind == 'type':
+            return self.type_children_idList_byIds, rec['id']
+        if kind == 'level_one':
+            return self.level_one_children_idList_byIds, (rec['typeId'], rec['id'])
+        return self.level_two_children_idList_byIds, (rec['typeId'], rec['levelOneId'], rec['id'])
+
+    @staticmethod
+    def _make_rec(kind: str, node: Dict[str, Any], parent_rec: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """与 _build_from_tree 相同的节点记录"""
+        return RECORD_TYPES[kind](node, parent_rec)
+
+    def _register_subtree(self, kind: str, node: Dict[str, Any], parent_rec: Optional[Dict[str, Any]],
+                          index_list: List[int]):
+        """把以 node 为根的子树写入 ById / 下标 / children 索引"""
+        stack = [(kind, node, parent_rec, index_list)]
+        while stack:
+            kind, node, parent_rec, index_list = stack.pop()
+            rec = self._make_rec(kind, node, parent_rec)
+            self._rec_map(kind)[rec['id']] = rec
+            self._index_map(kind)[rec['id']] = index_list
+            if kind == 'script':
+                continue
+            children = node.setdefault('data', [])
+            table, children_key = self._children_entry(kind, rec)
+            table[children_key] = [child.get('id') for child in children]
+            child_kind = sync_protocol.KINDS[sync_protocol.KIND_LEVEL[kind] + 1]
+            stack.extend((child_kind, child, rec, index_list + [pos]) for pos, child in enumerate(children))
+
+    def _unregister_subtree(self, kind: str, node: Dict[str, Any]):
+        """从 ById / 下标 / children 索引中移除以 node 为根的子树"""
+        for sub_kind, sub_node in self._walk_subtree(kind, node):
+            rec = self._rec_map(sub_kind).pop(sub_node.get('id'), None)
+            self._index_map(sub_kind).pop(sub_node.get('id'), None)
+            if rec is not None and sub_kind != 'script':
+                table, children_key = self._children_entry(sub_kind, rec)
+                table.pop(children_key, None)
+
+    def _reindex_siblings(self, kind: str, parent_rec: Optional[Dict[str, Any]],
+                          siblings: List[Dict[str, Any]], start: int):
+        """同级列表从 start 起的下标写回索引（连同子树中对应层级的下标），并刷新上级的 children 列表"""
+        depth = sync_protocol.KIND_LEVEL[kind]
+        index_map = self._index_map(kind)
+        for pos in range(start, len(siblings)):
+            index_list = index_map.get(siblings[pos].get('id'))
+            if index_list is None or index_list[depth] == pos:
+                continue
+            for sub_kind, sub_node in self._walk_subtree(kind, siblings[pos]):
+                self._index_map(sub_kind)[sub_node['id']][depth] = pos
+        if parent_rec is not None:
+            table, children_key = self._children_entry(self._parent_kind(kind), parent_rec)
+            table[children_key] = [sibling.get('id') for sibling in siblings]
+
+    def _flat_list(self, kind: str) -> List[Dict[str, Any]]:
+        return {
+            'type': self.all_type_data_list,
+            'level_one': self.all_level_one_data_list,
+            'level_two': self.all_level_two_data_list,
+            'script': self.all_script_data_list,
+        }[kind]
+
+    def _flat_range(self, kind: str, index_list: List[int]) -> Tuple[int, int]:
+        """四表按先序排列，下标列表以 index_list 开头的 kind 记录在表中是连续的一段，返回 [lo, hi)"""
+        index_map = self._index_map(kind)
+
+        records = self._flat_list(kind)
+
+        def bisect(target: List[int]) -> int:
+            # bisect_left(records, target, key=...) 需要 Python 3.10，这里手写以兼容 3.7+
+            lo, hi = 0, len(records)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if index_map[records[mid]['id']] < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+        upper = index_list[:-1] + [index_list[-1] + 1]
+        return bisect(index_list), bisect(upper)
+
+    def _flat_insert(self, kind: str, node: Dict[str, Any]):
+        """把以 node 为根的子树的记录插入四表的对应位置（须在登记索引之后调用），耗时与子树大小成正比"""
+        if self._flat_dirty:
+            return
+        index_list = self._index_map(kind)[node['id']]
+        by_kind: Dict[str, List[Dict[str, Any]]] = {}
+        for sub_kind, sub_node in self._walk_subtree(kind, node):
+            by_kind.setdefault(sub_kind, []).append(self._rec_map(sub_kind)[sub_node['id']])
+        for sub_kind, records in by_kind.items():
+            index_map = self._index_map(sub_kind)
+            records.sort(key=lambda r: index_map[r['id']])
+            lo, _ = self._flat_range(sub_kind, index_list)
+            self._flat_list(sub_kind)[lo:lo] = records
+            if sub_kind == 'type':
+                self.all_type_id_list[lo:lo] = [r['id'] for r in records]
+
+    def _flat_resort_siblings(self, kind: str, parent_rec: Optional[Dict[str, Any]], start: int, stop: int):
+        """同级节点 [start, stop] 在同一上级内调换顺序后，只重排四表中这些节点子树所在的一段（须在写回下标之后调用）
+
+        这一段在四表中仍是连续的，段内记录的下标都落在 [start, stop] 之间，二分查找段的两端不受段内顺序影响。"""
+        if self._flat_dirty or start >= stop:
+            return
+        first = self._child_index(kind, parent_rec, start)
+        last = self._child_index(kind, parent_rec, stop)
+        for sub_kind in sync_protocol.KINDS[sync_protocol.KIND_LEVEL[kind]:]:
+            lo, _ = self._flat_range(sub_kind, first)
+            _, hi = self._flat_range(sub_kind, last)
+            records = self._flat_list(sub_kind)
+            index_map = self._index_map(sub_kind)
+            records[lo:hi] = sorted(records[lo:hi], key=lambda r: index_map[r['id']])
+            if sub_kind == 'type':
+                self.all_type_id_list[lo:hi] = [r['id'] for r in records[lo:hi]]
+
+    def _flat_remove_subtree(self, kind: str, node: Dict[str, Any], index_list: List[int]):
+        """从四表中切除以 node 为根的子树的记录（须在注销索引之前调用），耗时与子树大小成正比"""
+        if self._flat_dirty:
+            return
+        counts = {sub_kind: 0 for sub_kind in sync_protocol.KINDS[sync_protocol.KIND_LEVEL[kind]:]}
+        for sub_kind, _ in self._walk_subtree(kind, node):
+            counts[sub_kind] += 1
+        ranges = {}
+        for sub_kind, count in counts.items():
+            try:
+                lo, hi = self._flat_range(sub_kind, index_list)
+            except KeyError:
+                lo, hi = 0, -1
+            if hi - lo != count:
+                # 四表与索引不一致（例如子树中有无效ID），提交时整体重排
+                self._flat_dirty = True
+                return
+            ranges[sub_kind] = (lo, hi)
+        for sub_kind, (lo, hi) in ranges.items():
+            del self._flat_list(sub_kind)[lo:hi]
+            if sub_kind == 'type':
+                del self.all_type_id_list[lo:hi]
+
+    def _refresh_flat_lists(self):
+        """按树的先序顺序重排四表（记录对象不变）"""
+        self.all_type_id_list[:] = sorted(self.type_data_ById, key=self.type_index_list_ById.__getitem__)
+        self.all_type_data_list[:] = [self.type_data_ById[i] for i in self.all_type_id_list]
+        for records, kind in ((self.all_level_one_data_list, 'level_one'),
+                              (self.all_level_two_data_list, 'level_two'),
+                              (self.all_script_data_list, 'script')):
+            index_map = self._index_map(kind)
+            records[:] = sorted(self._rec_map(kind).values(), key=lambda r: index_map[r['id']])
+
+    # ==================== CRUD（四表分离 + 子集索引） ====================
+    # 单项操作是只含一个操作的批次：同样校验、失败时不修改数据
 
+    def _apply_single(self, operation: Dict[str, Any]) -> bool:
+        try:
+            self.apply_batch([operation])
             return True
-        except Exception as e:
-            print(f"加载索引缓存失败: {e}")
+        except BatchError as e:
+            logger.warning(f"操作失败: {e}")
             return False
 
-    # ==================== CRUD（四表分离 + 子集索引） ====================
-
     # 新增
-    def add_type(self, name: str, type_id: int) -> Optional[int]:
-        pass
+    def add_type(self, name: str, type_id: Optional[int] = None) -> Optional[int]:
+        """在末尾新增话术类型，返回新类型ID（失败返回 None）；type_id 为预先生成的ID（可选）"""
+        try:
+            return self.apply_batch([{'op': 'add', 'kind': 'type', 'parent': None, 'id': type_id,
+                                      'fields': {'name': name}}])[0]
+        except BatchError as e:
+            logger.warning(f"操作失败: {e}")
+            return None
 
     def add_level_one(self, type_id: int, name: str) -> bool:
-        index_list = self.get_type_index(type_id)
-        if len(index_list):
-            type_index = index_list[0]
-            new_level_one = {
-                "id": utils.generate_id(),
-                "name": name,
-                "data": []
-            }
-            self.scripts_data[type_index]['data'].append(new_level_one)
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'add', 'kind': 'level_one', 'parent': type_id, 'fields': {'name': name}})
 
     def add_level_two(self, level_one_id: int, name: str) -> bool:
-        index_list = self.get_level_one_index(level_one_id)
-        if len(index_list):
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            new_level_two = {
-                "id": utils.generate_id(),
-                "name": name,
-                "data": []
-            }
-            self.scripts_data[type_index]['data'][level_one_index]['data'].append(new_level_two)
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'add', 'kind': 'level_two', 'parent': level_one_id, 'fields': {'name': name}})
 
     def add_script(self, level_two_id: int, title: str, content: str, bgColor: Optional[str] = None) -> bool:
-        index_list = self.get_level_two_index(level_two_id)
-        if len(index_list):
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            level_two_index = index_list[2]
-            new_script = {
-                "id": utils.generate_id(),
-                "content": content,
-                "title": title,
-                "bgColor": (bgColor or '')
-            }
-            self.scripts_data[type_index]['data'][level_one_index]['data'][level_two_index]['data'].append(new_script)
-            self.save_local_scripts_data()
-            return True
-        return False
+        fields = {'title': title, 'content': content, 'bgColor': (bgColor or '')}
+        return self._apply_single({'op': 'add', 'kind': 'script', 'parent': level_two_id, 'fields': fields})
 
     # 编辑
     def edit_type_name(self, type_id: int, name: str) -> bool:
-        pass
+        return self._apply_single({'op': 'edit', 'kind': 'type', 'id': type_id, 'fields': {'name': name}})
 
     def edit_level_one_name(self, level_one_id: int, name: str) -> bool:
-        index_list = self.get_level_one_index(level_one_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            self.scripts_data[type_index]['data'][level_one_index]['name'] = name
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'edit', 'kind': 'level_one', 'id': level_one_id, 'fields': {'name': name}})
 
     def edit_level_two_name(self, level_two_id: int, name: str) -> bool:
-        index_list = self.get_level_two_index(level_two_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            level_two_index = index_list[2]
-            self.scripts_data[type_index]['data'][level_one_index]['data'][level_two_index]['name'] = name
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'edit', 'kind': 'level_two', 'id': level_two_id, 'fields': {'name': name}})
 
     def edit_script(self, script_id: int, title: Optional[str] = None, content: Optional[str] = None, bgColor: Optional[str] = None) -> bool:
-        index_list = self.get_script_index(script_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            level_two_index = index_list[2]
-            script_index = index_list[3]
-            script_obj = self.scripts_data[type_index]['data'][level_one_index]['data'][level_two_index]['data'][script_index]
-            # 更新内容与标题
-            if content is not None:
-                script_obj['content'] = content
-            if title is not None:
-                script_obj['title'] = title
-            # 背景色：仅在提供时更新；None表示保持不变
-            if bgColor is not None:
-                script_obj['bgColor'] = (bgColor or '')
-            self.save_local_scripts_data()
-            return True
-        return False
+        # 只更新提供的字段；bgColor 为 None 表示保持不变
+        fields = {name: value for name, value in (('title', title), ('content', content), ('bgColor', bgColor))
+                  if value is not None}
+        return self._apply_single({'op': 'edit', 'kind': 'script', 'id': script_id, 'fields': fields})
 
     # 删除
     def delete_type(self, type_id: int) -> bool:
-        pass
+        # 连同其下全部分类与话术：从 ById / children / 下标索引与四表中一并移除
+        return self._apply_single({'op': 'delete', 'kind': 'type', 'id': type_id})
 
     def delete_level_one(self, level_one_id: int) -> bool:
-        index_list = self.get_level_one_index(level_one_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            del self.scripts_data[type_index]['data'][level_one_index]
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'delete', 'kind': 'level_one', 'id': level_one_id})
 
     def delete_level_two(self, level_two_id: int) -> bool:
-        index_list = self.get_level_two_index(level_two_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            level_two_index = index_list[2]
-            del self.scripts_data[type_index]['data'][level_one_index]['data'][level_two_index]
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'delete', 'kind': 'level_two', 'id': level_two_id})
 
     def delete_script(self, script_id: int) -> bool:
-        index_list = self.get_script_index(script_id)
-        if len(index_list) > 0:
-            type_index = index_list[0]
-            level_one_index = index_list[1]
-            level_two_index = index_list[2]
-            script_index = index_list[3]
-            del self.scripts_data[type_index]['data'][level_one_index]['data'][level_two_index]['data'][script_index]
-            self.save_local_scripts_data()
-            return True
-        return False
+        return self._apply_single({'op': 'delete', 'kind': 'script', 'id': script_id})
+
+    # 移动 / 排序（pos 为移动后在目标列表中的下标，None 表示末尾）
+    def move_script(self, script_id: int, level_two_id: int, pos: Optional[int] = None) -> bool:
+        return self._apply_single({'op': 'move', 'kind': 'script', 'id': script_id, 'parent': level_two_id, 'pos': pos})
+
+    def move_level_two(self, level_two_id: int, level_one_id: int, pos: Optional[int] = None) -> bool:
+        return self._apply_single({'op': 'move', 'kind': 'level_two', 'id': level_two_id, 'parent': level_one_id, 'pos': pos})
+
+    def move_level_one(self, level_one_id: int, type_id: int, pos: Optional[int] = None) -> bool:
+        return self._apply_single({'op': 'move', 'kind': 'level_one', 'id': level_one_id, 'parent': type_id, 'pos': pos})
+
+    def reorder_children(self, kind: str, parent_id: Optional[int], ids: List[int]) -> bool:
+        """把 parent_id 下的 kind 节点按 ids 重新排序（话术类型 parent_id 为 None）"""
+        return self._apply_single({'op': 'reorder', 'kind': kind, 'parent': parent_id, 'ids': ids})
 
     # ==================== 核心数据云端操作操作 ====================
     def load_user_data(self):
@@ -543,9 +1071,9 @@ class DataAdapter:
                     # 云端拉取后重建索引
                     self.rebuild_indexes()
                 else:
-                    print(f"云端无用户 {self.user_id} 的数据，使用默认数据")
+                    logger.info(f"云端无用户 {self.user_id} 的数据，使用默认数据")
             except Exception as e:
-                print(f"获取云端数据失败，使用本地数据: {e}")
+                logger.warning(f"获取云端数据失败，使用本地数据: {e}")
                 self.get_local_data()
         else:
             # 获取不到云端数据，使用本地数据
@@ -563,16 +1091,16 @@ class DataAdapter:
                 payload = {"scripts_data": self.scripts_data}
                 response = self.api_manager.save_user_data(payload, self.user_id or 0)
                 if response.get('code') == 200:
-                    print(f"数据已保存到云端 (用户: {self.user_id})")
+                    logger.info(f"数据已保存到云端 (用户: {self.user_id})")
                     return True
                 else:
-                    print(f"保存到云端失败 (用户: {self.user_id})")
+                    logger.warning(f"保存到云端失败 (用户: {self.user_id})")
                     return False
             except Exception as e:
-                print(f"保存到云端时发生错误: {e}")
+                logger.warning(f"保存到云端时发生错误: {e}")
                 return False
         else:
-            print("未配置API管理器，无法保存到云端")
+            logger.warning("未配置API管理器，无法保存到云端")
             return False
 
     def push_local_config_data(self, data: Optional[Dict[str, Any]] = None) -> bool:
@@ -586,14 +1114,14 @@ class DataAdapter:
                 payload = {"config_data": self.config_data}
                 response = self.api_manager.save_user_data(payload, self.user_id or 0)
                 if response.get('code') == 200:
-                    print(f"配置数据已保存到云端 (用户: {self.user_id})")
+                    logger.info(f"配置数据已保存到云端 (用户: {self.user_id})")
                     return True
                 else:
-                    print(f"配置数据保存到云端失败 (用户: {self.user_id})")
+                    logger.warning(f"配置数据保存到云端失败 (用户: {self.user_id})")
                     return False
             except Exception as e:
-                print(f"配置数据保存到云端时发生错误: {e}")
+                logger.warning(f"配置数据保存到云端时发生错误: {e}")
                 return False
         else:
-            print("未配置API管理器，无法保存到云端")
+            logger.warning("未配置API管理器，无法保存到云端")
             return False
@@ -1,6 +1,12 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
 # 统一维护可吸附软件配置
 # 添加新软件：在 APPS 中追加 {"name": "软件名称", "keywords": ["标题关键词1", "关键词2", ...]}
 # keywords 用于窗口标题匹配（不区分大小写）。尽量包含中文名与英文/拼音变体，便于不同客户端标题匹配。
+# 可选发送参数："submit_key" 提交按键（默认 "enter"，组合键如 "ctrl+enter"），"focus_delay" 激活窗口后等待秒数（默认 0.2）。
 APPS = [
     {"name": "全部", "keywords": ["全部"]},
     {"name": "微信", "keywords": ["微信", "wechat"]},
@@ -42,3 +48,95 @@ APPS = [
     {"name": "Live800", "keywords": ["拼多多商家工作台"]},
     {"name": "爱番番沟通", "keywords": ["拼多多商家工作台"]}
 ]
+
+# “全部”为特殊项：选中即允许任意窗口
+ALL_APPS_NAME = "全部"
+
+
+def _is_ascii_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """关键词的正则片段：以英文字母/数字开头或结尾的一侧加 \\b（"tim" 不命中 "timer"、"optimizer"）"""
+    pattern = re.escape(keyword)
+    if _is_ascii_word_char(keyword[0]):
+        pattern = r"\b" + pattern
+    if _is_ascii_word_char(keyword[-1]):
+        pattern += r"\b"
+    return pattern
+
+
+class DockAppMatcher:
+    """可吸附软件匹配器
+
+    将选中软件的关键词（casefold 后）预编译成一个正则，标题中包含任一关键词即命中，
+    如 "微信 - 张三" 命中 "微信"；以英文字母/数字开头或结尾的关键词需在单词边界上，"TIM" 不命中 "Timer"。
+    判定结果按 (窗口句柄, 标题) 缓存，前台窗口来回切换时无需重复匹配。
+    同时用于吸附判定（is_allowed）与窗口监控线程的发送目标过滤（is_target），编译与匹配加锁。
+    """
+
+    def __init__(self, selected_apps: Optional[Iterable[str]] = None, cache_size: int = 256):
+        self.cache_size = cache_size
+        self.match_all = False
+        self.has_selection = False
+        self._lock = threading.Lock()
+        self._pattern = None
+        self._keyword_to_app = {}
+        self._cache = OrderedDict()
+        self.compile(selected_apps or [])
+
+    def compile(self, selected_apps: Iterable[str]):
+        """根据选中的软件名称重新编译匹配器（仅在选择变化时调用）"""
+        selected = set(selected_apps or [])
+        keyword_to_app = {}
+        for app in APPS:
+            name = app.get("name")
+            if name == ALL_APPS_NAME or name not in selected:
+                continue
+            for kw in app.get("keywords", []):
+                kw = (kw or "").strip().casefold()
+                if kw:
+                    keyword_to_app.setdefault(kw, name)
+        pattern = None
+        if keyword_to_app:
+            # 长关键词优先，保证 "拼多多商家工作台" 先于 "拼多多" 命中
+            alternatives = sorted(keyword_to_app, key=len, reverse=True)
+            # re.ASCII 下 \b 只把英文字母/数字/下划线视为单词字符，中文与关键词相邻仍可命中
+            pattern = re.compile("|".join(_keyword_pattern(kw) for kw in alternatives), re.ASCII)
+        with self._lock:
+            self.match_all = ALL_APPS_NAME in selected
+            self.has_selection = bool(selected)
+            self._keyword_to_app = keyword_to_app
+            self._pattern = pattern
+            self._cache.clear()
+
+    def match_app(self, title: str, hwnd: Optional[int] = None) -> Optional[str]:
+        """返回标题命中的软件名称，未命中返回 None（“全部”不参与匹配）"""
+        key = (hwnd, title)
+        with self._lock:
+            cache = self._cache
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            app_name = None
+            if self._pattern is not None and title:
+                m = self._pattern.search(title.casefold())
+                if m:
+                    app_name = self._keyword_to_app.get(m.group(0))
+            cache[key] = app_name
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return app_name
+
+    def is_allowed(self, title: str, hwnd: Optional[int] = None) -> bool:
+        """判断窗口是否属于选中的软件"""
+        if self.match_all:
+            return True
+        return self.match_app(title, hwnd) is not None
+
+    def is_target(self, title: str, hwnd: Optional[int] = None) -> bool:
+        """判断窗口能否作为发送目标：与吸附相同，但未选择任何软件时不过滤"""
+        if not self.has_selection:
+            return True
+        return self.is_allowed(title, hwnd)
@@ -0,0 +1,131 @@
+"""
+HTTP 传输层 - 为 APIManager 提供超时、重试退避、连接池与 gzip 压缩
+所有请求都带 (连接超时, 读取超时)，幂等方法在网络错误/网关错误时按抖动指数退避重试，
+并记录每次请求的耗时与收发字节数。
+"""
+import gzip
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import utils.metrics as metrics
+
+logger = logging.getLogger(__name__)
+
+# 可安全重发的方法；POST 仅在连接尚未建立（请求未发出）时重试
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+# 需要重试的响应状态码（限流/网关错误/服务暂不可用）
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class HttpTransport:
+    """基于 requests.Session 的请求执行器"""
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 20.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_connections: int = 4, pool_maxsize: int = 8,
+                 compress_min_bytes: int = 16 * 1024):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # 请求体超过该大小才压缩，小请求压缩得不偿失
+        self.compress_min_bytes = compress_min_bytes
+        # 服务端在响应头 Accept-Encoding 中声明接受 gzip 请求体（RFC 7694）后置为 True
+        self.server_accepts_gzip = False
+
+        self.session = requests.Session()
+        # 重试由本类控制（区分幂等方法），连接池大小按后台任务并发数调整
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """第 attempt 次重试前的等待时间（full jitter）；服务端给出 Retry-After 时优先采用"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def encode_json(self, data: Any, compress: bool = False) -> Tuple[bytes, Dict[str, str]]:
+        """序列化 JSON 请求体，超过阈值时 gzip 压缩"""
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if compress and len(body) >= self.compress_min_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+        return body, headers
+
+    def request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                json_data: Any = None, compress: bool = False, timeout: Optional[Timeout] = None,
+                retries: Optional[int] = None, headers: Optional[Dict[str, Any]] = None,
+                **kwargs) -> requests.Response:
+        """发送请求并返回响应（不检查状态码）；重试用尽后抛出最后一次的网络异常"""
+        method = method.upper()
+        req_headers = dict(headers or {})
+        if json_data is not None:
+            body, body_headers = self.encode_json(json_data, compress)
+            req_headers.update(body_headers)
+            kwargs['data'] = body
+        else:
+            body = kwargs.get('data') if isinstance(kwargs.get('data'), (bytes, str)) else b''
+
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        max_attempts = (self.max_retries if retries is None else retries) + 1
+        sent_bytes = len(body or b'')
+
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, params=params, headers=req_headers,
+                                                timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                elapsed = (time.perf_counter() - start) * 1000
+                # 非幂等请求只有在连接阶段失败时才能确定未被服务端处理
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, requests.exceptions.ConnectTimeout)
+                logger.warning("%s %s 失败 (第%d次, %.0fms): %s", method, url, attempt, elapsed, e)
+                metrics.counter('http.network_errors').inc()
+                if not retryable or attempt >= max_attempts:
+                    raise
+                metrics.counter('http.retries').inc()
+                time.sleep(self.backoff_delay(attempt - 1))
+                continue
+
+            elapsed = (time.perf_counter() - start) * 1000
+            if 'gzip' in (response.headers.get('Accept-Encoding') or '').lower():
+                self.server_accepts_gzip = True
+            received = response.headers.get('Content-Length')
+            if received is None and not kwargs.get('stream'):
+                received = len(response.content)
+            logger.info("%s %s -> %s %.0fms 发送%dB 接收%sB%s", method, url, response.status_code, elapsed,
+                        sent_bytes, received if received is not None else '?',
+                        ' (gzip)' if response.headers.get('Content-Encoding') == 'gzip' else '')
+            metrics.counter('http.sent_bytes').inc(sent_bytes)
+            if received is not None:
+                metrics.counter('http.received_bytes').inc(int(received))
+
+            if (response.status_code in RETRY_STATUS_CODES and method in IDEMPOTENT_METHODS
+                    and attempt < max_attempts):
+                delay = self.backoff_delay(attempt - 1, response.headers.get('Retry-After'))
+                metrics.counter('http.retries').inc()
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,84 @@
+"""
+ID 生成器 - Snowflake 风格的 63 位整数 ID：毫秒时间戳(41位) + 安装节点号(14位) + 毫秒内序号(8位)
+
+- 同一进程内线程安全且严格递增（时钟回拨或一毫秒内超过 256 个时沿用/借用时间戳继续递增，不会重复）
+- 节点号在首次使用时随机生成并保存到 data/node_id（旧版保存的 10 位节点号仍然有效）
+
+跨电脑唯一性的限制：节点号没有中心分配，两台电脑随机到同一节点号的概率约为 n²/2/16384
+（30 台约 2.7%）；只有节点号相同、且在同一毫秒生成同一序号时 ID 才会相同。
+发生时的兜底：读取本地文件、应用云端下载与合并结果时都会执行 DataAdapter.repair_duplicate_ids，
+树中重复的 ID 重新编号（连同子树记为本地修改上传）。
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import utils.constants as constants
+
+logger = logging.getLogger(__name__)
+
+# 自定义纪元：2024-01-01 00:00:00 UTC（毫秒）
+EPOCH_MS = 1704067200000
+# 时间戳左移 22 位不变（与旧版 10+12 位的 ID 保持同序），节点号加宽、序号缩短
+NODE_BITS = 14
+SEQUENCE_BITS = 8
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def load_node_id(path: Optional[str] = None) -> int:
+    """读取本机节点号；不存在时随机生成并保存"""
+    path = path or constants.node_id_abs_path
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip()) & MAX_NODE
+    except Exception as e:
+        logger.warning(f"读取节点号失败: {e}")
+    node_id = random.SystemRandom().randint(0, MAX_NODE)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(str(node_id))
+    except Exception as e:
+        logger.warning(f"保存节点号失败: {e}")
+    return node_id
+
+
+class SnowflakeGenerator:
+    """Snowflake ID 生成器"""
+
+    def __init__(self, node_id: int):
+        self.node_id = node_id & MAX_NODE
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # 同一毫秒或时钟回拨：沿用上一个时间戳，序号用尽时借用下一毫秒
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    self._last_ms += 1
+            return (self._last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+
+_generator: Optional[SnowflakeGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_generator() -> SnowflakeGenerator:
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = SnowflakeGenerator(load_node_id())
+    return _generator
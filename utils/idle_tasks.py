@@ -0,0 +1,65 @@
+"""
+空闲任务调度 - 在主线程事件循环空闲时执行低优先级任务（如预先准备相邻Tab的视图）
+
+零超时的单次 QTimer 在事件循环处理完已到达的事件后触发；每轮最多执行 budget_ms 毫秒的任务，
+剩余任务留到下一轮，中间把控制权交还事件循环，用户输入总是先于空闲任务处理。
+按住鼠标（拖动、滚动条拖拽等）期间暂停，稍后再试。
+
+用法:
+    scheduler = IdleScheduler(parent)
+    scheduler.clear()                       # 新的优先级：丢弃尚未执行的任务
+    scheduler.schedule(('view', key), fn)   # 按调用顺序执行，同 key 只保留一个
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from PySide6.QtCore import QObject, Qt, QTimer
+from PySide6.QtGui import QGuiApplication
+
+logger = logging.getLogger(__name__)
+
+
+class IdleScheduler(QObject):
+    """主线程空闲任务队列"""
+
+    def __init__(self, parent=None, budget_ms: float = 8.0, busy_retry_ms: int = 50):
+        super().__init__(parent)
+        self.budget_s = budget_ms / 1000.0
+        self.busy_retry_ms = busy_retry_ms
+        self._tasks: 'OrderedDict[Hashable, Callable[[], Any]]' = OrderedDict()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+
+    def schedule(self, key: Hashable, fn: Callable[[], Any]):
+        """加入任务；同 key 的未执行任务被替换（保持原位置）"""
+        self._tasks[key] = fn
+        if not self._timer.isActive():
+            self._timer.start(0)
+
+    def cancel(self, key: Hashable):
+        self._tasks.pop(key, None)
+
+    def clear(self):
+        self._tasks.clear()
+        self._timer.stop()
+
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def _run(self):
+        if QGuiApplication.mouseButtons() != Qt.MouseButton.NoButton:
+            # 用户正在拖动，稍后再执行
+            self._timer.start(self.busy_retry_ms)
+            return
+        deadline = time.perf_counter() + self.budget_s
+        while self._tasks and time.perf_counter() < deadline:
+            key, fn = self._tasks.popitem(last=False)
+            try:
+                fn()
+            except Exception as e:
+                logger.exception(f"空闲任务执行失败 {key}: {e}")
+        if self._tasks:
+            self._timer.start(0)
@@ -0,0 +1,323 @@
+"""
+本地导入导出 - 在本机完成 Excel(.xlsx) / CSV / JSON 与话术树之间的转换，不再上传到服务端转换
+
+表格格式（每行一条话术）：话术类型, 一级分类, 二级分类, 标题, 内容, 背景色
+    - 首行为表头时按表头匹配列（中英文列名均可），否则按上述顺序
+    - 标题与内容都为空的行只创建分类（导出空分类时也会写出这样的行）
+JSON 格式：与 data/scripts.json 相同的树，或由上述列名组成的对象数组。
+
+导入时 CSV / Excel 逐行流式读取（JSON 由标准库整体解析后逐项产出），按名称并入已有分类（不存在则新建），每 batch_size 行提交一次
+DataAdapter.apply_batch（只有追加操作：增量更新索引、只保存一次）。在后台任务中执行时只有读取与解析在工作线程，
+每批按名称查找分类并提交经 run_in_main（JobContext.call_in_main）在主线程执行，与界面上的编辑互不交错。
+.xlsx 依赖可选的 openpyxl；未安装时只支持 CSV / JSON。
+"""
+import csv
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.data_adapter import DataAdapter
+import utils.utils as utils
+
+try:
+    import openpyxl  # 可选：读写 .xlsx
+except ImportError:
+    openpyxl = None
+
+ProgressCallback = Callable[[int, str], None]
+CancelCheck = Callable[[], None]
+MainRunner = Callable[[Callable[[], Any]], Any]
+
+COLUMNS = ('type', 'level_one', 'level_two', 'title', 'content', 'bgColor')
+EXPORT_HEADER = ('话术类型', '一级分类', '二级分类', '标题', '内容', '背景色')
+HEADER_ALIASES = {
+    'type': ('话术类型', '类型', 'type'),
+    'level_one': ('一级分类', 'level_one', 'levelone'),
+    'level_two': ('二级分类', 'level_two', 'leveltwo'),
+    'title': ('标题', 'title'),
+    'content': ('内容', '话术', 'content'),
+    'bgColor': ('背景色', '颜色', 'bgcolor'),
+}
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.json')
+# 每批保存一次整棵树，批越大保存次数越少（10 万行约 5 次）
+DEFAULT_BATCH_SIZE = 20000
+# 读取过程中的进度上报间隔（行）
+PROGRESS_ROWS = 1000
+
+Row = Tuple[str, str, str, str, str, str]
+
+
+class ImportExportError(Exception):
+    """文件格式不支持或内容无法解析"""
+
+
+def file_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ImportExportError(f"不支持的文件格式: {ext or path}（支持 CSV、Excel(.xlsx)、JSON）")
+    if ext == '.xlsx' and openpyxl is None:
+        raise ImportExportError("读写 Excel 需要安装 openpyxl（pip install openpyxl），或改用 CSV")
+    return ext[1:]
+
+
+# ==================== 读取（流式产出行） ====================
+
+def _cell(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _header_mapping(cells: Sequence[Any]) -> Optional[List[int]]:
+    """首行是表头时返回各列在该行中的下标（缺失为 -1），否则返回 None"""
+    names = [_cell(c).strip().lower() for c in cells]
+    mapping = []
+    for column in COLUMNS:
+        aliases = [a.lower() for a in HEADER_ALIASES[column]]
+        mapping.append(next((i for i, name in enumerate(names) if name in aliases), -1))
+    return mapping if sum(1 for i in mapping if i >= 0) >= 3 else None
+
+
+def _table_rows(rows: Iterator[Sequence[Any]]) -> Iterator[Row]:
+    """表格行 -> 标准 6 列行（自动识别表头）"""
+    mapping = list(range(len(COLUMNS)))
+    first = True
+    for cells in rows:
+        if first:
+            first = False
+            header = _header_mapping(cells)
+            if header is not None:
+                mapping = header
+                continue
+        yield tuple(_cell(cells[i]) if 0 <= i < len(cells) else '' for i in mapping)
+
+
+def _read_csv(path: str, position: List[float]) -> Iterator[Row]:
+    total = os.path.getsize(path) or 1
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        def lines():
+            for line in f:
+                # 底层缓冲区的读取位置，用于估算进度
+                position[0] = f.buffer.tell() / total
+                yield line
+        yield from _table_rows(csv.reader(lines()))
+
+
+def _read_xlsx(path: str, position: List[float]) -> Iterator[Row]:
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row or 0
+
+        def rows():
+            for n, cells in enumerate(sheet.iter_rows(values_only=True), 1):
+                if total:
+                    position[0] = n / total
+                yield cells
+        yield from _table_rows(rows())
+    finally:
+        workbook.close()
+
+
+def _read_json(path: str, position: List[float]) -> Iterator[Row]:
+    """整个文件一次解析到内存（标准库 json 不支持增量解析），之后逐项产出行；大文件建议用 CSV"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('scripts_data', data.get('data'))
+    if not isinstance(data, list):
+        raise ImportExportError("JSON 内容应为话术树或行对象数组")
+    total = len(data) or 1
+    for n, item in enumerate(data, 1):
+        position[0] = n / total
+        if not isinstance(item, dict):
+            continue
+        if isinstance(item.get('data'), list):
+            yield from iter_tree_rows([item])
+        else:
+            yield tuple(_cell(item.get(column)) for column in COLUMNS)
+
+
+def read_rows(path: str, position: Optional[List[float]] = None) -> Iterator[Row]:
+    """按扩展名流式读取文件中的行；position[0] 随读取更新为 0~1 的进度"""
+    position = position if position is not None else [0.0]
+    reader = {'csv': _read_csv, 'xlsx': _read_xlsx, 'json': _read_json}[file_format(path)]
+    return reader(path, position)
+
+
+def iter_tree_rows(tree: List[Dict[str, Any]]) -> Iterator[Row]:
+    """话术树 -> 行；没有子节点的分类输出一行空话术，保证导出再导入后分类不丢失"""
+    for type_node in tree or []:
+        type_name = type_node.get('name', '')
+        level_ones = type_node.get('data') or []
+        if not level_ones:
+            yield type_name, '', '', '', '', ''
+        for level_one in level_ones:
+            level_one_name = level_one.get('name', '')
+            level_twos = level_one.get('data') or []
+            if not level_twos:
+                yield type_name, level_one_name, '', '', '', ''
+            for level_two in level_twos:
+                level_two_name = level_two.get('name', '')
+                scripts = level_two.get('data') or []
+                if not scripts:
+                    yield type_name, level_one_name, level_two_name, '', '', ''
+                for script in scripts:
+                    yield (type_name, level_one_name, level_two_name, script.get('title', ''),
+                           script.get('content', ''), script.get('bgColor', ''))
+
+
+def copy_tree(tree: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """话术树的结构拷贝：节点字典与 data 列表为新对象，字段值（字符串）共享；比 json 往返的深拷贝快得多"""
+    def copy_node(node: Dict[str, Any], level: int) -> Dict[str, Any]:
+        copied = dict(node)
+        if level < 3 and isinstance(node.get('data'), list):
+            copied['data'] = [copy_node(child, level + 1) for child in node['data'] if isinstance(child, dict)]
+        return copied
+    return [copy_node(node, 0) for node in tree or [] if isinstance(node, dict)]
+
+
+# ==================== 导入 ====================
+
+class ScriptImporter:
+    """把行批量并入 DataAdapter 的话术树（在后台线程调用 import_rows 时须传入 run_in_main）"""
+
+    def __init__(self, data_adapter: DataAdapter, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.data_adapter = data_adapter
+        self.batch_size = max(1, batch_size)
+        # 名称 -> ID（同名取第一个），导入的行按名称并入已有分类
+        self.type_ids: Dict[str, int] = {}
+        self.level_one_ids: Dict[Tuple[int, str], int] = {}
+        self.level_two_ids: Dict[Tuple[int, str], int] = {}
+
+    def _load_ids(self):
+        """按当前话术树重建名称 -> ID（每批提交前调用：批次之间分类可能在界面上被改名或删除）"""
+        data_adapter = self.data_adapter
+        self.type_ids.clear()
+        self.level_one_ids.clear()
+        self.level_two_ids.clear()
+        for type_data in data_adapter.all_type_data_list:
+            self.type_ids.setdefault(type_data['name'], type_data['id'])
+        for level_one in data_adapter.all_level_one_data_list:
+            self.level_one_ids.setdefault((level_one['typeId'], level_one['name']), level_one['id'])
+        for level_two in data_adapter.all_level_two_data_list:
+            self.level_two_ids.setdefault((level_two['levelOneId'], level_two['name']), level_two['id'])
+
+    def _resolve(self, table: Dict, key: Any, kind: str, parent_id: Optional[int], name: str,
+                 batch: List[Dict[str, Any]]) -> int:
+        node_id = table.get(key)
+        if node_id is None:
+            node_id = utils.generate_id()
+            batch.append({'op': 'add', 'kind': kind, 'parent': parent_id, 'id': node_id, 'fields': {'name': name}})
+            table[key] = node_id
+        return node_id
+
+    def add_row(self, row: Sequence[str], batch: List[Dict[str, Any]]) -> bool:
+        """把一行转换为追加操作（缺少的分类一并新建）；缺少分类名的行返回 False"""
+        type_name, level_one_name, level_two_name = (v.strip() for v in row[:3])
+        title, content, bg_color = row[3:6]
+        if not type_name:
+            return False
+        type_id = self._resolve(self.type_ids, type_name, 'type', None, type_name, batch)
+        if not level_one_name:
+            return not (title or content)
+        level_one_id = self._resolve(self.level_one_ids, (type_id, level_one_name), 'level_one',
+                                     type_id, level_one_name, batch)
+        if not level_two_name:
+            return not (title or content)
+        level_two_id = self._resolve(self.level_two_ids, (level_one_id, level_two_name), 'level_two',
+                                     level_one_id, level_two_name, batch)
+        if title or content:
+            batch.append({'op': 'add', 'kind': 'script', 'parent': level_two_id,
+                          'fields': {'title': title, 'content': content, 'bgColor': bg_color or ''}})
+        return True
+
+    def apply_rows(self, rows: Sequence[Row]) -> Tuple[int, int, int]:
+        """把一批行转换为追加操作并提交（读写 DataAdapter，须在主线程调用），返回 (导入行数, 跳过行数, 节点数)"""
+        self._load_ids()
+        batch: List[Dict[str, Any]] = []
+        imported = sum(1 for row in rows if self.add_row(row, batch))
+        if batch:
+            self.data_adapter.apply_batch(batch)
+        return imported, len(rows) - imported, len(batch)
+
+    def import_rows(self, rows: Iterator[Sequence[str]], position: Optional[List[float]] = None,
+                    progress: Optional[ProgressCallback] = None,
+                    check: Optional[CancelCheck] = None,
+                    run_in_main: Optional[MainRunner] = None) -> Dict[str, int]:
+        """分批导入；取消时已提交的批次保留。返回 {'rows', 'nodes', 'skipped'}
+
+        rows 在调用线程读取；每批的提交经 run_in_main(fn) 执行（未传入时在调用线程直接执行）。
+        """
+        stats = {'rows': 0, 'nodes': 0, 'skipped': 0}
+        pending: List[Row] = []
+        run_in_main = run_in_main or (lambda fn: fn())
+
+        def report(message: str):
+            if progress:
+                progress(int(position[0] * 100) if position else -1, message)
+
+        def commit():
+            report(f"正在保存 {stats['rows'] + len(pending)} 行...")
+            imported, skipped, nodes = run_in_main(lambda: self.apply_rows(pending))
+            stats['rows'] += imported
+            stats['skipped'] += skipped
+            stats['nodes'] += nodes
+            pending.clear()
+
+        for n, row in enumerate(rows, 1):
+            pending.append(row)
+            if n % PROGRESS_ROWS == 0:
+                report(f"已读取 {n} 行...")
+            if len(pending) >= self.batch_size:
+                if check:
+                    check()
+                commit()
+        if pending:
+            commit()
+        return stats
+
+    def import_file(self, path: str, progress: Optional[ProgressCallback] = None,
+                    check: Optional[CancelCheck] = None,
+                    run_in_main: Optional[MainRunner] = None) -> Dict[str, int]:
+        position = [0.0]
+        return self.import_rows(read_rows(path, position), position, progress, check, run_in_main)
+
+
+# ==================== 导出 ====================
+
+def export_file(tree: List[Dict[str, Any]], path: str, progress: Optional[ProgressCallback] = None,
+                check: Optional[CancelCheck] = None) -> int:
+    """把话术树导出为 CSV / Excel / JSON（按扩展名），返回写出的行数（JSON 为节点数）"""
+    fmt = file_format(path)
+    if fmt == 'json':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tree, f, ensure_ascii=False, indent=2)
+        return sum(1 for _ in iter_tree_rows(tree))
+
+    total = max(1, len(tree or []))
+    count = 0
+
+    def rows():
+        nonlocal count
+        for n, type_node in enumerate(tree or [], 1):
+            if check:
+                check()
+            for row in iter_tree_rows([type_node]):
+                count += 1
+                yield row
+            if progress:
+                progress(int(n * 100 / total), f"已导出 {count} 行...")
+
+    if fmt == 'csv':
+        # utf-8-sig：Excel 直接打开不乱码
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADER)
+            writer.writerows(rows())
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("话术")
+        sheet.append(EXPORT_HEADER)
+        for row in rows():
+            sheet.append(row)
+        workbook.save(path)
+    return count
@@ -0,0 +1,246 @@
+"""
+日志 - 全局日志管道：各模块使用 logging.getLogger(__name__) 记录，不再 print()
+
+记录经 QueueHandler 放入内存队列后立即返回，由 QueueListener 的后台线程格式化并写入
+滚动日志文件 data/logs/app.log（开发时同时输出到控制台），界面线程不做任何日志文件 IO。
+
+- 级别：文件默认 INFO；按模块单独设置，如 {'utils.sync_engine': 'DEBUG'}
+  （config.json 的 log_levels，或环境变量 MIAOHUI_LOG_LEVELS="utils.sync_engine=DEBUG,utils.api_manager=WARNING"）
+- 最近 RING_SIZE 条记录（含未写入文件的 DEBUG）保存在内存环形缓冲中，
+  未捕获异常时 dump_recent() 把它们写入 data/logs/crash.log，便于还原出错前的操作
+
+用法:
+    setup_logging()                 # 启动时调用一次
+    logger = logging.getLogger(__name__)
+    logger.info("数据上传成功")
+    shutdown_logging()              # 退出时写完队列中剩余的记录
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Union
+
+import utils.constants as constants
+
+LOG_FORMAT = '%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s'
+# 单个日志文件上限与保留的历史文件数
+MAX_BYTES = 2 * 1024 * 1024
+BACKUP_COUNT = 5
+# 内存中保留的最近记录数
+RING_SIZE = 2000
+LEVELS_ENV = 'MIAOHUI_LOG_LEVELS'
+# 同一异常反复出现（如绘制事件中）时，最近日志最多每隔这么多秒导出一次
+CRASH_DUMP_INTERVAL = 60.0
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_ring: Optional['RingBufferHandler'] = None
+_log_dir: Optional[str] = None
+_last_dump = 0.0
+
+
+class RingBufferHandler(logging.Handler):
+    """保存最近的记录（只保存记录对象，导出时才格式化）"""
+
+    def __init__(self, capacity: int = RING_SIZE):
+        super().__init__(logging.DEBUG)
+        self.records: deque = deque(maxlen=capacity)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # deque.append 本身是原子的，不需要处理器锁
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        if record.exc_info:
+            # 异常先格式化为文本，不让缓冲中的记录长期持有调用栈帧
+            record = copy.copy(record)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+    def snapshot(self) -> List[logging.LogRecord]:
+        # 复制时其他线程仍可能追加，重试即可
+        while True:
+            try:
+                return list(self.records)
+            except RuntimeError:
+                continue
+
+
+class ModuleLevelFilter(logging.Filter):
+    """按模块名（含上级包）决定写入文件的最低级别；结果按日志器名缓存"""
+
+    def __init__(self, default: int = logging.INFO):
+        super().__init__()
+        self.default = default
+        self.levels: Dict[str, int] = {}
+        self._cache: Dict[str, int] = {}
+
+    def set_level(self, name: str, level: int):
+        if name in ('', 'root'):
+            self.default = level
+        else:
+            self.levels[name] = level
+        self._cache = {}
+
+    def threshold(self, name: str) -> int:
+        level = self._cache.get(name)
+        if level is None:
+            level = self.default
+            probe = name
+            while probe:
+                if probe in self.levels:
+                    level = self.levels[probe]
+                    break
+                probe = probe.rpartition('.')[0]
+            self._cache[name] = level
+        return level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.threshold(record.name)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """同进程队列：记录不需要复制和序列化，只在调用线程合并消息参数，异常栈留给后台线程格式化"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+_level_filter = ModuleLevelFilter()
+
+
+def _parse_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"未知的日志级别: {level}")
+    return value
+
+
+def _env_levels() -> Dict[str, str]:
+    levels = {}
+    for item in os.environ.get(LEVELS_ENV, '').split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip():
+            levels[name.strip()] = level.strip()
+    return levels
+
+
+def set_levels(levels: Optional[Dict[str, Union[int, str]]]):
+    """按模块设置级别；'root' 或 '' 为文件/控制台的默认级别。无效的级别忽略并记录警告"""
+    for name, level in (levels or {}).items():
+        try:
+            value = _parse_level(level)
+        except ValueError as e:
+            logging.getLogger(__name__).warning(f"{e}（{name}）")
+            continue
+        _level_filter.set_level(name, value)
+
+
+def setup_logging(log_dir: Optional[str] = None, level: Union[int, str] = logging.INFO,
+                  levels: Optional[Dict[str, Union[int, str]]] = None,
+                  console: Optional[bool] = None, ring_size: int = RING_SIZE) -> str:
+    """配置根日志器（重复调用只更新级别），返回日志目录"""
+    global _listener, _queue_handler, _ring, _log_dir
+    log_dir = log_dir or constants.log_dir_abs_path
+    with _lock:
+        if _listener is None:
+            os.makedirs(log_dir, exist_ok=True)
+            formatter = logging.Formatter(LOG_FORMAT)
+            handlers: List[logging.Handler] = []
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, 'app.log'), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                encoding='utf-8', delay=True)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+            if console is None:
+                # 打包后的窗口程序没有控制台
+                console = sys.stderr is not None and not getattr(sys, 'frozen', False)
+            if console:
+                stream_handler = logging.StreamHandler()
+                stream_handler.setFormatter(formatter)
+                handlers.append(stream_handler)
+
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            _queue_handler = _LocalQueueHandler(log_queue)
+            _queue_handler.addFilter(_level_filter)
+            _ring = RingBufferHandler(ring_size)
+            _log_dir = log_dir
+            root = logging.getLogger()
+            # 根日志器放行所有级别：环形缓冲保留 DEBUG，写入文件的级别由 _level_filter 按模块过滤
+            root.setLevel(logging.DEBUG)
+            root.addHandler(_queue_handler)
+            root.addHandler(_ring)
+            _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        _level_filter.set_level('root', _parse_level(level))
+    set_levels(_env_levels())
+    set_levels(levels)
+    return log_dir
+
+
+def shutdown_logging():
+    """写完队列中剩余的记录并停止后台线程（可重复调用）"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    root = logging.getLogger()
+    for handler in (_queue_handler, _ring):
+        if handler is not None:
+            root.removeHandler(handler)
+
+
+def recent_records(limit: Optional[int] = None) -> List[logging.LogRecord]:
+    if _ring is None:
+        return []
+    records = _ring.snapshot()
+    return records[-limit:] if limit else records
+
+
+def dump_recent(path: Optional[str] = None, min_interval: float = 0.0) -> Optional[str]:
+    """把环形缓冲中的最近记录同步写入文件（出错时调用），返回文件路径；
+    未配置日志或距上次导出不足 min_interval 秒时返回 None"""
+    global _last_dump
+    if _ring is None:
+        return None
+    now = time.monotonic()
+    if min_interval and _last_dump and now - _last_dump < min_interval:
+        return None
+    _last_dump = now
+    path = path or os.path.join(_log_dir or constants.log_dir_abs_path, 'crash.log')
+    formatter = logging.Formatter(LOG_FORMAT)
+    lines = []
+    for record in _ring.snapshot():
+        try:
+            lines.append(formatter.format(record))
+        except Exception as e:
+            lines.append(f"<无法格式化的记录 {record.name}: {e}>")
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# 最近 {len(lines)} 条日志，导出于 {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write('\n'.join(lines))
+            f.write('\n')
+    except OSError as e:
+        logging.getLogger(__name__).error(f"导出最近日志失败: {e}")
+        return None
+    return path
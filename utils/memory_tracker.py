@@ -0,0 +1,242 @@
+"""
+内存跟踪 - 长时间使用（整班反复切换分类、搜索）时内存是否持续增长，增长来自哪些控件与代码行
+
+默认关闭；开启后（设置 → 内存，或 config.json 的 memory_tracking）:
+- 启动 tracemalloc（每次分配只记 1 层调用栈），每 interval_s 秒记录一次进程 RSS、Python 分配量与按类统计的 Qt 控件数
+  （给定 root 时只统计 root 下的控件，如话术树；设置、合并等弹窗不计入）
+- 切换分类、搜索后调用 checkpoint(key, version)：等 settle_ms 毫秒（让 deleteLater 的控件真正销毁）后采样，
+  与同一 key（同一页面）第一次的控件数比较：同一页面的控件数应当不变，某类控件增加 MIN_GROWTH 个以上即记为疑似泄漏，
+  同时给出与上一个检查点相比 Python 分配增长最多的代码行；
+  version 为话术库的数据版本，与基线的不同（增删改、导入、同步后页面本应变化）时以本次采样作为新基线
+- 报告在设置弹窗“内存”页查看，疑似泄漏也会写入日志
+
+    tracker = MemoryTracker(window, root=window.script_tree)
+    tracker.set_enabled(True)
+    tracker.checkpoint(f"tab:{type_id}:{level_one_id}", adapter.views_generation)
+"""
+import gc
+import logging
+import os
+import time
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+
+try:
+    import psutil  # 可选：读取进程 RSS
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 同一页面某类控件增加超过该数量时记为疑似泄漏
+MIN_GROWTH = 5
+# 保留的定时采样数（默认每分钟一次，约 4 小时）
+MAX_HISTORY = 240
+# 保留基线的页面数（超出后丢弃最久未访问的）
+MAX_KEYS = 200
+MAX_FLAGS = 50
+# 检查点之间 Python 分配增长最多的代码行数
+TOP_LINES = 10
+
+
+def rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存（字节）；无法读取时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def mb(value: Optional[int]) -> str:
+    return '未知' if value is None else f"{value / 2 ** 20:.1f}MB"
+
+
+def widget_counts(root: Optional[QWidget] = None) -> Counter:
+    """按类统计现存的 Qt 控件（已 deleteLater 但尚未销毁的也计入）；给定 root 时只统计其下的控件"""
+    widgets = QApplication.allWidgets() if root is None else root.findChildren(QWidget)
+    return Counter(type(widget).__name__ for widget in widgets)
+
+
+def wrapper_counts() -> Counter:
+    """按类统计 Python 仍持有的 QObject 包装对象（C++ 对象已销毁、但被闭包等引用时仍在这里）"""
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, QObject))
+
+
+class MemoryTracker(QObject):
+    """内存跟踪（在主线程创建和调用）"""
+
+    def __init__(self, parent=None, root: Optional[QWidget] = None, interval_s: float = 60.0, settle_ms: int = 500,
+                 min_growth: int = MIN_GROWTH):
+        super().__init__(parent)
+        # 只统计该控件下的控件（None 表示整个程序）
+        self.root = root
+        self.min_growth = min_growth
+        self._enabled = False
+        self._started_tracemalloc = False
+        self.history: deque = deque(maxlen=MAX_HISTORY)
+        self.flags: deque = deque(maxlen=MAX_FLAGS)
+        # 页面 key -> (数据版本, 该版本下第一次（基线）采样的控件数)
+        self._baselines: 'OrderedDict[str, Tuple[Any, Counter]]' = OrderedDict()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._last_key = ''
+        self.top_lines: List[str] = []
+        self.checkpoints = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(interval_s * 1000))
+        self._timer.timeout.connect(lambda: self.sample('定时'))
+        # 检查点防抖：连续切换时只在停下后采样一次
+        self._pending: Optional[Tuple[str, Any]] = None
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(settle_ms)
+        self._settle_timer.timeout.connect(self._on_settled)
+
+    # ==================== 开关 ====================
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, value: bool):
+        value = bool(value)
+        if value == self._enabled:
+            return
+        self._enabled = value
+        if value:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(1)
+                self._started_tracemalloc = True
+            self._timer.start()
+            self.sample('开启')
+        else:
+            self._timer.stop()
+            self._settle_timer.stop()
+            self._last_snapshot = None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        logger.info(f"内存跟踪已{'开启' if value else '关闭'}")
+
+    # ==================== 采样 ====================
+
+    def measure(self, label: str = '') -> Dict[str, Any]:
+        """当前的 RSS、Python 分配量与控件数（不记录）"""
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        counts = widget_counts(self.root)
+        # tracemalloc 自身保存调用栈占用的内存（计入 RSS）
+        overhead = tracemalloc.get_tracemalloc_memory() if tracing else 0
+        return {'time': time.time(), 'label': label, 'rss': rss_bytes(), 'py_current': current,
+                'py_peak': peak, 'trace_overhead': overhead, 'widgets': sum(counts.values()), 'widget_counts': counts}
+
+    def sample(self, label: str = '') -> Dict[str, Any]:
+        """采样并记入历史"""
+        record = self.measure(label)
+        self.history.append(record)
+        return record
+
+    def checkpoint(self, key: str, version: Any = None):
+        """页面切换/搜索后调用：等控件销毁后与同一页面、同一数据版本的基线比较（关闭时直接返回）"""
+        if not self._enabled:
+            return
+        self._pending = (key, version)
+        self._settle_timer.start()
+
+    def _on_settled(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self.checkpoint_now(*pending)
+
+    def checkpoint_now(self, key: str, version: Any = None) -> Dict[str, int]:
+        """立即采样并与 key 的基线比较，返回增长超过阈值的控件类 -> 增加数量；数据版本变化时重置基线"""
+        record = self.sample(key)
+        counts = record['widget_counts']
+        self.checkpoints += 1
+        self._diff_allocations(key)
+
+        entry = self._baselines.get(key)
+        if entry is None or entry[0] != version:
+            self._baselines[key] = (version, counts)
+            self._baselines.move_to_end(key)
+            if len(self._baselines) > MAX_KEYS:
+                self._baselines.popitem(last=False)
+            return {}
+        self._baselines.move_to_end(key)
+        baseline = entry[1]
+        growth = {name: counts[name] - baseline.get(name, 0) for name in counts
+                  if counts[name] - baseline.get(name, 0) >= self.min_growth}
+        if growth:
+            wrappers = wrapper_counts()
+            self.flags.append({'time': record['time'], 'key': key, 'growth': growth, 'rss': record['rss'],
+                               'wrappers': {name: wrappers.get(name, 0) for name in growth}})
+            logger.warning(f"疑似内存泄漏: 页面 {key} 的控件比第一次打开时多 "
+                           + '，'.join(f"{name} +{n}" for name, n in sorted(growth.items(), key=lambda i: -i[1])))
+        return growth
+
+    def _diff_allocations(self, key: str):
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        if self._last_snapshot is not None:
+            stats = snapshot.compare_to(self._last_snapshot, 'lineno')
+            self.top_lines = [f"{stat.size_diff / 1024:+.1f}KB {stat.count_diff:+d} 个  {stat.traceback[0]}"
+                              for stat in stats[:TOP_LINES] if stat.size_diff > 0]
+            if self.top_lines:
+                self.top_lines.insert(0, f"{self._last_key} → {key}")
+        self._last_snapshot = snapshot
+        self._last_key = key
+
+    # ==================== 报告 ====================
+
+    def clear(self):
+        self.history.clear()
+        self.flags.clear()
+        self._baselines.clear()
+        self._last_snapshot = None
+        self.top_lines = []
+        self.checkpoints = 0
+        if self._enabled:
+            self.sample('清空')
+
+    def format_report(self) -> str:
+        if not self._enabled and not self.history:
+            return "内存跟踪未开启"
+        now = self.measure()
+        lines = [f"当前: RSS {mb(now['rss'])}  Python 分配 {mb(now['py_current'])}（峰值 {mb(now['py_peak'])}）"
+                 f"  控件 {now['widgets']} 个  检查点 {self.checkpoints} 次"]
+        if self.history:
+            first = self.history[0]
+            start = time.strftime('%H:%M:%S', time.localtime(first['time']))
+            rss_growth = ('未知' if now['rss'] is None or first['rss'] is None
+                          else f"{(now['rss'] - first['rss']) / 2 ** 20:+.1f}MB")
+            lines.append(f"自 {start} 起: RSS {rss_growth}  "
+                         f"Python 分配 {(now['py_current'] - first['py_current']) / 2 ** 20:+.1f}MB  "
+                         f"控件 {now['widgets'] - first['widgets']:+d} 个")
+        lines.append("")
+        if self.flags:
+            lines.append(f"疑似泄漏（同一页面控件增加 {self.min_growth} 个以上）:")
+            for flag in reversed(self.flags):
+                at = time.strftime('%H:%M:%S', time.localtime(flag['time']))
+                growth = '，'.join(f"{name} +{n}（Python 引用 {flag['wrappers'].get(name, 0)}）"
+                                  for name, n in sorted(flag['growth'].items(), key=lambda i: -i[1]))
+                lines.append(f"  {at} {flag['key']}: {growth}")
+        else:
+            lines.append("未发现同一页面控件数增长")
+        if self.top_lines:
+            lines.append("")
+            lines.append("最近两个检查点之间 Python 分配增长最多的代码行:")
+            lines.extend(f"  {line}" for line in self.top_lines)
+        lines.append("")
+        lines.append("控件数最多的类:")
+        lines.extend(f"  {name:<28}{n:>8}" for name, n in now['widget_counts'].most_common(15))
+        return '\n'.join(lines)
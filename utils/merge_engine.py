@@ -0,0 +1,242 @@
+"""
+三方合并 - 以上次同步时的快照为共同祖先，按实体ID合并本地与云端的话术树
+
+三个版本都先展平为 {实体键: 实体}（见 utils/sync_protocol.py），逐键比较，整体 O(n)：
+    - 只有一方修改的实体/字段直接采用修改方；双方改成相同值视为无冲突
+    - 双方把同一字段改成不同值、一方删除而另一方修改、双方新增同一ID但内容不同，记为冲突
+    - 顺序（pos）不产生冲突：一方调整过顺序时采用该方，双方都调整时采用云端
+冲突由界面逐条选择保留本地或云端后调用 MergeResult.finalize() 得到合并结果。
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import utils.sync_protocol as sync_protocol
+
+LOCAL = 'local'
+REMOTE = 'remote'
+
+EntityMap = Dict[str, Dict[str, Any]]
+
+KIND_NAMES = {'type': '话术类型', 'level_one': '一级分类', 'level_two': '二级分类', 'script': '话术'}
+REASON_NAMES = {
+    'edit': '双方都修改了',
+    'add': '双方新增了同一ID',
+    'delete_local': '本地已删除，云端有修改',
+    'delete_remote': '云端已删除，本地有修改',
+}
+
+
+def same_entity(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]], with_pos: bool = False) -> bool:
+    """实体内容是否相同（默认不比较顺序）"""
+    if a is None or b is None:
+        return a is b
+    if a.get('parent') != b.get('parent') or a.get('fields') != b.get('fields'):
+        return False
+    return not with_pos or a.get('pos') == b.get('pos')
+
+
+def apply_to_entity_map(entities: EntityMap, changes: Iterable[Dict[str, Any]],
+                        deleted: Iterable[str] = ()) -> EntityMap:
+    """在实体表上应用一组变更（先删除及其子树，再 upsert），返回新表"""
+    result = dict(entities)
+    deleted = [key for key in deleted or () if key in result]
+    if deleted:
+        children: Dict[Optional[str], List[str]] = {}
+        for key, entity in result.items():
+            children.setdefault(sync_protocol.parent_key(entity), []).append(key)
+        stack = list(deleted)
+        while stack:
+            key = stack.pop()
+            if result.pop(key, None) is not None:
+                stack.extend(children.get(key, ()))
+    for entity in changes or ():
+        result[sync_protocol.entity_key(entity['kind'], entity['id'])] = entity
+    return result
+
+
+def diff_entity_maps(old: EntityMap, new: EntityMap) -> Tuple[List[str], List[str]]:
+    """old -> new 的差异：(新增或修改的实体键, 删除的实体键)，顺序变化也计为修改"""
+    changed = [key for key, entity in new.items() if not same_entity(old.get(key), entity, with_pos=True)]
+    deleted = [key for key in old if key not in new]
+    return changed, deleted
+
+
+class MergeConflict:
+    """单个冲突：同一实体在本地与云端的修改无法自动合并"""
+
+    def __init__(self, key: str, reason: str, base: Optional[Dict[str, Any]],
+                 local: Optional[Dict[str, Any]], remote: Optional[Dict[str, Any]],
+                 fields: Tuple[str, ...] = (), merged: Optional[Dict[str, Any]] = None):
+        self.key = key
+        self.kind = key.split(':', 1)[0]
+        self.reason = reason
+        self.base = base
+        self.local = local
+        self.remote = remote
+        # 冲突的字段（edit 冲突）；其余字段已自动合并到 merged
+        self.fields = fields
+        self.merged = merged
+        # 用户选择：LOCAL / REMOTE；None 表示尚未处理
+        self.resolution: Optional[str] = None
+
+    def version(self, side: str) -> Optional[Dict[str, Any]]:
+        return self.local if side == LOCAL else self.remote
+
+    def title(self) -> str:
+        """用于界面展示的名称"""
+        entity = self.local or self.remote or self.base or {}
+        fields = entity.get('fields') or {}
+        name = fields.get('name') or fields.get('title') or (fields.get('content') or '')[:20]
+        return f"{KIND_NAMES.get(self.kind, self.kind)}「{name}」"
+
+    def describe(self) -> str:
+        text = f"{self.title()}：{REASON_NAMES.get(self.reason, self.reason)}"
+        if self.fields:
+            text += f"（{'、'.join(self.fields)}）"
+        return text
+
+    def resolved_entity(self, side: str) -> Optional[Dict[str, Any]]:
+        """按选择的一方得到最终实体（None 表示删除）"""
+        chosen = self.version(side)
+        if self.reason != 'edit' or chosen is None or self.merged is None:
+            return chosen
+        # 只有冲突字段取所选一方，其余字段保留自动合并结果
+        entity = dict(self.merged)
+        entity['fields'] = dict(self.merged.get('fields') or {})
+        for name in self.fields:
+            if name == 'parent':
+                entity['parent'] = chosen.get('parent')
+            else:
+                entity['fields'][name] = (chosen.get('fields') or {}).get(name, '')
+        return entity
+
+
+class MergeResult:
+    """合并结果：自动合并的实体表 + 待处理的冲突"""
+
+    def __init__(self, merged: EntityMap, conflicts: List[MergeConflict], stats: Dict[str, int],
+                 base: EntityMap, local: EntityMap, remote: EntityMap):
+        self.merged = merged
+        self.conflicts = conflicts
+        self.stats = stats
+        self.base = base
+        self.local = local
+        self.remote = remote
+        # 调用方附加的上下文（如云端版本号）
+        self.context: Dict[str, Any] = {}
+
+    def unresolved(self) -> List[MergeConflict]:
+        return [c for c in self.conflicts if c.resolution is None]
+
+    def resolve_all(self, side: str):
+        for conflict in self.conflicts:
+            conflict.resolution = side
+
+    def finalize(self, default: str = LOCAL) -> EntityMap:
+        """应用冲突选择（未处理的按 default），并补回被保留实体已删除的上级节点"""
+        result = dict(self.merged)
+        for conflict in self.conflicts:
+            entity = conflict.resolved_entity(conflict.resolution or default)
+            if entity is None:
+                result.pop(conflict.key, None)
+            else:
+                result[conflict.key] = entity
+
+        # 保留下来的实体若其上级已被删除，从任一版本恢复上级，避免整棵子树丢失
+        for key in list(result):
+            entity = result[key]
+            pkey = sync_protocol.parent_key(entity)
+            while pkey is not None and pkey not in result:
+                parent = self.local.get(pkey) or self.remote.get(pkey) or self.base.get(pkey)
+                if parent is None:
+                    break
+                result[pkey] = parent
+                pkey = sync_protocol.parent_key(parent)
+        return result
+
+
+def _merge_entity(base: Dict[str, Any], local: Dict[str, Any],
+                  remote: Dict[str, Any]) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """字段级三方合并，返回 (合并后的实体, 冲突字段)；冲突字段暂取本地值"""
+    conflicts = []
+    base_fields = base.get('fields') or {}
+    local_fields = local.get('fields') or {}
+    remote_fields = remote.get('fields') or {}
+    fields = {}
+    for name in sync_protocol.FIELDS[local['kind']]:
+        b, l, r = base_fields.get(name, ''), local_fields.get(name, ''), remote_fields.get(name, '')
+        if l == r or r == b:
+            fields[name] = l
+        elif l == b:
+            fields[name] = r
+        else:
+            fields[name] = l
+            conflicts.append(name)
+
+    b, l, r = base.get('parent'), local.get('parent'), remote.get('parent')
+    if l == r or r == b:
+        parent = l
+    elif l == b:
+        parent = r
+    else:
+        parent = l
+        conflicts.append('parent')
+
+    pos = local.get('pos') if remote.get('pos') == base.get('pos') else remote.get('pos')
+    entity = {'kind': local['kind'], 'id': local['id'], 'parent': parent, 'pos': pos, 'fields': fields}
+    return entity, tuple(conflicts)
+
+
+def merge(base: EntityMap, local: EntityMap, remote: EntityMap) -> MergeResult:
+    """三方合并（输入为展平后的实体表）"""
+    merged: EntityMap = {}
+    conflicts: List[MergeConflict] = []
+    stats = {'unchanged': 0, 'local': 0, 'remote': 0, 'merged': 0, 'conflicts': 0}
+
+    keys = dict.fromkeys(base)
+    keys.update(dict.fromkeys(local))
+    keys.update(dict.fromkeys(remote))
+    for key in keys:
+        b, l, r = base.get(key), local.get(key), remote.get(key)
+
+        if same_entity(l, r):
+            if l is not None:
+                # 内容相同：顺序以调整过的一方为准
+                merged[key] = l if (r.get('pos') == (b or {}).get('pos')) else r
+            stats['unchanged' if same_entity(l, b) else 'merged'] += 1
+            continue
+
+        if b is None:
+            # 新增：一方新增直接采用；双方新增同一ID且内容不同为冲突
+            if l is None or r is None:
+                merged[key] = l if r is None else r
+                stats['local' if r is None else 'remote'] += 1
+            else:
+                merged[key] = l
+                conflicts.append(MergeConflict(key, 'add', b, l, r))
+            continue
+
+        if l is None:
+            if same_entity(r, b):
+                stats['local'] += 1
+            else:
+                conflicts.append(MergeConflict(key, 'delete_local', b, l, r))
+            continue
+        if r is None:
+            if same_entity(l, b):
+                stats['remote'] += 1
+            else:
+                merged[key] = l
+                conflicts.append(MergeConflict(key, 'delete_remote', b, l, r))
+            continue
+
+        entity, conflict_fields = _merge_entity(b, l, r)
+        merged[key] = entity
+        if conflict_fields:
+            conflicts.append(MergeConflict(key, 'edit', b, l, r, conflict_fields, entity))
+        elif same_entity(entity, l):
+            stats['remote' if not same_entity(r, b) else 'local'] += 1
+        else:
+            stats['merged'] += 1
+
+    stats['conflicts'] = len(conflicts)
+    return MergeResult(merged, conflicts, stats, base, local, remote)
@@ -0,0 +1,294 @@
+"""
+性能统计 - 计数器、直方图与计时器，记录热点路径（建树、保存、渲染、搜索、发送、接口请求）的耗时分布
+
+默认关闭：关闭时 @timed 包装的函数只多一次全局标志判断，counter().inc() / histogram().observe() 直接返回。
+开启后（设置 → 性能统计，或 config.json 的 metrics_enabled）每 SNAPSHOT_INTERVAL 秒由后台线程把快照写入
+data/logs/metrics.json，退出时再写一次，技术支持可让用户开启后发回该文件。
+
+用法:
+    @metrics.timed('data.build_from_tree')
+    def _build_from_tree(self, tree): ...
+
+    with metrics.timer('ui.search'):
+        ...
+    metrics.counter('http.retries').inc()
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import utils.constants as constants
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶的上界（毫秒），最后一个桶收纳更大的值
+BUCKETS_MS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SNAPSHOT_INTERVAL = 60.0
+
+_enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool):
+    global _enabled
+    if value != _enabled:
+        _enabled = bool(value)
+        logger.info(f"性能统计已{'开启' if _enabled else '关闭'}")
+
+
+class Counter:
+    __slots__ = ('name', 'value', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        if not _enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """耗时分布（毫秒）：次数、总和、最小/最大值与按 BUCKETS_MS 分桶的计数"""
+    __slots__ = ('name', 'count', 'total', 'min', 'max', 'buckets', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        if not _enabled:
+            return
+        index = bisect_left(BUCKETS_MS, value_ms)
+        with self._lock:
+            if self.count == 0 or value_ms < self.min:
+                self.min = value_ms
+            if value_ms > self.max:
+                self.max = value_ms
+            self.count += 1
+            self.total += value_ms
+            self.buckets[index] += 1
+
+    def percentile(self, q: float) -> float:
+        """按桶估算的分位数（取所在桶的上界，不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[index], self.max) if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'count': self.count,
+                'total_ms': round(self.total, 3),
+                'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+                'min_ms': round(self.min, 3),
+                'max_ms': round(self.max, 3),
+                'p50_ms': self.percentile(0.5),
+                'p90_ms': self.percentile(0.9),
+                'p99_ms': self.percentile(0.99),
+                'buckets': {(f"<={BUCKETS_MS[i]}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): n
+                            for i, n in enumerate(self.buckets) if n},
+            }
+
+
+class Registry:
+    """按名称保存全部指标（可在任意线程使用）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Counter] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.time()
+
+    def counter(self, name: str) -> Counter:
+        metric = self.counters.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.counters.setdefault(name, Counter(name))
+        return metric
+
+    def histogram(self, name: str) -> Histogram:
+        metric = self.histograms.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.histograms.setdefault(name, Histogram(name))
+        return metric
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = list(self.counters.values())
+            histograms = list(self.histograms.values())
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'since': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'enabled': _enabled,
+            'counters': {c.name: c.value for c in counters if c.value},
+            'histograms': {h.name: h.snapshot() for h in histograms if h.count},
+        }
+
+
+registry = Registry()
+
+
+def counter(name: str) -> Counter:
+    return registry.counter(name)
+
+
+def histogram(name: str) -> Histogram:
+    return registry.histogram(name)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """计时上下文；关闭时返回空对象，不读时钟"""
+    return _Timer(registry.histogram(name)) if _enabled else _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """函数计时装饰器；抛出异常的调用同样计时，并计入 <name>.errors"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                registry.counter(f"{name}.errors").inc()
+                raise
+            finally:
+                registry.histogram(name).observe((time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+# ==================== 快照 ====================
+
+def write_snapshot(path: Optional[str] = None) -> bool:
+    path = path or constants.metrics_abs_path
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(registry.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        logger.warning(f"保存性能统计失败: {e}")
+        return False
+
+
+def format_summary(limit: int = 30) -> str:
+    """按总耗时排序的文本摘要（设置弹窗显示）"""
+    snapshot = registry.snapshot()
+    histograms = sorted(snapshot['histograms'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+    if not histograms and not snapshot['counters']:
+        state = '' if _enabled else '（未开启）'
+        return f"暂无性能统计{state}"
+    lines = [f"统计开始于 {snapshot['since']}", "",
+             f"{'名称':<32}{'次数':>8}{'平均ms':>10}{'p90ms':>10}{'最大ms':>10}{'总计ms':>12}"]
+    for name, h in histograms[:limit]:
+        lines.append(f"{name:<32}{h['count']:>8}{h['mean_ms']:>10.1f}{h['p90_ms']:>10.1f}"
+                     f"{h['max_ms']:>10.1f}{h['total_ms']:>12.0f}")
+    if snapshot['counters']:
+        lines.append("")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name:<32}{value:>8}")
+    return '\n'.join(lines)
+
+
+class SnapshotWriter:
+    """后台线程：开启统计期间每 interval 秒写一次快照（没有新数据时跳过）"""
+
+    def __init__(self, path: Optional[str] = None, interval: float = SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_total = -1
+
+    def _total(self) -> int:
+        return (sum(h.count for h in list(registry.histograms.values()))
+                + sum(c.value for c in list(registry.counters.values())))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        if not _enabled:
+            return
+        total = self._total()
+        if total != self._last_total and write_snapshot(self.path):
+            self._last_total = total
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止线程并写入最后一次快照"""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=1.0)
+        self.flush()
@@ -0,0 +1,168 @@
+"""
+平台适配 - 窗口查询/激活（pywin32）与模拟按键（pyautogui）集中在这里，其他模块不直接导入这些库
+
+Windows 上使用 pywin32 与 pyautogui；依赖缺失时（如在 Linux 上以 QT_QPA_PLATFORM=offscreen 运行基准）
+自动换成内存中的假实现：主窗口照常启动，只是没有可发送的目标窗口。基准与调试脚本可调用 use_fakes()
+显式替换，并通过假实现添加窗口、查看发送过的按键。
+
+调用方通过模块属性访问当前实现（替换后立即生效）:
+    platform_shim.windows.foreground_window()
+    platform_shim.keyboard.hotkey('ctrl', 'v')
+"""
+import itertools
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import win32con
+    import win32gui
+    import win32process
+except ImportError:
+    win32con = win32gui = win32process = None
+
+try:
+    import pyautogui
+except Exception:  # 非 Windows 且没有图形环境时 pyautogui 导入即报错（不只是 ImportError）
+    pyautogui = None
+
+logger = logging.getLogger(__name__)
+
+Rect = Tuple[int, int, int, int]
+
+
+class Win32Windows:
+    """系统窗口（pywin32）"""
+
+    def is_window(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_visible(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def is_minimized(self, hwnd: int) -> bool:
+        return win32gui.GetWindowPlacement(hwnd)[1] == win32con.SW_SHOWMINIMIZED
+
+    def foreground_window(self) -> int:
+        return win32gui.GetForegroundWindow()
+
+    def window_title(self, hwnd: int) -> str:
+        return win32gui.GetWindowText(hwnd)
+
+    def window_rect(self, hwnd: int) -> Rect:
+        return win32gui.GetWindowRect(hwnd)
+
+    def window_pid(self, hwnd: int) -> int:
+        return win32process.GetWindowThreadProcessId(hwnd)[1]
+
+    def class_name(self, hwnd: int) -> str:
+        return win32gui.GetClassName(hwnd)
+
+    def enum_windows(self, callback: Callable[[int, object], bool]):
+        """callback(hwnd, param) 返回 False 时停止枚举"""
+        win32gui.EnumWindows(callback, None)
+
+    def activate(self, hwnd: int):
+        """还原并激活窗口"""
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+        win32gui.SetForegroundWindow(hwnd)
+
+
+class Win32Keyboard:
+    """模拟按键（pyautogui）"""
+
+    def hotkey(self, *keys: str):
+        pyautogui.hotkey(*keys)
+
+
+class FakeWindows:
+    """内存中的窗口表：add_window() 添加窗口，set_foreground() 切换前台窗口"""
+
+    def __init__(self):
+        self.windows: Dict[int, Dict[str, object]] = {}
+        self.foreground = 0
+        # 依次激活过的窗口句柄
+        self.activated: List[int] = []
+        self._next_hwnd = itertools.count(0x10000, 4)
+
+    def add_window(self, title: str, rect: Rect = (0, 0, 800, 600), pid: int = 0, class_name: str = '',
+                   visible: bool = True, minimized: bool = False) -> int:
+        hwnd = next(self._next_hwnd)
+        self.windows[hwnd] = {'title': title, 'rect': rect, 'pid': pid, 'class_name': class_name,
+                              'visible': visible, 'minimized': minimized}
+        return hwnd
+
+    def close_window(self, hwnd: int):
+        self.windows.pop(hwnd, None)
+        if self.foreground == hwnd:
+            self.foreground = 0
+
+    def set_foreground(self, hwnd: int):
+        self.foreground = hwnd if hwnd in self.windows else 0
+
+    def _get(self, hwnd: int, key: str, default=None):
+        window = self.windows.get(hwnd)
+        return window[key] if window is not None else default
+
+    def is_window(self, hwnd: int) -> bool:
+        return hwnd in self.windows
+
+    def is_visible(self, hwnd: int) -> bool:
+        return bool(self._get(hwnd, 'visible', False))
+
+    def is_minimized(self, hwnd: int) -> bool:
+        return bool(self._get(hwnd, 'minimized', False))
+
+    def foreground_window(self) -> int:
+        return self.foreground
+
+    def window_title(self, hwnd: int) -> str:
+        return self._get(hwnd, 'title', '')
+
+    def window_rect(self, hwnd: int) -> Rect:
+        return self._get(hwnd, 'rect', (0, 0, 0, 0))
+
+    def window_pid(self, hwnd: int) -> int:
+        return self._get(hwnd, 'pid', 0)
+
+    def class_name(self, hwnd: int) -> str:
+        return self._get(hwnd, 'class_name', '')
+
+    def enum_windows(self, callback: Callable[[int, object], bool]):
+        for hwnd in list(self.windows):
+            if callback(hwnd, None) is False:
+                break
+
+    def activate(self, hwnd: int):
+        if hwnd in self.windows:
+            self.windows[hwnd]['minimized'] = False
+            self.foreground = hwnd
+            self.activated.append(hwnd)
+
+
+class FakeKeyboard:
+    """记录发送过的组合键，不产生真实按键"""
+
+    def __init__(self):
+        self.sent: List[Tuple[str, ...]] = []
+
+    def hotkey(self, *keys: str):
+        self.sent.append(tuple(keys))
+
+
+def native_available() -> bool:
+    return win32gui is not None and pyautogui is not None
+
+
+windows = Win32Windows() if win32gui is not None else FakeWindows()
+keyboard = Win32Keyboard() if pyautogui is not None else FakeKeyboard()
+if not native_available():
+    logger.info("未找到 pywin32/pyautogui，窗口与按键使用内存中的假实现")
+
+
+def use_fakes(fake_windows: Optional[FakeWindows] = None,
+              fake_keyboard: Optional[FakeKeyboard] = None) -> Tuple[FakeWindows, FakeKeyboard]:
+    """换成假实现（须在创建主窗口之前调用），返回 (windows, keyboard)"""
+    global windows, keyboard
+    windows = fake_windows or FakeWindows()
+    keyboard = fake_keyboard or FakeKeyboard()
+    return windows, keyboard
@@ -0,0 +1,119 @@
+"""
+节点记录 - DataAdapter 索引中的轻量记录（__slots__），不再为每个节点复制一份字典
+
+记录只保存两个引用：树中的节点字典（name / title / content / bgColor 等字段的唯一存储）
+和上级记录（typeId / levelOneId / levelTwoId 沿上级推导）。树与索引共用同一份字段，
+编辑树节点后记录自动反映新值。
+
+对外保持只读字典接口：rec['name']、rec.get('content', '')、'typeId' in rec、dict(rec.items())，
+界面与导入导出代码无需区分记录和字典；需要普通字典（如写入 JSON）时调用 to_dict()。
+"""
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class NodeRecord:
+    """记录基类；子类声明暴露的键"""
+    __slots__ = ('node', 'parent')
+
+    # 暴露的键（顺序与原字典记录一致）
+    KEYS: Tuple[str, ...] = ()
+    # 上级ID键 -> 向上的层数（0 为直接上级）
+    PARENT_KEYS: Dict[str, int] = {}
+    # 键 -> 向上的层数，节点自身字段为 -1（由子类的 KEYS / PARENT_KEYS 生成，搜索时逐条调用 get，只查一次表）
+    LOOKUP: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.LOOKUP = {key: cls.PARENT_KEYS.get(key, -1) for key in cls.KEYS}
+
+    def __init__(self, node: Dict[str, Any], parent: Optional['NodeRecord'] = None):
+        self.node = node
+        self.parent = parent
+
+    def get(self, key: str, default: Any = None) -> Any:
+        depth = self.LOOKUP.get(key)
+        if depth is None:
+            return default
+        if depth < 0:
+            return self.node.get(key, None if key == 'id' else '')
+        rec = self.parent
+        for _ in range(depth):
+            rec = rec.parent
+        return rec.node.get('id')
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.LOOKUP:
+            raise KeyError(key)
+        return self.get(key)
+
+    def update(self, fields: Dict[str, Any]):
+        """写入树节点（只接受节点自身的字段）"""
+        for key, value in fields.items():
+            if key == 'id' or self.LOOKUP.get(key, 0) >= 0:
+                raise KeyError(key)
+            self.node[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.LOOKUP
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.KEYS
+
+    def values(self):
+        return [self[key] for key in self.KEYS]
+
+    def items(self):
+        return [(key, self[key]) for key in self.KEYS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.KEYS}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NodeRecord):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class TypeRecord(NodeRecord):
+    __slots__ = ()
+    KEYS = ('id', 'name')
+    PARENT_KEYS = {}
+
+
+class LevelOneRecord(NodeRecord):
+    __slots__ = ()
+    KEYS = ('id', 'name', 'typeId')
+    PARENT_KEYS = {'typeId': 0}
+
+
+class LevelTwoRecord(NodeRecord):
+    __slots__ = ()
+    KEYS = ('id', 'name', 'typeId', 'levelOneId')
+    PARENT_KEYS = {'levelOneId': 0, 'typeId': 1}
+
+
+class ScriptRecord(NodeRecord):
+    __slots__ = ()
+    KEYS = ('id', 'title', 'bgColor', 'content', 'typeId', 'levelOneId', 'levelTwoId')
+    PARENT_KEYS = {'levelTwoId': 0, 'levelOneId': 1, 'typeId': 2}
+
+
+RECORD_TYPES = {
+    'type': TypeRecord,
+    'level_one': LevelOneRecord,
+    'level_two': LevelTwoRecord,
+    'script': ScriptRecord,
+}
@@ -0,0 +1,161 @@
+"""
+性能分析 - 在用户机器上按需采集 CPU 时间花在哪里（托盘菜单 → 性能分析，结果写入 data/profiles/）
+
+两种模式:
+    sample   后台线程每 interval_ms 毫秒用 sys._current_frames() 采样一次主线程调用栈，
+             停止时写出折叠栈文件（*.collapsed，每行 "帧;帧;帧 次数"，可直接交给 flamegraph.pl / speedscope），
+             主线程几乎无额外开销，适合长时间开着复现问题
+    cprofile 在主线程上启用 cProfile（精确的调用次数与耗时，但主线程明显变慢），
+             停止时写出 *.prof（pstats / snakeviz 可读）与按累计耗时排序的 *.txt 摘要
+
+用法:
+    profiler = SamplingProfiler()
+    profiler.start('sample')      # 在主线程调用
+    ...
+    path = profiler.stop()        # 返回写出的文件路径
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import utils.constants as constants
+
+logger = logging.getLogger(__name__)
+
+MODES = ('sample', 'cprofile')
+# 单个调用栈最多保留的帧数（从最深处算起）
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    """主线程性能分析（start/stop 在主线程调用）"""
+
+    def __init__(self, out_dir: Optional[str] = None, interval_ms: float = 5.0):
+        self.out_dir = out_dir or constants.profile_dir_abs_path
+        self.interval_s = interval_ms / 1000.0
+        self.mode: Optional[str] = None
+        self.started = 0.0
+        self.samples: Counter = Counter()
+        self._labels: Dict[object, str] = {}
+        self._target_ident: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    @property
+    def running(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: str = 'sample'):
+        if mode not in MODES:
+            raise ValueError(f"未知的分析模式: {mode}")
+        if self.running:
+            raise RuntimeError("性能分析已在进行中")
+        self.mode = mode
+        self.started = time.time()
+        self.samples = Counter()
+        if mode == 'cprofile':
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._target_ident = threading.get_ident()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name='sampling-profiler', daemon=True)
+            self._thread.start()
+        logger.info(f"性能分析已开始（{mode}）")
+
+    def stop(self) -> Optional[str]:
+        """停止并写出结果，返回文件路径；写出失败时返回 None"""
+        if not self.running:
+            return None
+        mode, self.mode = self.mode, None
+        if mode == 'cprofile':
+            profile, self._cprofile = self._cprofile, None
+            profile.disable()
+            path = self._write_cprofile(profile)
+        else:
+            self._stop.set()
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                thread.join(timeout=1.0)
+            path = self._write_collapsed()
+        if path:
+            logger.info(f"性能分析结果已保存: {path}")
+        return path
+
+    # ==================== 采样 ====================
+
+    def _sample_loop(self):
+        ident = self._target_ident
+        samples = self.samples
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            # 以代码对象为键计数，写文件时才转成文字
+            samples[tuple(stack)] += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            root = constants.file_abs_path
+            if os.path.abspath(filename).startswith(root):
+                filename = os.path.relpath(filename, root)
+            else:
+                filename = os.path.basename(filename)
+            # 折叠栈格式以 ';' 分隔帧、以行末最后一个空格分隔次数，帧名中不能出现 ';'
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    def collapsed(self) -> Dict[str, int]:
+        """折叠栈 -> 采样次数（根在前）"""
+        result: Counter = Counter()
+        for stack, count in self.samples.items():
+            result[';'.join(self._label(code) for code in reversed(stack))] += count
+        return dict(result)
+
+    def _path(self, suffix: str) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        name = time.strftime('profile-%Y%m%d-%H%M%S', time.localtime(self.started))
+        return os.path.join(self.out_dir, f"{name}.{suffix}")
+
+    def _write_collapsed(self) -> Optional[str]:
+        try:
+            path = self._path('collapsed')
+            lines = sorted(self.collapsed().items(), key=lambda item: item[1], reverse=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in lines:
+                    f.write(f"{stack} {count}\n")
+            return path
+        except OSError as e:
+            logger.warning(f"保存性能分析结果失败: {e}")
+            return None
+
+    # ==================== cProfile ====================
+
+    def _write_cprofile(self, profile: cProfile.Profile) -> Optional[str]:
+        try:
+            path = self._path('prof')
+            profile.dump_stats(path)
+            text = io.StringIO()
+            stats = pstats.Stats(profile, stream=text)
+            stats.sort_stats('cumulative').print_stats(60)
+            with open(self._path('txt'), 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+            return path
+        except OSError as e:
+            logger.warning(f"保存性能分析结果失败: {e}")
+            return None
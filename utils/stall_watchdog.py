@@ -0,0 +1,204 @@
+"""
+卡顿监测 - 后台线程监视主线程事件循环，界面卡住超过阈值时记录主线程的 Python 调用栈
+
+主线程上的 QTimer 每 heartbeat_ms 毫秒记录一次心跳；事件循环被阻塞时心跳停止。
+监视线程发现心跳停止超过 threshold_ms 后，用 sys._current_frames() 采集主线程调用栈（卡顿期间每轮采样一次），
+心跳恢复后把这次卡顿（时长、出现最多的调用栈、当时正在执行的操作）并入报告：
+按 (操作, 本程序内最深的调用位置) 聚合次数、总时长与最长时长，供设置弹窗的“卡顿报告”页查看。
+
+正在执行的操作由主线程标记：
+    with watchdog.action(f"update_ui:{type}"):
+        ...
+
+记录的时长以心跳计算，误差在一个心跳间隔以内；主线程在一次 C 调用中长时间持有 GIL 时，
+监视线程要等调用返回才能采样，此时的调用栈是返回之后的位置。
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer
+
+logger = logging.getLogger(__name__)
+
+# 聚合的卡顿位置数上限（超出后丢弃总时长最小的）
+MAX_GROUPS = 100
+# 保留的最近卡顿数
+MAX_RECENT = 50
+# 单次卡顿最多保留的调用栈采样数
+MAX_SAMPLES = 50
+# 每个调用栈保留的帧数（从最深处算起）
+STACK_DEPTH = 30
+
+# 本程序的源码目录：聚合时用最深的本程序帧定位卡顿位置
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Stack = Tuple[Tuple[str, int, str], ...]
+
+
+def _is_app_frame(filename: str) -> bool:
+    return os.path.abspath(filename).startswith(_APP_ROOT) and 'site-packages' not in filename
+
+
+class StallWatchdog(QObject):
+    """主线程卡顿监测（在主线程创建和 start）"""
+
+    def __init__(self, parent=None, threshold_ms: int = 500, heartbeat_ms: int = 100):
+        super().__init__(parent)
+        self.threshold_s = threshold_ms / 1000.0
+        self.heartbeat_ms = heartbeat_ms
+        self._main_ident: Optional[int] = None
+        self._last_beat = time.monotonic()
+        # 主线程正在执行的操作（可嵌套）；监视线程只读取
+        self._actions: List[str] = []
+        self._lock = threading.Lock()
+        self._groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._recent: deque = deque(maxlen=MAX_RECENT)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(heartbeat_ms)
+        self._timer.timeout.connect(self._beat)
+
+    # ==================== 启停 ====================
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._main_ident = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=1.0)
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+
+    # ==================== 操作标记（主线程） ====================
+
+    @contextmanager
+    def action(self, name: str) -> Iterator[None]:
+        self._actions.append(name)
+        try:
+            yield
+        finally:
+            self._actions.pop()
+
+    def current_action(self) -> str:
+        actions = self._actions
+        return ' > '.join(actions) if actions else ''
+
+    # ==================== 监视线程 ====================
+
+    def _watch(self):
+        poll_s = min(self.heartbeat_ms / 1000.0, self.threshold_s / 2)
+        stall_start = None
+        samples: Counter = Counter()
+        actions: Counter = Counter()
+        while not self._stop.wait(poll_s):
+            last_beat = self._last_beat
+            blocked = time.monotonic() - last_beat
+            if blocked > self.threshold_s + self.heartbeat_ms / 1000.0:
+                if stall_start is None:
+                    stall_start = last_beat
+                if sum(samples.values()) < MAX_SAMPLES:
+                    stack = self._main_stack()
+                    if stack:
+                        samples[stack] += 1
+                    actions[self.current_action()] += 1
+            elif stall_start is not None:
+                # 心跳恢复：卡顿从最后一次心跳持续到恢复后的第一次心跳
+                duration = last_beat - stall_start - self.heartbeat_ms / 1000.0
+                self._record(max(duration, self.threshold_s), samples, actions)
+                stall_start = None
+                samples = Counter()
+                actions = Counter()
+
+    def _main_stack(self) -> Stack:
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return ()
+        entries = traceback.extract_stack(frame, limit=STACK_DEPTH)
+        return tuple((entry.filename, entry.lineno, entry.name) for entry in entries)
+
+    def _record(self, duration: float, samples: Counter, actions: Counter):
+        stack = samples.most_common(1)[0][0] if samples else ()
+        action = actions.most_common(1)[0][0] if actions else ''
+        location = self.location(stack)
+        duration_ms = duration * 1000.0
+        logger.warning(f"界面卡顿 {duration_ms:.0f}ms 操作: {action or '无'} 位置: {location}")
+        with self._lock:
+            self._recent.append({'time': time.time(), 'ms': duration_ms, 'action': action,
+                                 'location': location, 'stack': stack})
+            key = (action, location)
+            group = self._groups.get(key)
+            if group is None:
+                if len(self._groups) >= MAX_GROUPS:
+                    smallest = min(self._groups, key=lambda k: self._groups[k]['total_ms'])
+                    del self._groups[smallest]
+                group = self._groups[key] = {'action': action, 'location': location, 'count': 0,
+                                             'total_ms': 0.0, 'max_ms': 0.0, 'stack': stack, 'last': 0.0}
+            group['count'] += 1
+            group['total_ms'] += duration_ms
+            group['last'] = time.time()
+            if duration_ms >= group['max_ms']:
+                group['max_ms'] = duration_ms
+                group['stack'] = stack
+
+    @staticmethod
+    def location(stack: Stack) -> str:
+        """调用栈中最深的本程序帧（都不是时取最深帧）"""
+        for filename, lineno, name in reversed(stack):
+            if _is_app_frame(filename):
+                return f"{os.path.relpath(filename, _APP_ROOT)}:{lineno} {name}"
+        if stack:
+            filename, lineno, name = stack[-1]
+            return f"{os.path.basename(filename)}:{lineno} {name}"
+        return '未知'
+
+    # ==================== 报告 ====================
+
+    def report(self) -> List[Dict[str, Any]]:
+        """按总时长降序的聚合结果"""
+        with self._lock:
+            groups = [dict(group) for group in self._groups.values()]
+        return sorted(groups, key=lambda g: g['total_ms'], reverse=True)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+            self._recent.clear()
+
+    def format_report(self, limit: int = 20) -> str:
+        groups = self.report()
+        if not groups:
+            return f"暂无卡顿记录（阈值 {self.threshold_s * 1000:.0f}ms）"
+        total = sum(g['count'] for g in groups)
+        lines = [f"共 {total} 次卡顿（阈值 {self.threshold_s * 1000:.0f}ms），按总时长排序：", ""]
+        for n, group in enumerate(groups[:limit], 1):
+            last = time.strftime('%H:%M:%S', time.localtime(group['last']))
+            lines.append(f"{n}. {group['location']}")
+            lines.append(f"   操作: {group['action'] or '无'}  次数: {group['count']}  "
+                         f"总计: {group['total_ms']:.0f}ms  最长: {group['max_ms']:.0f}ms  最近: {last}")
+            for filename, lineno, name in group['stack'][-8:]:
+                lines.append(f"     {os.path.basename(filename)}:{lineno} {name}")
+            lines.append("")
+        return '\n'.join(lines)
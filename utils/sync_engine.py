@@ -0,0 +1,287 @@
+"""
+增量同步引擎 - 只上传/下载变化的话术类型、分类与话术
+
+拉取：GET /user/{uid}/changes?since=<rev> 携带 If-None-Match，云端无变化时只有一次 304 往返；
+上传：POST /user/{uid}/changes，仅包含 DataAdapter 变更记录中尚未上传的实体与删除。
+后端不支持增量接口（404）时回退到整库 GET/PUT。
+
+网络请求与数据应用分离（fetch_* / apply_*），便于把网络部分放到后台线程执行。
+每次同步完成后在 data/sync_base.json 保存双方一致的快照，作为三方合并的共同祖先。
+整库下载（首次同步/手动下载）与整库上传（首次上传）走分块传输（utils/chunked_transfer.py），支持断点续传。
+"""
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+
+import utils.constants as constants
+from utils.api_manager import APIManager, APIRequestError
+from utils.data_adapter import DataAdapter, json_file_lock
+import utils.sync_protocol as sync_protocol
+import utils.merge_engine as merge_engine
+from utils.chunked_transfer import ChunkedTransfer
+
+logger = logging.getLogger(__name__)
+
+
+class SyncEngine:
+    """增量同步引擎"""
+
+    def __init__(self, data_adapter: DataAdapter, api_manager: Optional[APIManager] = None):
+        self.data_adapter = data_adapter
+        self.api_manager = api_manager
+        self.state_file = constants.sync_state_abs_path
+        # user_id: 状态所属用户；rev/etag: 已同步到的云端版本；pushed_seq: 已上传的本地变更序号
+        self.state: Dict[str, Any] = {'user_id': 0, 'rev': 0, 'etag': None, 'pushed_seq': 0}
+        # 后端是否支持增量接口/分块传输接口（首次 404 后置为 False）
+        self.delta_supported = True
+        self.chunked_supported = True
+        self._transfer: Optional[ChunkedTransfer] = None
+        self.load_state()
+        # 共同祖先快照 {实体键: 实体}（按需加载）
+        self.base_file = constants.sync_base_abs_path
+        self._base: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # ==================== 状态持久化 ====================
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        except Exception as e:
+            logger.warning(f"加载同步状态失败: {e}")
+
+    def save_state(self) -> bool:
+        try:
+            with json_file_lock:
+                with open(self.state_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.state, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            logger.warning(f"保存同步状态失败: {e}")
+            return False
+
+    def get_transfer(self) -> ChunkedTransfer:
+        """分块传输器（跟随当前 api_manager）"""
+        if self._transfer is None:
+            self._transfer = ChunkedTransfer(self.api_manager)
+        self._transfer.api_manager = self.api_manager
+        return self._transfer
+
+    def bind_user(self, user_id: int):
+        """切换用户时重置同步进度（下一次拉取为完整快照）"""
+        self.data_adapter.user_id = user_id
+        if self.state.get('user_id') != user_id:
+            self.state = {'user_id': user_id, 'rev': 0, 'etag': None, 'pushed_seq': 0}
+            self.save_state()
+            self.save_base({})
+
+    def get_base(self) -> Dict[str, Dict[str, Any]]:
+        """上次同步时本地与云端一致的实体表"""
+        if self._base is None:
+            self._base = {}
+            if os.path.exists(self.base_file):
+                try:
+                    with open(self.base_file, 'r', encoding='utf-8') as f:
+                        self._base = json.load(f)
+                except Exception as e:
+                    logger.warning(f"加载同步基准快照失败: {e}")
+        return self._base
+
+    def save_base(self, base: Dict[str, Dict[str, Any]]) -> bool:
+        self._base = base
+        try:
+            with json_file_lock:
+                with open(self.base_file, 'w', encoding='utf-8') as f:
+                    json.dump(base, f, ensure_ascii=False, separators=(',', ':'))
+            return True
+        except Exception as e:
+            logger.warning(f"保存同步基准快照失败: {e}")
+            return False
+
+    # ==================== 拉取 ====================
+
+    def fetch_remote_changes(self, full: bool = False, progress: Optional[Callable[[int, str], None]] = None,
+                             check: Optional[Callable[[], None]] = None) -> Optional[Dict[str, Any]]:
+        """请求云端变更（可在后台线程调用）；无变化返回 None
+        full=True 时忽略本地版本，请求云端完整快照；progress/check 用于分块下载的进度与取消"""
+        if not self.api_manager:
+            raise Exception("未配置API管理器，无法同步")
+        uid = self.state.get('user_id') or 0
+        if (full or not self.state.get('rev')) and self.chunked_supported:
+            try:
+                return self.get_transfer().download_snapshot(uid, progress, check)
+            except APIRequestError as e:
+                if e.status_code != 404:
+                    raise
+                logger.info("云端不支持分块传输，回退到普通下载")
+                self.chunked_supported = False
+        if self.delta_supported:
+            since, etag = (0, None) if full else (self.state.get('rev', 0), self.state.get('etag'))
+            try:
+                return self.api_manager.get_user_changes(since, etag, uid)
+            except APIRequestError as e:
+                if e.status_code != 404:
+                    raise
+                logger.info("云端不支持增量同步，回退到整库下载")
+                self.delta_supported = False
+        response = self.api_manager.get_user_data(uid)
+        if response.get('code') != 200:
+            return None
+        return {'code': 200, 'full': True, 'legacy': True, 'rev': 0,
+                'tree': response.get('scripts_data', []), 'changes': [], 'deleted': []}
+
+    def apply_remote_changes(self, result: Optional[Dict[str, Any]]) -> bool:
+        """在主线程应用 fetch_remote_changes 的结果；返回本地数据是否发生变化"""
+        if not result or result.get('code', 200) != 200:
+            return False
+        adapter = self.data_adapter
+        # 应用前的变更序号：之后的变更来自修复云端树中的重复ID，需要上传
+        seq = adapter.change_seq
+        changes = result.get('changes') or []
+        deleted = result.get('deleted') or []
+        full = bool(result.get('full') or result.get('legacy'))
+        base = None
+        if full:
+            tree = result.get('tree')
+            if tree is None:
+                tree = sync_protocol.build_tree(changes)
+            # 基准快照取云端的内容（修复重复ID会就地改写树，先展开）
+            base = sync_protocol.flatten_tree(tree)
+            adapter.apply_remote_changes([], [], True, tree)
+            # 完整快照覆盖了本地，尚未上传的本地变更随之作废
+            self.state['pushed_seq'] = seq
+            adapter.compact_change_log(seq)
+        elif changes or deleted:
+            adapter.apply_remote_changes(changes, deleted)
+        if not result.get('legacy'):
+            self.state['rev'] = result.get('rev', self.state.get('rev', 0))
+            self.state['etag'] = result.get('etag')
+        self.save_state()
+        changed = bool(full or changes or deleted)
+        if changed:
+            self.save_base(base if base is not None else sync_protocol.flatten_tree(adapter.scripts_data))
+        return changed
+
+    # ==================== 合并 ====================
+
+    def merge_remote_changes(self, result: Dict[str, Any]) -> merge_engine.MergeResult:
+        """本地有未上传修改时：以基准快照为共同祖先，三方合并本地与云端（主线程调用）"""
+        base = self.get_base()
+        if result.get('tree') is not None:
+            # 整库下载（含分块下载）给出的是树
+            remote = sync_protocol.flatten_tree(result['tree'])
+        elif result.get('full'):
+            remote = {sync_protocol.entity_key(e['kind'], e['id']): e for e in result.get('changes') or []}
+        else:
+            remote = merge_engine.apply_to_entity_map(base, result.get('changes') or [], result.get('deleted') or [])
+        local = sync_protocol.flatten_tree(self.data_adapter.scripts_data)
+        merge = merge_engine.merge(base, local, remote)
+        merge.context.update({'rev': result.get('rev', self.state.get('rev', 0)), 'etag': result.get('etag'),
+                              'legacy': bool(result.get('legacy')), 'local_seq': self.data_adapter.change_seq})
+        return merge
+
+    def apply_merge(self, merge: merge_engine.MergeResult) -> bool:
+        """写入合并结果：本地树替换为合并结果，合并结果与云端的差异记为待上传的本地修改"""
+        merged = merge.finalize()
+        adapter = self.data_adapter
+        adapter.scripts_data = sync_protocol.build_tree(merged.values())
+
+        # 之前的本地修改已体现在合并结果中，重新按“合并结果 - 云端”记录待上传内容
+        self.state['pushed_seq'] = adapter.change_seq
+        if not merge.context.get('legacy'):
+            self.state['rev'] = merge.context.get('rev', self.state.get('rev', 0))
+            self.state['etag'] = merge.context.get('etag')
+        adapter.compact_change_log(adapter.change_seq)
+        changed, deleted = merge_engine.diff_entity_maps(merge.remote, merged)
+        adapter.mark_entities(changed, deleted)
+        adapter.repair_duplicate_ids()
+        self.save_state()
+        self.save_base(merge.remote)
+        return adapter.save_local_scripts_data()
+
+    def pull(self, full: bool = False) -> bool:
+        """拉取并应用云端变更；full=True 时忽略本地版本，以云端完整快照覆盖本地"""
+        return self.apply_remote_changes(self.fetch_remote_changes(full))
+
+    # ==================== 上传 ====================
+
+    def prepare_push(self, since_seq: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """在主线程收集待上传的本地变更；无变更返回 None
+        since_seq 默认为已上传序号；发件箱中已有待发批次时传入最后一批的序号"""
+        if since_seq is None:
+            since_seq = self.state.get('pushed_seq', 0)
+        never_synced = not self.state.get('rev') and not since_seq
+        if never_synced and not self.data_adapter.change_seq:
+            # 从未同步且本地未做过修改（默认话术）：以云端为准，不上传
+            return None
+        complete = never_synced or not self.delta_supported
+        seq, changes, deleted = self.data_adapter.collect_changes(since_seq, full=complete)
+        if not changes and not deleted:
+            return None
+        # complete: changes 为整棵树的实体（整库回退时可直接还原为树，无需在后台线程读取 scripts_data）
+        return {'seq': seq, 'base_rev': self.state.get('rev', 0), 'changes': changes, 'deleted': deleted,
+                'full': never_synced, 'complete': complete}
+
+    def send_push(self, payload: Dict[str, Any], progress: Optional[Callable[[int, str], None]] = None,
+                  check: Optional[Callable[[], None]] = None,
+                  run_in_main: Optional[Callable[[Callable[[], Any]], Any]] = None) -> Dict[str, Any]:
+        """发送变更（可在后台线程调用）；完整快照走分块上传
+        在后台线程调用时传入 run_in_main（JobContext.call_in_main）：回退整库上传需要读取本地树，在主线程取快照"""
+        if not self.api_manager:
+            raise Exception("未配置API管理器，无法同步")
+        uid = self.state.get('user_id') or 0
+        if payload.get('full') and self.chunked_supported:
+            try:
+                return self.get_transfer().upload_snapshot(uid, payload['changes'], progress, check)
+            except APIRequestError as e:
+                if e.status_code != 404:
+                    raise
+                logger.info("云端不支持分块传输，回退到普通上传")
+                self.chunked_supported = False
+        if self.delta_supported:
+            try:
+                return self.api_manager.push_user_changes(payload['base_rev'], payload['changes'],
+                                                          payload['deleted'], uid, payload.get('full', False))
+            except APIRequestError as e:
+                if e.status_code != 404:
+                    raise
+                logger.info("云端不支持增量同步，回退到整库上传")
+                self.delta_supported = False
+        # 回退：整库上传，需要完整树
+        if payload.get('complete'):
+            entities = payload['changes']
+        else:
+            # 界面可能同时在修改树：在主线程取实体快照（新建的字典），在本线程还原为树
+            def snapshot():
+                return self.data_adapter.collect_changes(full=True)[1]
+            entities = run_in_main(snapshot) if run_in_main else snapshot()
+        tree = sync_protocol.build_tree(entities)
+        return self.api_manager.save_user_data({"scripts_data": tree}, uid)
+
+    def commit_push(self, payload: Dict[str, Any], response: Dict[str, Any]) -> bool:
+        """在主线程记录上传结果"""
+        if response.get('code') != 200:
+            return False
+        self.state['pushed_seq'] = payload['seq']
+        # 上传期间云端没有其他变更时直接快进版本；否则保持原版本，下一次拉取会补齐
+        if 'rev' in response and response.get('previous_rev') == payload['base_rev']:
+            self.state['rev'] = response['rev']
+            self.state['etag'] = response.get('etag')
+        self.save_state()
+        self.data_adapter.compact_change_log(payload['seq'])
+        # 已上传的实体双方一致，并入基准快照
+        if payload.get('full'):
+            self.save_base({sync_protocol.entity_key(e['kind'], e['id']): e for e in payload['changes']})
+        else:
+            self.save_base(merge_engine.apply_to_entity_map(self.get_base(), payload['changes'], payload['deleted']))
+        return True
+
+    def push(self) -> bool:
+        """上传本地变更；没有待上传的变更也视为成功"""
+        payload = self.prepare_push()
+        if payload is None:
+            return True
+        return self.commit_push(payload, self.send_push(payload))
@@ -0,0 +1,273 @@
+"""
+增量同步协议 - 话术树与“实体变更”之间的转换（客户端与参考服务端共用）
+
+实体：四级树中的每个节点（话术类型/一级分类/二级分类/话术），格式：
+    {
+        "kind": "script",          # type | level_one | level_two | script
+        "id": 123,
+        "parent": 45,              # 父节点ID，话术类型为 None
+        "pos": 0,                  # 在父节点 data 列表中的下标
+        "fields": {"title": "", "content": "...", "bgColor": ""}
+    }
+实体键为 "kind:id"，删除以实体键表示（删除父节点即删除整棵子树）。
+
+分块传输：整库按“话术类型 + 每个一级分类”切分为若干块（过大的一级分类再按大小切分），
+每块是实体的 JSON 数组，附带 sha256；清单（manifest）列出全部块的 id/sha256/size。
+"""
+import hashlib
+import json
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+KINDS = ('type', 'level_one', 'level_two', 'script')
+KIND_LEVEL = {kind: level for level, kind in enumerate(KINDS)}
+FIELDS = {
+    'type': ('name',),
+    'level_one': ('name',),
+    'level_two': ('name',),
+    'script': ('title', 'content', 'bgColor'),
+}
+
+
+def entity_key(kind: str, entity_id: Any) -> str:
+    return f"{kind}:{entity_id}"
+
+
+def parent_key(entity: Dict[str, Any]) -> Optional[str]:
+    level = KIND_LEVEL[entity['kind']]
+    if level == 0:
+        return None
+    return entity_key(KINDS[level - 1], entity.get('parent'))
+
+
+def node_fields(kind: str, node: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: node.get(name, '') for name in FIELDS[kind]}
+
+
+def make_entity(kind: str, node: Dict[str, Any], parent_id: Any, pos: int) -> Dict[str, Any]:
+    return {'kind': kind, 'id': node.get('id'), 'parent': parent_id, 'pos': pos, 'fields': node_fields(kind, node)}
+
+
+def walk_tree(tree: List[Dict[str, Any]]):
+    """遍历树：产出 (kind, node, parent_node, siblings, pos)"""
+    stack: List[Tuple[int, Optional[Dict[str, Any]], List[Dict[str, Any]]]] = [(0, None, tree or [])]
+    while stack:
+        level, parent, siblings = stack.pop()
+        kind = KINDS[level]
+        for pos, node in enumerate(siblings):
+            if not isinstance(node, dict):
+                continue
+            yield kind, node, parent, siblings, pos
+            if level < 3:
+                stack.append((level + 1, node, node.setdefault('data', [])))
+
+
+def flatten_tree(tree: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """树 -> {实体键: 实体}"""
+    entities = {}
+    for kind, node, parent, _, pos in walk_tree(tree):
+        entity = make_entity(kind, node, parent.get('id') if parent else None, pos)
+        entities[entity_key(kind, entity['id'])] = entity
+    return entities
+
+
+def new_node(entity: Dict[str, Any]) -> Dict[str, Any]:
+    node = {'id': entity['id']}
+    node.update(node_fields(entity['kind'], entity.get('fields') or {}))
+    if entity['kind'] != 'script':
+        node['data'] = []
+    return node
+
+
+class TreeBuilder:
+    """分批加入实体、增量构建树：每批并入后即可丢弃该批实体（分块下载时逐块调用 add）
+
+    同级节点按 pos 排序；父节点尚未加入的实体先挂起，父节点到达后再并入，最终仍缺少父节点的实体丢弃。
+    """
+
+    def __init__(self):
+        self.tree: List[Dict[str, Any]] = []
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        # 父实体键 -> 已加入子节点的 pos（升序，与 data 列表一一对应）
+        self._positions: Dict[Optional[str], List[int]] = {}
+        # 父实体键 -> 等待父节点的实体
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add(self, entities: Iterable[Dict[str, Any]]):
+        for entity in sorted(entities, key=lambda e: (KIND_LEVEL[e['kind']], e.get('pos', 0))):
+            self._attach(entity)
+
+    def _attach(self, entity: Dict[str, Any]):
+        pkey = parent_key(entity)
+        if pkey is None:
+            siblings = self.tree
+        else:
+            parent = self._nodes.get(pkey)
+            if parent is None:
+                self._pending.setdefault(pkey, []).append(entity)
+                return
+            siblings = parent['data']
+        pos = entity.get('pos', 0)
+        positions = self._positions.setdefault(pkey, [])
+        index = len(positions) if not positions or positions[-1] <= pos else bisect_right(positions, pos)
+        positions.insert(index, pos)
+        node = new_node(entity)
+        siblings.insert(index, node)
+        key = entity_key(entity['kind'], entity['id'])
+        self._nodes[key] = node
+        for child in sorted(self._pending.pop(key, ()), key=lambda e: e.get('pos', 0)):
+            self._attach(child)
+
+    @property
+    def dropped(self) -> int:
+        """仍缺少父节点的实体数"""
+        return sum(len(entities) for entities in self._pending.values())
+
+
+def build_tree(entities: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """实体集合 -> 树（按 pos 排序，父节点缺失的实体丢弃）"""
+    builder = TreeBuilder()
+    builder.add(entities)
+    return builder.tree
+
+
+def apply_changes(tree: List[Dict[str, Any]], changes: Iterable[Dict[str, Any]],
+                  deleted: Iterable[str] = ()) -> int:
+    """将变更原地应用到树上：先删除，再按层级/位置 upsert；返回实际应用的条数"""
+    nodes: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+    for kind, node, _, siblings, _ in walk_tree(tree):
+        nodes[entity_key(kind, node.get('id'))] = (node, siblings)
+
+    applied = 0
+    for key in deleted or ():
+        found = nodes.pop(key, None)
+        if found is None:
+            continue
+        node, siblings = found
+        for i, sibling in enumerate(siblings):
+            if sibling is node:
+                del siblings[i]
+                break
+        applied += 1
+
+    for entity in sorted(changes or (), key=lambda e: (KIND_LEVEL[e['kind']], e.get('pos', 0))):
+        kind = entity['kind']
+        key = entity_key(kind, entity['id'])
+        pkey = parent_key(entity)
+        if pkey is None:
+            target = tree
+        else:
+            parent = nodes.get(pkey)
+            if parent is None:
+                # 父节点已被删除或尚不存在，丢弃
+                continue
+            target = parent[0].setdefault('data', [])
+
+        pos = max(0, min(int(entity.get('pos', len(target))), len(target)))
+        found = nodes.get(key)
+        if found is None:
+            node = new_node(entity)
+            target.insert(pos, node)
+        else:
+            node, siblings = found
+            node.update(node_fields(kind, entity.get('fields') or {}))
+            current = next((i for i, s in enumerate(siblings) if s is node), None)
+            if siblings is not target or current != pos:
+                if current is not None:
+                    del siblings[current]
+                pos = min(pos, len(target))
+                target.insert(pos, node)
+        nodes[key] = (node, target)
+        applied += 1
+    return applied
+
+
+# ==================== 分块传输 ====================
+
+DEFAULT_CHUNK_BYTES = 256 * 1024
+
+
+def chunk_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _iter_chunk_groups(tree: List[Dict[str, Any]]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """按 类型 / 一级分类 分组产出实体"""
+    types = [make_entity('type', node, None, pos) for pos, node in enumerate(tree or []) if isinstance(node, dict)]
+    yield 'types', types
+    for type_node in tree or []:
+        if not isinstance(type_node, dict):
+            continue
+        for pos, level_one in enumerate(type_node.get('data') or []):
+            entities = [make_entity('level_one', level_one, type_node.get('id'), pos)]
+            for pos2, level_two in enumerate(level_one.get('data') or []):
+                entities.append(make_entity('level_two', level_two, level_one.get('id'), pos2))
+                for pos3, script in enumerate(level_two.get('data') or []):
+                    entities.append(make_entity('script', script, level_two.get('id'), pos3))
+            yield f"l1-{level_one.get('id')}", entities
+
+
+def _iter_entity_groups(entities: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """与 _iter_chunk_groups 相同的分组，直接由完整快照的实体产出（不构建树；父节点缺失的实体丢弃）"""
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for entity in entities:
+        children.setdefault(parent_key(entity), []).append(entity)
+    for siblings in children.values():
+        siblings.sort(key=lambda e: e.get('pos', 0))
+
+    def regroup(kind: str, parent_id: Any) -> List[Dict[str, Any]]:
+        """parent_id 下的 kind 子实体，pos 按排序后的下标重新编号（与由树产出的块一致）"""
+        parent = None if parent_id is None else entity_key(KINDS[KIND_LEVEL[kind] - 1], parent_id)
+        return [{'kind': kind, 'id': e['id'], 'parent': parent_id, 'pos': pos,
+                 'fields': node_fields(kind, e.get('fields') or {})}
+                for pos, e in enumerate(children.get(parent, ()))]
+
+    types = regroup('type', None)
+    yield 'types', types
+    for type_entity in types:
+        for level_one in regroup('level_one', type_entity['id']):
+            group = [level_one]
+            for level_two in regroup('level_two', level_one['id']):
+                group.append(level_two)
+                group.extend(regroup('script', level_two['id']))
+            yield f"l1-{level_one['id']}", group
+
+
+def _iter_chunks(groups: Iterable[Tuple[str, List[Dict[str, Any]]]], max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    for group_id, entities in groups:
+        parts: List[List[bytes]] = [[]]
+        size = 2
+        for entity in entities:
+            encoded = json.dumps(entity, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if parts[-1] and size + len(encoded) + 1 > max_bytes:
+                parts.append([])
+                size = 2
+            parts[-1].append(encoded)
+            size += len(encoded) + 1
+        for n, part in enumerate(parts):
+            chunk_id = group_id if len(parts) == 1 else f"{group_id}.{n}"
+            yield chunk_id, b'[' + b','.join(part) + b']'
+
+
+def build_chunks(tree: List[Dict[str, Any]], max_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[str, bytes]]:
+    """整棵树 -> [(块ID, 块内容)]，单块不超过 max_bytes（单个实体超限时独占一块）"""
+    return list(_iter_chunks(_iter_chunk_groups(tree), max_bytes))
+
+
+def iter_entity_chunks(entities: Iterable[Dict[str, Any]],
+                       max_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[Tuple[str, bytes]]:
+    """完整快照的实体 -> 逐块产出 (块ID, 块内容)，与 build_chunks(build_tree(entities)) 相同，但同时只编码一块"""
+    return _iter_chunks(_iter_entity_groups(entities), max_bytes)
+
+
+def build_manifest(chunks: Iterable[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    return [{'id': chunk_id, 'sha256': chunk_digest(data), 'size': len(data)} for chunk_id, data in chunks]
+
+
+def manifest_digest(manifest: List[Dict[str, Any]]) -> str:
+    """清单整体摘要（内容相同的上传可据此续传）"""
+    return chunk_digest('\n'.join(f"{c['id']}:{c['sha256']}" for c in manifest).encode('utf-8'))
+
+
+def parse_chunk(data: bytes) -> List[Dict[str, Any]]:
+    return json.loads(data.decode('utf-8'))
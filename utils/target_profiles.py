@@ -0,0 +1,113 @@
+"""
+目标窗口档案 - 每个窗口句柄只向系统查询一次进程ID/窗口类名，并匹配到 APPS 中的软件
+档案按句柄缓存（LRU），窗口销毁后由监控线程清理；发送逻辑从档案读取各软件的发送参数。
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import utils.platform_shim as platform_shim
+from utils.dock_apps import APPS, ALL_APPS_NAME, DockAppMatcher
+
+# 默认发送参数：提交按键（多个键用 + 连接，如 "ctrl+enter"）与激活窗口后的等待时间（秒）
+DEFAULT_SUBMIT_KEY = "enter"
+DEFAULT_FOCUS_DELAY = 0.2
+
+
+class TargetProfile:
+    """单个目标窗口的档案"""
+
+    def __init__(self, hwnd: int, pid: int, class_name: str, app_name: Optional[str], is_own: bool,
+                 submit_key: str = DEFAULT_SUBMIT_KEY, focus_delay: float = DEFAULT_FOCUS_DELAY):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.class_name = class_name
+        self.app_name = app_name
+        self.is_own = is_own
+        self.submit_key = submit_key
+        self.focus_delay = focus_delay
+
+    def submit_keys(self) -> list:
+        """提交按键拆分为 platform_shim.keyboard.hotkey 参数"""
+        return [k.strip() for k in (self.submit_key or DEFAULT_SUBMIT_KEY).split('+') if k.strip()]
+
+
+class TargetProfileRegistry:
+    """窗口句柄 -> 目标档案 的 LRU 缓存（监控线程与主线程共用，内部加锁）"""
+
+    def __init__(self, capacity: int = 128):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[int, TargetProfile]" = OrderedDict()
+        self._own_pid = os.getpid()
+        # 全部软件的匹配器，用于把窗口归属到 APPS 中的某个软件
+        self._matcher = DockAppMatcher([app.get("name") for app in APPS], cache_size=capacity)
+        # 软件名 -> 发送参数
+        self._send_settings: Dict[str, dict] = {}
+        for app in APPS:
+            name = app.get("name")
+            if name and name != ALL_APPS_NAME and name not in self._send_settings:
+                self._send_settings[name] = {
+                    'submit_key': app.get("submit_key", DEFAULT_SUBMIT_KEY),
+                    'focus_delay': app.get("focus_delay", DEFAULT_FOCUS_DELAY),
+                }
+
+    def resolve(self, hwnd: int, title: str = "") -> Optional[TargetProfile]:
+        """获取句柄对应的档案；首次出现时查询系统并缓存"""
+        if not hwnd:
+            return None
+        with self._lock:
+            profile = self._profiles.get(hwnd)
+            if profile is not None:
+                self._profiles.move_to_end(hwnd)
+                return profile
+
+        try:
+            pid = platform_shim.windows.window_pid(hwnd)
+        except Exception:
+            pid = 0
+        try:
+            class_name = platform_shim.windows.class_name(hwnd)
+        except Exception:
+            class_name = ""
+
+        with self._lock:
+            app_name = self._matcher.match_app(title or "")
+            settings = self._send_settings.get(app_name, {})
+            profile = TargetProfile(
+                hwnd, pid, class_name, app_name, pid == self._own_pid,
+                settings.get('submit_key', DEFAULT_SUBMIT_KEY),
+                settings.get('focus_delay', DEFAULT_FOCUS_DELAY),
+            )
+            self._profiles[hwnd] = profile
+            if len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, hwnd: int) -> Optional[TargetProfile]:
+        """仅查缓存，不查询系统"""
+        with self._lock:
+            return self._profiles.get(hwnd)
+
+    def invalidate(self, hwnd: int):
+        """窗口销毁后移除档案（句柄可能被系统复用）"""
+        with self._lock:
+            self._profiles.pop(hwnd, None)
+
+    def prune(self, is_alive: Callable[[int], bool]) -> int:
+        """清理已销毁窗口的档案，返回清理数量"""
+        with self._lock:
+            handles = list(self._profiles)
+        dead = []
+        for hwnd in handles:
+            try:
+                if not is_alive(hwnd):
+                    dead.append(hwnd)
+            except Exception:
+                dead.append(hwnd)
+        if dead:
+            with self._lock:
+                for hwnd in dead:
+                    self._profiles.pop(hwnd, None)
+        return len(dead)